@@ -0,0 +1,101 @@
+"""initial schema
+
+Схема в том виде, в каком ее создавал Base.metadata.create_all.
+Уже существующие таблицы (база до миграций) пропускаются.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 20:37:19.495620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Базы, созданные до миграций через Base.metadata.create_all, уже содержат
+    # эти таблицы: пропускаем их, чтобы первый alembic upgrade head не падал
+    # с "relation already exists" (для таких баз это то же, что stamp 0001)
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'archived_queue_entries' not in existing:
+        op.create_table('archived_queue_entries',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('original_id', sa.String(), nullable=False),
+        sa.Column('queue_number', sa.Integer(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=False),
+        sa.Column('phone', sa.String(), nullable=False),
+        sa.Column('programs', sa.JSON(), nullable=False),
+        sa.Column('status', sa.Enum('WAITING', 'IN_PROGRESS', 'COMPLETED', 'PAUSED', 'CANCELLED', name='archivequeuestatus'), nullable=False),
+        sa.Column('notes', sa.String(), nullable=True),
+        sa.Column('assigned_employee_name', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('processing_time', sa.Integer(), nullable=True),
+        sa.Column('form_language', sa.String(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('archive_reason', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'queue_entries' not in existing:
+        op.create_table('queue_entries',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('queue_number', sa.Integer(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=False),
+        sa.Column('phone', sa.String(), nullable=False),
+        sa.Column('programs', sa.JSON(), nullable=False),
+        sa.Column('status', sa.Enum('WAITING', 'IN_PROGRESS', 'COMPLETED', 'PAUSED', name='queuestatus'), nullable=False),
+        sa.Column('notes', sa.String(), nullable=True),
+        sa.Column('assigned_employee_name', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('processing_time', sa.Integer(), nullable=True),
+        sa.Column('form_language', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'users' not in existing:
+        op.create_table('users',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=False),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('desk', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+        )
+    if 'video_settings' not in existing:
+        op.create_table('video_settings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('youtube_url', sa.String(length=500), nullable=True),
+        sa.Column('is_enabled', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_video_settings_id'), 'video_settings', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_video_settings_id'), table_name='video_settings')
+    op.drop_table('video_settings')
+    op.drop_table('users')
+    op.drop_table('queue_entries')
+    op.drop_table('archived_queue_entries')
+    # Типы enum drop_table не удаляет - без этого повторный upgrade падает
+    for name in ('queuestatus', 'archivequeuestatus'):
+        sa.Enum(name=name).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,41 @@
+"""queue numbering counter
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 20:37:21.873540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('queue_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('number_date', sa.Date(), nullable=False),
+    sa.Column('last_number', sa.Integer(), nullable=False),
+    sa.Column('last_order_key', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column('queue_entries', sa.Column('order_key', sa.BigInteger(), nullable=True))
+    # Существующие заявки сохраняют порядок создания
+    op.execute("""
+        UPDATE queue_entries q SET order_key = r.rn
+        FROM (SELECT id, row_number() OVER (ORDER BY created_at, queue_number) AS rn FROM queue_entries) r
+        WHERE q.id = r.id
+    """)
+    op.alter_column('queue_entries', 'order_key', nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column('queue_entries', 'order_key')
+    op.drop_table('queue_counters')
@@ -0,0 +1,34 @@
+"""queue hot path indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 20:37:34.743644
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_archived_queue_entries_original_id'), 'archived_queue_entries', ['original_id'], unique=False)
+    op.create_index('ix_queue_entries_employee_status_order', 'queue_entries', ['assigned_employee_name', 'status', 'order_key'], unique=False)
+    op.create_index('ix_queue_entries_full_name_created', 'queue_entries', ['full_name', 'created_at'], unique=False)
+    op.create_index('ix_queue_entries_phone_active', 'queue_entries', ['phone'], unique=False, postgresql_where=sa.text("status IN ('WAITING', 'IN_PROGRESS')"))
+    op.create_index('ix_queue_entries_status_order', 'queue_entries', ['status', 'order_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_queue_entries_status_order', table_name='queue_entries')
+    op.drop_index('ix_queue_entries_phone_active', table_name='queue_entries', postgresql_where=sa.text("status IN ('WAITING', 'IN_PROGRESS')"))
+    op.drop_index('ix_queue_entries_full_name_created', table_name='queue_entries')
+    op.drop_index('ix_queue_entries_employee_status_order', table_name='queue_entries')
+    op.drop_index(op.f('ix_archived_queue_entries_original_id'), table_name='archived_queue_entries')
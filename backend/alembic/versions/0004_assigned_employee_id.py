@@ -0,0 +1,48 @@
+"""assigned employee id
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 20:51:13.878100
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Сотрудник для старых заявок ищется по имени (при тезках - самый ранний)
+BACKFILL_EMPLOYEE_ID = """
+    UPDATE {table} t SET assigned_employee_id = (
+        SELECT u.id FROM users u
+        WHERE u.full_name = t.assigned_employee_name
+        ORDER BY (u.role = 'admission') DESC, u.created_at
+        LIMIT 1
+    )
+    WHERE t.assigned_employee_name IS NOT NULL
+"""
+
+
+def upgrade() -> None:
+    op.add_column('archived_queue_entries', sa.Column('assigned_employee_id', sa.String(), nullable=True))
+    op.add_column('queue_entries', sa.Column('assigned_employee_id', sa.String(), nullable=True))
+    op.execute(BACKFILL_EMPLOYEE_ID.format(table='queue_entries'))
+    op.execute(BACKFILL_EMPLOYEE_ID.format(table='archived_queue_entries'))
+    op.drop_index('ix_queue_entries_employee_status_order', table_name='queue_entries')
+    op.create_index('ix_queue_entries_employee_status_order', 'queue_entries', ['assigned_employee_id', 'status', 'order_key'], unique=False)
+    op.create_foreign_key('fk_queue_entries_assigned_employee_id_users', 'queue_entries', 'users', ['assigned_employee_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_queue_entries_assigned_employee_id_users', 'queue_entries', type_='foreignkey')
+    op.drop_index('ix_queue_entries_employee_status_order', table_name='queue_entries')
+    op.create_index('ix_queue_entries_employee_status_order', 'queue_entries', ['assigned_employee_name', 'status', 'order_key'], unique=False)
+    op.drop_column('queue_entries', 'assigned_employee_id')
+    op.drop_column('archived_queue_entries', 'assigned_employee_id')
@@ -0,0 +1,28 @@
+"""list keyset indexes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 21:00:13.873501
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_archived_queue_entries_created_id', 'archived_queue_entries', ['created_at', 'id'], unique=False)
+    op.create_index('ix_queue_entries_created_id', 'queue_entries', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_queue_entries_created_id', table_name='queue_entries')
+    op.drop_index('ix_archived_queue_entries_created_id', table_name='archived_queue_entries')
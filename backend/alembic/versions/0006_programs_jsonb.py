@@ -0,0 +1,48 @@
+"""programs jsonb
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 21:01:21.747410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('archived_queue_entries', 'programs',
+               existing_type=postgresql.JSON(astext_type=sa.Text()),
+               type_=postgresql.JSONB(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='programs::jsonb')
+    op.create_index('ix_archived_queue_entries_programs', 'archived_queue_entries', ['programs'], unique=False, postgresql_using='gin')
+    op.alter_column('queue_entries', 'programs',
+               existing_type=postgresql.JSON(astext_type=sa.Text()),
+               type_=postgresql.JSONB(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='programs::jsonb')
+    op.create_index('ix_queue_entries_programs', 'queue_entries', ['programs'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_queue_entries_programs', table_name='queue_entries', postgresql_using='gin')
+    op.alter_column('queue_entries', 'programs',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=postgresql.JSON(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='programs::json')
+    op.drop_index('ix_archived_queue_entries_programs', table_name='archived_queue_entries', postgresql_using='gin')
+    op.alter_column('archived_queue_entries', 'programs',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=postgresql.JSON(astext_type=sa.Text()),
+               existing_nullable=False,
+               postgresql_using='programs::json')
@@ -0,0 +1,62 @@
+"""search columns
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 21:05:46.870773
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+# Копия app.normalization на момент миграции (миграции не импортируют код приложения)
+SEARCH_NAME_SQL = 'btrim(regexp_replace(translate(full_name, \'ABCDEFGHIJKLMNOPQRSTUVWXYZАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯёйӘәІіҢңҒғҮүҰұҚқӨөҺһÀÁÂÃÄÅàáâãäåÇçÈÉÊËèéêëÌÍÎÏìíîïÑñÒÓÔÕÖòóôõöÙÚÛÜùúûüÝýÿĞğŞşİı\', \'abcdefghijklmnopqrstuvwxyzабвгдеежзииклмнопрстуфхцчшщъыьэюяеиааииннггууууккооххaaaaaaaaaaaacceeeeeeeeiiiiiiiinnoooooooooouuuuuuuuyyyggssii\'), \'[[:space:].,\'\'"`-]+\', \' \', \'g\'), \' \')'
+PHONE_DIGITS_SQL = "CASE WHEN length(regexp_replace(phone, '[^0-9]', '', 'g')) = 11 AND left(regexp_replace(phone, '[^0-9]', '', 'g'), 1) = '8' THEN '7' || substr(regexp_replace(phone, '[^0-9]', '', 'g'), 2) WHEN length(regexp_replace(phone, '[^0-9]', '', 'g')) = 10 THEN '7' || regexp_replace(phone, '[^0-9]', '', 'g') ELSE regexp_replace(phone, '[^0-9]', '', 'g') END"
+
+TRGM_INDEXES = (
+    ('ix_queue_entries_search_name_trgm', 'queue_entries', 'search_name'),
+    ('ix_queue_entries_phone_digits_trgm', 'queue_entries', 'phone_digits'),
+    ('ix_archived_queue_entries_search_name_trgm', 'archived_queue_entries', 'search_name'),
+    ('ix_archived_queue_entries_phone_digits_trgm', 'archived_queue_entries', 'phone_digits'),
+    ('ix_archived_queue_entries_employee_name_trgm', 'archived_queue_entries', 'assigned_employee_name'),
+)
+
+
+def upgrade() -> None:
+    for table in ('queue_entries', 'archived_queue_entries'):
+        op.add_column(table, sa.Column('search_name', sa.String(), sa.Computed(SEARCH_NAME_SQL, persisted=True), nullable=True))
+        op.add_column(table, sa.Column('phone_digits', sa.String(), sa.Computed(PHONE_DIGITS_SQL, persisted=True), nullable=True))
+
+    op.drop_index('ix_queue_entries_full_name_created', table_name='queue_entries')
+    op.create_index('ix_queue_entries_search_name_created', 'queue_entries', ['search_name', 'created_at'], unique=False)
+
+    # pg_trgm входит в contrib (есть в образе postgres); без него поиск работает, но без индексов
+    bind = op.get_bind()
+    if not bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar():
+        logger.warning("pg_trgm is not available, trigram search indexes were not created")
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRGM_INDEXES:
+        op.create_index(name, table, [column], unique=False, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    for name, table, _ in TRGM_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+    op.drop_index('ix_queue_entries_search_name_created', table_name='queue_entries')
+    op.create_index('ix_queue_entries_full_name_created', 'queue_entries', ['full_name', 'created_at'], unique=False)
+    for table in ('queue_entries', 'archived_queue_entries'):
+        op.drop_column(table, 'phone_digits')
+        op.drop_column(table, 'search_name')
@@ -0,0 +1,127 @@
+"""archive sync trigger
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 21:09:17.328975
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Колонки, изменение которых нужно отразить в архиве (order_key и updated_at сами по себе - нет)
+WATCHED_COLUMNS = (
+    "queue_number", "full_name", "phone", "programs", "status", "notes",
+    "assigned_employee_id", "assigned_employee_name", "processing_time", "form_language",
+)
+
+
+def _archive_values(row: str) -> str:
+    """Значения новой строки архива из заявки row (NEW в триггере или q в INSERT ... SELECT)"""
+    return f"""
+        gen_random_uuid()::text, {row}.id, {row}.queue_number, {row}.full_name, {row}.phone, {row}.programs,
+        {row}.status::text::archivequeuestatus, {row}.notes,
+        {row}.assigned_employee_id, {row}.assigned_employee_name, {row}.created_at, {row}.updated_at,
+        CASE WHEN {row}.status = 'COMPLETED' THEN COALESCE({row}.updated_at, now()) END,
+        {row}.processing_time, {row}.form_language, 'auto_backup'
+    """
+
+
+ARCHIVE_INSERT = """
+    INSERT INTO archived_queue_entries AS a (
+        id, original_id, queue_number, full_name, phone, programs, status, notes,
+        assigned_employee_id, assigned_employee_name, created_at, updated_at, completed_at,
+        processing_time, form_language, archive_reason
+    )
+"""
+
+ARCHIVE_UPSERT = """
+    ON CONFLICT (original_id) DO UPDATE SET
+        queue_number = EXCLUDED.queue_number,
+        full_name = EXCLUDED.full_name,
+        phone = EXCLUDED.phone,
+        programs = EXCLUDED.programs,
+        status = EXCLUDED.status,
+        notes = EXCLUDED.notes,
+        assigned_employee_id = EXCLUDED.assigned_employee_id,
+        assigned_employee_name = EXCLUDED.assigned_employee_name,
+        updated_at = EXCLUDED.updated_at,
+        completed_at = CASE WHEN EXCLUDED.status = 'COMPLETED' THEN COALESCE(a.completed_at, EXCLUDED.completed_at) END,
+        processing_time = EXCLUDED.processing_time,
+        form_language = EXCLUDED.form_language
+"""
+
+# Одна функция на все изменения заявки: архив меняется в той же транзакции, что и очередь
+SYNC_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION sync_queue_entry_archive() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        -- Причину передает приложение: SELECT set_config('app.archive_reason', ..., true)
+        UPDATE archived_queue_entries SET
+            archive_reason = COALESCE(NULLIF(current_setting('app.archive_reason', true), ''), 'deleted'),
+            archived_at = now(),
+            status = CASE WHEN OLD.status = 'COMPLETED' THEN status ELSE 'CANCELLED' END
+        WHERE original_id = OLD.id;
+        RETURN OLD;
+    END IF;
+
+    {ARCHIVE_INSERT} VALUES ({_archive_values("NEW")}) {ARCHIVE_UPSERT};
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Дубликаты от старых путей (auto_backup + auto_cleanup): оставляем последнюю запись
+DEDUPLICATE_ARCHIVE = """
+    DELETE FROM archived_queue_entries a
+    USING archived_queue_entries newer
+    WHERE newer.original_id = a.original_id
+      AND (newer.archived_at, newer.id) > (a.archived_at, a.id)
+"""
+
+# Заявки, удаленные мимо архива, пока они были в очереди
+MARK_DELETED = """
+    UPDATE archived_queue_entries a SET status = 'CANCELLED', archive_reason = 'deleted'
+    WHERE a.status IN ('WAITING', 'IN_PROGRESS', 'PAUSED')
+      AND NOT EXISTS (SELECT 1 FROM queue_entries q WHERE q.id = a.original_id)
+"""
+
+
+def upgrade() -> None:
+    op.execute(DEDUPLICATE_ARCHIVE)
+    op.drop_index('ix_archived_queue_entries_original_id', table_name='archived_queue_entries')
+    op.create_index('ix_archived_queue_entries_original_id', 'archived_queue_entries', ['original_id'], unique=True)
+
+    # Отмены, переносы и /admission/next раньше не попадали в архив - синхронизируем одним запросом
+    op.execute(f"{ARCHIVE_INSERT} SELECT {_archive_values('q')} FROM queue_entries q {ARCHIVE_UPSERT}")
+    op.execute(MARK_DELETED)
+
+    op.execute(SYNC_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER queue_entries_archive_sync "
+        "AFTER INSERT OR DELETE ON queue_entries "
+        "FOR EACH ROW EXECUTE FUNCTION sync_queue_entry_archive()"
+    )
+    changed = " OR ".join(f"OLD.{column} IS DISTINCT FROM NEW.{column}" for column in WATCHED_COLUMNS)
+    op.execute(
+        "CREATE TRIGGER queue_entries_archive_sync_update "
+        f"AFTER UPDATE ON queue_entries FOR EACH ROW WHEN ({changed}) "
+        "EXECUTE FUNCTION sync_queue_entry_archive()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS queue_entries_archive_sync_update ON queue_entries")
+    op.execute("DROP TRIGGER IF EXISTS queue_entries_archive_sync ON queue_entries")
+    op.execute("DROP FUNCTION IF EXISTS sync_queue_entry_archive()")
+    op.drop_index('ix_archived_queue_entries_original_id', table_name='archived_queue_entries')
+    op.create_index('ix_archived_queue_entries_original_id', 'archived_queue_entries', ['original_id'], unique=False)
@@ -0,0 +1,65 @@
+"""archive purge
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 21:19:46.324644
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Удаление пачкой: один UPDATE архива на весь DELETE вместо строчного триггера на каждую заявку
+PURGE_FUNCTION = """
+CREATE OR REPLACE FUNCTION sync_queue_entry_archive_purge() RETURNS trigger AS $$
+BEGIN
+    UPDATE archived_queue_entries a SET
+        archive_reason = COALESCE(NULLIF(current_setting('app.archive_reason', true), ''), 'deleted'),
+        archived_at = now(),
+        status = CASE WHEN purged.status = 'COMPLETED' THEN a.status ELSE 'CANCELLED' END
+    FROM purged
+    WHERE a.original_id = purged.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.create_index('ix_queue_entries_completed_updated', 'queue_entries', ['updated_at'], unique=False, postgresql_where=sa.text("status = 'COMPLETED'"))
+
+    op.execute(PURGE_FUNCTION)
+    # Таблицы переходов (REFERENCING) допустимы только у триггера на одно событие
+    op.execute("DROP TRIGGER queue_entries_archive_sync ON queue_entries")
+    op.execute(
+        "CREATE TRIGGER queue_entries_archive_sync "
+        "AFTER INSERT ON queue_entries "
+        "FOR EACH ROW EXECUTE FUNCTION sync_queue_entry_archive()"
+    )
+    op.execute(
+        "CREATE TRIGGER queue_entries_archive_sync_delete "
+        "AFTER DELETE ON queue_entries REFERENCING OLD TABLE AS purged "
+        "FOR EACH STATEMENT EXECUTE FUNCTION sync_queue_entry_archive_purge()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER queue_entries_archive_sync_delete ON queue_entries")
+    op.execute("DROP TRIGGER queue_entries_archive_sync ON queue_entries")
+    op.execute(
+        "CREATE TRIGGER queue_entries_archive_sync "
+        "AFTER INSERT OR DELETE ON queue_entries "
+        "FOR EACH ROW EXECUTE FUNCTION sync_queue_entry_archive()"
+    )
+    op.execute("DROP FUNCTION sync_queue_entry_archive_purge()")
+
+    op.drop_index('ix_queue_entries_completed_updated', table_name='queue_entries', postgresql_where=sa.text("status = 'COMPLETED'"))
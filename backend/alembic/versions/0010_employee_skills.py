@@ -0,0 +1,29 @@
+"""employee skills
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 21:39:30.042344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Пустой профиль - сотрудник принимает любые программы и языки (как раньше)
+    op.add_column('users', sa.Column('programs', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'[]'::jsonb"), nullable=False))
+    op.add_column('users', sa.Column('languages', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'[]'::jsonb"), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'languages')
+    op.drop_column('users', 'programs')
@@ -1,25 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, String
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, String, select, update
+from sqlalchemy.dialects.postgresql import array
+from typing import Dict, List, Literal, Optional
+from datetime import datetime
 
-from app.database import get_db
+from app.database import get_db, get_async_db, get_pool_status
 from app.models.user import User
 from app.models.queue import QueueEntry, QueueStatus
 from app.models.video import VideoSettings
-from app.schemas.queue import QueueResponse
+from app.schemas.queue import QueueResponse, QueueListPage
+from app.schemas.archive import ArchivedQueueListPage
 from app.schemas.video import VideoSettingsResponse, VideoSettingsUpdate
 from app.schemas import AdminUserCreate, UserResponse, UserUpdate
 from app.security import get_admin_user
 from app.services.user import create_user
-from app.services.queue import get_all_queue_entries
-from app.services.archive import get_archive_statistics, cleanup_old_completed_entries
+from app.services.archive import get_archive_statistics, purge_queue_entries
+from app.services.numbering import reset_ticket_numbering
+from app.services.queue import reassign_waiting_entries
+from app.services.announcements import schedule_pregeneration
+from app.services.events import DISPLAY_TOPIC, publish_employee_event, publish_global_event, publish_queue_event
+from app.services.captcha import get_captcha_stats
+from app.services.wait_time import estimator
+from app.services.export import stream_csv, stream_xlsx
+from app.services.pagination import paginate_by_created
+from app.services.search import search_entries
+from app.services.passwords import login_throttle, password_pool
+from app.services.user_cache import invalidate_user, user_cache
+from app.schemas.search import SearchResponse
+from app.normalization import normalize_name, normalize_phone
+from app.config import settings
 from app.models.archive import ArchivedQueueEntry
 from fastapi.responses import StreamingResponse
-import io
-import csv
-from openpyxl import Workbook 
-from openpyxl.styles import Font, PatternFill, Alignment
 
 router = APIRouter()
 
@@ -112,146 +125,210 @@ PROGRAM_MAPPING = {
     "phd in economics": "phdEconomics"
 }
 
+class ProgramNameIndex:
+    """
+    Название программы -> коды, посчитанное один раз при импорте
+
+    Каждая подстрока каждого названия ведет к его кодам, поэтому
+    "введенное - часть названия" - один поиск в словаре. Обратное
+    ("название - часть введенного") ищем префиксным деревом названий,
+    проходя по нему от каждой позиции введенной строки.
+    """
+
+    _CODE = ""  # Ключ узла дерева, в котором заканчивается название
+
+    def __init__(self, mapping: Dict[str, str]):
+        # Коды, введенные напрямую в любом регистре (appliedlinguistics)
+        self._exact = {**{code.lower(): code for code in mapping.values()}, **mapping}
+        self._by_substring: Dict[str, List[str]] = {}
+        for name, code in mapping.items():
+            for start in range(len(name)):
+                for end in range(start + 1, len(name) + 1):
+                    codes = self._by_substring.setdefault(name[start:end], [])
+                    if code not in codes:
+                        codes.append(code)
+        self._trie: dict = {}
+        for name, code in mapping.items():
+            node = self._trie
+            for char in name:
+                node = node.setdefault(char, {})
+            node[self._CODE] = code
+
+    def lookup(self, program_name: str) -> List[str]:
+        if not program_name:
+            return []
+        
+        query = program_name.lower().strip()
+        matching_codes = []
+        
+        def add(code: str):
+            if code not in matching_codes:
+                matching_codes.append(code)
+        
+        # Точное совпадение с названием или кодом
+        if query in self._exact:
+            add(self._exact[query])
+        
+        # Введенное - часть названия
+        for code in self._by_substring.get(query, ()):
+            add(code)
+        
+        # Название - часть введенного
+        for start in range(len(query)):
+            node = self._trie
+            for char in query[start:]:
+                node = node.get(char)
+                if node is None:
+                    break
+                if self._CODE in node:
+                    add(node[self._CODE])
+        
+        # Если ничего не найдено, возможно пользователь ввел код напрямую
+        if not matching_codes:
+            matching_codes.append(query)
+        
+        return matching_codes
+
+program_index = ProgramNameIndex(PROGRAM_MAPPING)
+
 def get_program_codes_by_name(program_name: str) -> List[str]:
     """
     Получает возможные коды программ по названию программы
     """
-    if not program_name:
-        return []
+    return program_index.lookup(program_name)
+
+def apply_queue_filters(
+    query,
+    model,
+    status: Optional[QueueStatus] = None,
+    date: Optional[str] = None,
+    employee: Optional[str] = None,
+    full_name: Optional[str] = None,
+    program: Optional[str] = None,
+    phone: Optional[str] = None
+):
+    """Фильтры списка заявок; model - QueueEntry или ArchivedQueueEntry"""
+    if status:
+        # У архива свой enum с теми же значениями
+        query = query.where(model.status == model.status.type.enum_class(status.value))
+    
+    if date:
+        # Фильтруем по дате (формат YYYY-MM-DD)
+        try:
+            filter_date = datetime.strptime(date, "%Y-%m-%d")
+            # Фильтруем записи созданные в этот день
+            start_of_day = filter_date.replace(hour=0, minute=0, second=0, microsecond=0)
+            end_of_day = filter_date.replace(hour=23, minute=59, second=59, microsecond=999999)
+            
+            query = query.where(
+                and_(
+                    model.created_at >= start_of_day,
+                    model.created_at <= end_of_day
+                )
+            )
+        except ValueError:
+            # Если неправильный формат даты, игнорируем фильтр
+            pass
     
-    program_name_lower = program_name.lower().strip()
-    matching_codes = []
+    if employee:
+        # Фильтруем по имени сотрудника (частичное совпадение, без учета регистра)
+        query = query.where(
+            model.assigned_employee_name.ilike(f"%{employee}%")
+        )
     
-    # Ищем точные совпадения
-    if program_name_lower in PROGRAM_MAPPING:
-        matching_codes.append(PROGRAM_MAPPING[program_name_lower])
+    if full_name:
+        # Часть ФИО без учета регистра, ё/й и казахских букв (search_name, pg_trgm)
+        query = query.where(
+            model.search_name.contains(normalize_name(full_name), autoescape=True)
+        )
     
-    # Ищем частичные совпадения в названиях
-    for name, code in PROGRAM_MAPPING.items():
-        if program_name_lower in name or name in program_name_lower:
-            if code not in matching_codes:
-                matching_codes.append(code)
+    if phone:
+        # Часть телефона в любом формате: +7 (701) ..., 8701..., последние цифры
+        query = query.where(
+            model.phone_digits.contains(normalize_phone(phone), autoescape=True)
+        )
     
-    # Если ничего не найдено, возможно пользователь ввел код напрямую
-    if not matching_codes:
-        matching_codes.append(program_name_lower)
+    if program:
+        # Получаем возможные коды программ по введенному названию
+        program_codes = get_program_codes_by_name(program)
+        
+        if program_codes:
+            # programs ?| array[коды] - любой из кодов в JSONB массиве (GIN-индекс)
+            query = query.where(model.programs.has_any(array(program_codes)))
     
-    return matching_codes
+    return query
 
 @router.get("/queue/export")
-def export_queue_to_excel(
-    db: Session = Depends(get_db),
+async def export_queue_to_excel(
+    status: Optional[QueueStatus] = None,
+    date: Optional[str] = None,
+    employee: Optional[str] = None,
+    full_name: Optional[str] = None,
+    program: Optional[str] = None,
+    phone: Optional[str] = None,
+    source: Literal["queue", "archive"] = "queue",
+    format: Literal["xlsx", "csv"] = "xlsx",
     current_user: User = Depends(get_admin_user)
 ):
-    """Export all queue entries to Excel (.xlsx)"""
-    # Get all queue entries
-    queue_entries = get_all_queue_entries(db)
-    
-    # Create Excel workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Queue Data"
-    
-    # Headers
-    headers = ["ФИО", "Программы", "Номер", "Сотрудник", "Дата создания", "Статус", "Время обработки (сек)"]
-    
-    # Add headers to worksheet
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        # Style headers
-        cell.font = Font(bold=True, color="FFFFFF")
-        cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        cell.alignment = Alignment(horizontal="center")
-    
-    # Add data rows
-    for row, entry in enumerate(queue_entries, 2):
-        programs = ", ".join(entry.programs) if isinstance(entry.programs, list) else entry.programs
-        created_at = entry.created_at.strftime("%Y-%m-%d %H:%M:%S") if entry.created_at else "-"
-        
-        data_row = [
-            entry.full_name,
-            programs,
-            entry.queue_number,
-            entry.assigned_employee_name or "-",
-            created_at,
-            entry.status.value,
-            entry.processing_time or "-"
-        ]
-        
-        for col, value in enumerate(data_row, 1):
-            ws.cell(row=row, column=col, value=value)
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save to BytesIO
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
+    """
+    Export queue or archive entries to Excel (.xlsx) or CSV with the same filters as GET /queue
+
+    Строки читаются из базы пачками и сразу уходят клиенту - память не растет с размером выгрузки.
+    """
+    model = ArchivedQueueEntry if source == "archive" else QueueEntry
+    query = apply_queue_filters(
+        select(
+            model.full_name,
+            model.programs,
+            model.queue_number,
+            model.assigned_employee_name,
+            model.created_at,
+            model.status,
+            model.processing_time
+        ),
+        model, status, date, employee, full_name, program, phone
+    ).order_by(model.created_at, model.id)
+    
+    filename = "archive_data" if source == "archive" else "queue_data"
+    if format == "csv":
+        body, media_type = stream_csv(query), "text/csv; charset=utf-8"
+    else:
+        body, media_type = stream_xlsx(query), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     
-    # Return file as response
     headers = {
-        'Content-Disposition': 'attachment; filename="queue_data.xlsx"'
+        'Content-Disposition': f'attachment; filename="{filename}.{format}"'
     }
-    return StreamingResponse(
-        io.BytesIO(output.getvalue()), 
-        headers=headers, 
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    return StreamingResponse(body, headers=headers, media_type=media_type)
 
 @router.post("/queue/reset-numbering")
-def reset_queue_numbering(
-    db: Session = Depends(get_db),
+async def reset_queue_numbering(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """Сбросить нумерацию очереди (только для админов)"""
     try:
-        # Получаем все активные заявки (не completed)
-        active_entries = db.query(QueueEntry).filter(
-            QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS, QueueStatus.PAUSED])
-        ).order_by(QueueEntry.created_at).all()
-        
-        # Архивируем и удаляем все completed заявки
-        completed_entries = db.query(QueueEntry).filter(QueueEntry.status == QueueStatus.COMPLETED).all()
+        # Удаляем все completed заявки (копии в архиве обновляет триггер)
+        archived_count = await purge_queue_entries(
+            db, QueueEntry.status == QueueStatus.COMPLETED, reason="manual_reset"
+        )
         
-        archived_count = 0
-        for entry in completed_entries:
-            try:
-                archive_queue_entry(db, entry, reason="manual_reset")
-                db.delete(entry)
-                archived_count += 1
-            except Exception as e:
-                continue
+        # Перенумеровываем активные заявки начиная с 1 (один UPDATE, порядок не меняется)
+        renumbered_count = await reset_ticket_numbering(db)
         
-        # Перенумеровываем активные заявки начиная с 1
-        renumbered_count = 0
-        for i, entry in enumerate(active_entries, 1):
-            entry.queue_number = i
-            db.add(entry)
-            renumbered_count += 1
+        await db.commit()
         
-        db.commit()
+        publish_global_event("queue_renumbered")
         
         return {
             "success": True,
             "message": f"Queue numbering reset successfully",
             "archived_completed": archived_count,
             "renumbered_active": renumbered_count,
-            "next_number": len(active_entries) + 1
+            "next_number": renumbered_count + 1
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Reset failed: {str(e)}")
 
 @router.post("/create-admission", response_model=UserResponse)
@@ -265,145 +342,239 @@ def create_admission_staff(
     return create_user(db=db, user=user_data, role="admission")
 
 @router.get("/employees", response_model=List[UserResponse])
-def get_all_employees(
-    db: Session = Depends(get_db),
+async def get_all_employees(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """Get all employees (admin only)"""
-    employees = db.query(User).filter(User.role == "admission").all()
+    employees = (await db.execute(select(User).where(User.role == "admission"))).scalars().all()
     return employees
 
 @router.get("/queue", response_model=List[QueueResponse])
-def get_all_queue_entries_api(
+async def get_all_queue_entries_api(
     status: Optional[QueueStatus] = None,
     date: Optional[str] = None,
     employee: Optional[str] = None,
     full_name: Optional[str] = None,
     program: Optional[str] = None,
-    db: Session = Depends(get_db),
+    phone: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """Get all queue entries with filters (admin only)"""
-    from datetime import datetime
-    from sqlalchemy import func, and_, or_, text
-    
-    # Начинаем с базового запроса
-    query = db.query(QueueEntry)
-    
-    # Применяем фильтры
-    if status:
-        query = query.filter(QueueEntry.status == status)
-    
-    if date:
-        # Фильтруем по дате (формат YYYY-MM-DD)
-        try:
-            filter_date = datetime.strptime(date, "%Y-%m-%d")
-            # Фильтруем записи созданные в этот день
-            start_of_day = filter_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_of_day = filter_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            query = query.filter(
-                and_(
-                    QueueEntry.created_at >= start_of_day,
-                    QueueEntry.created_at <= end_of_day
-                )
-            )
-        except ValueError:
-            # Если неправильный формат даты, игнорируем фильтр
-            pass
-    
-    if employee:
-        # Фильтруем по имени сотрудника (частичное совпадение, без учета регистра)
-        query = query.filter(
-            QueueEntry.assigned_employee_name.ilike(f"%{employee}%")
-        )
-    
-    if full_name:
-        # Фильтруем по ФИО абитуриента (частичное совпадение, без учета регистра)
-        query = query.filter(
-            QueueEntry.full_name.ilike(f"%{full_name}%")
-        )
-    
-    if program:
-        # Получаем возможные коды программ по введенному названию
-        program_codes = get_program_codes_by_name(program)
-        
-        if program_codes:
-            # Создаем условия для поиска по всем возможным кодам
-            program_conditions = []
-            for code in program_codes:
-                # Ищем код в JSON массиве программ
-                program_conditions.append(
-                    text("programs::text ILIKE :code").params(code=f'%"{code}"%')
-                )
-            
-            # Объединяем условия через OR
-            if len(program_conditions) == 1:
-                query = query.filter(program_conditions[0])
-            else:
-                query = query.filter(or_(*program_conditions))
-    
-    return query.all()
+    query = apply_queue_filters(select(QueueEntry), QueueEntry, status, date, employee, full_name, program, phone)
+    return (await db.execute(query)).scalars().all()
+
+def list_columns(model, detailed: bool = False) -> list:
+    """Колонки для постраничных списков: без phone/notes, если они не нужны"""
+    columns = [
+        model.id, model.queue_number, model.full_name, model.programs, model.status,
+        model.assigned_employee_id, model.assigned_employee_name, model.created_at, model.processing_time
+    ]
+    if model is ArchivedQueueEntry:
+        columns += [model.original_id, model.completed_at, model.archived_at, model.archive_reason]
+    else:
+        columns += [model.updated_at, model.form_language]
+    if detailed:
+        columns += [model.phone, model.notes]
+    return columns
+
+async def list_page(
+    db: AsyncSession,
+    model,
+    limit: int,
+    cursor: Optional[str],
+    include_total: bool,
+    detailed: bool,
+    **filters
+) -> dict:
+    query = apply_queue_filters(select(*list_columns(model, detailed)), model, **filters)
+    try:
+        page = await paginate_by_created(db, query, model, limit, cursor, with_total=include_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": page.items, "next_cursor": page.next_cursor, "total": page.total}
+
+@router.get("/queue/page", response_model=QueueListPage, response_model_exclude_unset=True)
+async def get_queue_page(
+    status: Optional[QueueStatus] = None,
+    date: Optional[str] = None,
+    employee: Optional[str] = None,
+    full_name: Optional[str] = None,
+    program: Optional[str] = None,
+    phone: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_DEFAULT_SIZE, ge=1, le=settings.LIST_PAGE_MAX_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    detailed: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Queue entries page by page, newest first (admin only); next page - ?cursor=next_cursor"""
+    return await list_page(
+        db, QueueEntry, limit, cursor, include_total, detailed,
+        status=status, date=date, employee=employee, full_name=full_name, program=program, phone=phone
+    )
+
+@router.get("/archive", response_model=ArchivedQueueListPage, response_model_exclude_unset=True)
+async def get_archive_page(
+    status: Optional[QueueStatus] = None,
+    date: Optional[str] = None,
+    employee: Optional[str] = None,
+    full_name: Optional[str] = None,
+    program: Optional[str] = None,
+    phone: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_DEFAULT_SIZE, ge=1, le=settings.LIST_PAGE_MAX_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    detailed: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Archived entries page by page, newest first (admin only)"""
+    return await list_page(
+        db, ArchivedQueueEntry, limit, cursor, include_total, detailed,
+        status=status, date=date, employee=employee, full_name=full_name, program=program, phone=phone
+    )
+
+@router.get("/search", response_model=SearchResponse)
+async def search_queue_entries(
+    q: str = Query(..., min_length=1, max_length=100, description="ФИО или телефон"),
+    source: Literal["all", "queue", "archive"] = "all",
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Fuzzy search by name or phone across the queue and archive, best matches first (admin only)"""
+    results, partial = await search_entries(db, q, source, limit)
+    return {"results": results, "partial": partial}
 
 @router.delete("/employees/{user_id}")
-def delete_employee(
+async def delete_employee(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
-    """Delete employee (admin only)"""
-    employee = db.query(User).filter(User.id == user_id).first()
+    """
+    Delete employee (admin only)
+
+    Ожидающие заявки сотрудника переназначаются на других (select_employee_automatically):
+    FK в заявках - SET NULL, а заявки без сотрудника никто не вызовет. Пока сотрудник
+    принимает абитуриента или некому передать его очередь, удаление запрещено (409).
+    """
+    employee = await db.get(User, user_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    db.delete(employee)
-    db.commit()
-    return {"detail": "Employee deleted successfully"}
+    in_progress = (await db.execute(
+        select(func.count(QueueEntry.id)).where(
+            QueueEntry.status == QueueStatus.IN_PROGRESS,
+            QueueEntry.assigned_employee_id == employee.id
+        )
+    )).scalar()
+    if in_progress:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Employee is processing an applicant, finish it before deleting")
+    
+    try:
+        reassigned = await reassign_waiting_entries(db, employee)
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"No other employee can take the waiting queue: {e}")
+    
+    employee_id = employee.id
+    await db.delete(employee)
+    await db.commit()
+    invalidate_user(employee_id)
+    publish_employee_event(employee)
+    for entry in reassigned:
+        publish_queue_event("queue_updated", entry, employee_id=employee_id)
+    for new_employee_id in {entry.assigned_employee_id for entry in reassigned}:
+        schedule_pregeneration(new_employee_id)
+    return {"detail": "Employee deleted successfully", "reassigned_entries": len(reassigned)}
 
 @router.put("/employees/{user_id}", response_model=UserResponse)
-def update_employee(
+async def update_employee(
     user_id: str,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """Update employee data (admin only)"""
-    employee = db.query(User).filter(User.id == user_id).first()
+    employee = await db.get(User, user_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    for key, value in user_data.dict(exclude_unset=True).items():
+    update_data = user_data.dict(exclude_unset=True)
+    for key, value in update_data.items():
         setattr(employee, key, value)
     
-    db.commit()
-    db.refresh(employee)
+    # Заявки связаны по id, имя в них только для отображения - обновляем его
+    if "full_name" in update_data:
+        await db.execute(
+            update(QueueEntry)
+            .where(QueueEntry.assigned_employee_id == employee.id)
+            .values(assigned_employee_name=employee.full_name)
+            .execution_options(synchronize_session=False)
+        )
+    
+    await db.commit()
+    await db.refresh(employee)
+    invalidate_user(employee.id)
+    publish_employee_event(employee)
     return employee
 
+@router.get("/db-pool")
+async def get_db_pool_status(current_user: User = Depends(get_admin_user)):
+    """Статистика пулов соединений с базой (admin only)"""
+    return get_pool_status()
+
+@router.get("/captcha-stats")
+async def get_captcha_status(current_user: User = Depends(get_admin_user)):
+    """Задержка reCAPTCHA, состояние circuit breaker и кэша вердиктов (admin only)"""
+    return get_captcha_stats()
+
+@router.get("/auth-cache-stats")
+async def get_auth_cache_stats(current_user: User = Depends(get_admin_user)):
+    """Попадания в кэш пользователей get_current_user (admin only)"""
+    return user_cache.stats()
+
+@router.get("/login-stats")
+async def get_login_stats(current_user: User = Depends(get_admin_user)):
+    """Очередь пула bcrypt и блокировки входа после неудачных попыток (admin only)"""
+    return {"password_pool": password_pool.stats(), "throttle": login_throttle.stats()}
+
+@router.get("/wait-time-stats")
+async def get_wait_time_stats(current_user: User = Depends(get_admin_user)):
+    """Средняя длительность приема по сотрудникам и программам (admin only)"""
+    await estimator.warm_up()
+    return estimator.snapshot()
+
 # === РОУТЫ ДЛЯ УПРАВЛЕНИЯ ВИДЕО ===
 
 @router.get("/video-settings", response_model=VideoSettingsResponse)
-def get_video_settings(
-    db: Session = Depends(get_db),
+async def get_video_settings(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """Get current video settings (admin only)"""
-    settings = db.query(VideoSettings).first()
+    settings = (await db.execute(select(VideoSettings).limit(1))).scalars().first()
     if not settings:
         # Создаем запись если её нет
         settings = VideoSettings(youtube_url="", is_enabled=False)
         db.add(settings)
-        db.commit()
-        db.refresh(settings)
+        await db.commit()
+        await db.refresh(settings)
     return settings
 
 @router.put("/video-settings", response_model=VideoSettingsResponse)
-def update_video_settings(
+async def update_video_settings(
     video_data: VideoSettingsUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """Update video settings (admin only)"""
-    settings = db.query(VideoSettings).first()
+    settings = (await db.execute(select(VideoSettings).limit(1))).scalars().first()
     if not settings:
         # Создаем новую запись если её нет
         settings = VideoSettings()
@@ -413,6 +584,7 @@ def update_video_settings(
     for key, value in video_data.dict(exclude_unset=True).items():
         setattr(settings, key, value)
     
-    db.commit()
-    db.refresh(settings)
+    await db.commit()
+    await db.refresh(settings)
+    publish_global_event("video_settings", topics=(DISPLAY_TOPIC,))
     return settings
\ No newline at end of file
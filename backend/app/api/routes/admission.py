@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 import logging
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, EmployeeStatus  # Добавляем импорт EmployeeStatus
 from app.models.queue import QueueEntry, QueueStatus
-from app.schemas import QueueResponse, QueueUpdate, UserResponse  # Добавляем импорт UserResponse
+from app.config import settings
+from app.schemas import QueueResponse, QueueUpdate, UserResponse, QueueListPage  # Добавляем импорт UserResponse
 from app.security import get_admission_user
-from app.services.queue import update_queue_entry, get_all_queue_entries, start_processing_time, end_processing_time
-from app.services.speechkit import generate_speech  # Возвращаем Yandex SpeechKit
+from app.services.queue import update_queue_entry, get_all_queue_entries, claim_next_entry, end_processing_time
+from app.services.speechkit import request_speech
+from app.services.events import publish_queue_event, publish_employee_event
+from app.services.user_cache import invalidate_user
+from app.services.announcements import schedule_pregeneration
+from app.services.pagination import paginate_by_created
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,32 +23,40 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["admission"])
 
 @router.post("/finish-work", response_model=UserResponse)
-def finish_work(
-    db: Session = Depends(get_db),
+async def finish_work(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Завершить рабочий день (перейти в статус offline)"""
     logger.info(f"User {current_user.id} finishing work")
     
     # Если сотрудник занят с абитуриентом, сначала освободим его
+    current_entry = None
     if current_user.status in [EmployeeStatus.BUSY.value, EmployeeStatus.PAUSED.value]:
         # Находим текущую активную заявку для этого сотрудника
-        current_entry = db.query(QueueEntry).filter(
-            QueueEntry.status == QueueStatus.IN_PROGRESS,
-            QueueEntry.assigned_employee_name == current_user.full_name
-        ).first()
+        current_entry = (await db.execute(
+            select(QueueEntry).where(
+                QueueEntry.status == QueueStatus.IN_PROGRESS,
+                QueueEntry.assigned_employee_id == current_user.id
+            )
+        )).scalars().first()
         
         if current_entry:
             # Если есть активная заявка, меняем её статус на COMPLETED
             current_entry.status = QueueStatus.COMPLETED
-            end_processing_time(db, current_entry.id)
+            await end_processing_time(db, current_entry.id)
             db.add(current_entry)
     
     # Меняем статус сотрудника на OFFLINE
     current_user.status = EmployeeStatus.OFFLINE.value
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    
+    if current_entry:
+        publish_queue_event("queue_completed", current_entry)
+    invalidate_user(current_user.id)
+    publish_employee_event(current_user)
     
     logger.info(f"Employee {current_user.id} has finished work and is now OFFLINE")
     
@@ -50,50 +64,60 @@ def finish_work(
 
 # Сначала добавляем новые эндпоинты для управления статусом сотрудника
 @router.post("/start-work", response_model=UserResponse)
-def start_work(
-    db: Session = Depends(get_db),
+async def start_work(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Начать работу (отметиться как доступный)"""
     logger.info(f"User {current_user.id} starting work")
     
     current_user.status = EmployeeStatus.AVAILABLE.value
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    
+    invalidate_user(current_user.id)
+    publish_employee_event(current_user)
+    schedule_pregeneration(current_user.id)
     
     return current_user
 
 @router.post("/pause-work", response_model=UserResponse)
-def pause_work(
-    db: Session = Depends(get_db),
+async def pause_work(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Приостановить работу (уйти на перерыв)"""
     logger.info(f"User {current_user.id} pausing work")
     
     current_user.status = EmployeeStatus.PAUSED.value
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    
+    invalidate_user(current_user.id)
+    publish_employee_event(current_user)
     
     return current_user
 
 @router.post("/resume-work", response_model=UserResponse)
-def resume_work(
-    db: Session = Depends(get_db),
+async def resume_work(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Возобновить работу после перерыва"""
     logger.info(f"User {current_user.id} resuming work")
     
     current_user.status = EmployeeStatus.AVAILABLE.value
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    
+    invalidate_user(current_user.id)
+    publish_employee_event(current_user)
     
     return current_user
 
 @router.post("/call-next")
 async def call_next_applicant(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Вызвать следующего абитуриента из очереди с голосовой озвучкой"""
@@ -106,27 +130,35 @@ async def call_next_applicant(
             detail="You must be available to call next applicant"
         )
     
-    # Ищем следующего абитуриента в очереди, который выбрал этого сотрудника
-    next_entry = db.query(QueueEntry).filter(
-        QueueEntry.status == QueueStatus.WAITING,
-        QueueEntry.assigned_employee_name == current_user.full_name
-    ).order_by(QueueEntry.queue_number).first()
+    # Забираем заявку и занимаем сотрудника одной транзакцией (двойной клик не возьмет вторую)
+    try:
+        next_entry, stolen_from = await claim_next_entry(db, current_user, required_status=EmployeeStatus.AVAILABLE.value)
+    except ValueError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You must be available to call next applicant"
+        )
     
     if not next_entry:
         logger.warning(f"No applicants assigned to employee {current_user.full_name}")
+        await db.rollback()
         return {
             "message": "Нет абитуриентов в очереди для вас.",
             "status": "empty_queue",
             "success": False
         }
     
-    # СНАЧАЛА ГЕНЕРИРУЕМ АУДИО
+    await db.commit()
+    
+    # Аудио не ждем: обычно оно уже в кэше, иначе генерируется в фоне,
+    # а табло забирает mp3 по speech.audio_url
     desk = current_user.desk or "не указан"
     language = next_entry.form_language or 'ru'
     
-    logger.info(f"🎤 Генерируем речь для: номер {next_entry.queue_number}, {next_entry.full_name}, стол {desk}, язык {language}")
+    logger.info(f"🎤 Объявление для: номер {next_entry.queue_number}, {next_entry.full_name}, стол {desk}, язык {language}")
     
-    speech_result = await generate_speech(
+    speech_result = await request_speech(
         queue_number=next_entry.queue_number,
         full_name=next_entry.full_name,
         desk=desk,
@@ -135,17 +167,7 @@ async def call_next_applicant(
     
     logger.info(f"✅ Speech generation result: {speech_result['success']}")
     
-    # ПОТОМ обновляем статус заявки и сотрудника
-    next_entry.status = QueueStatus.IN_PROGRESS
-    current_user.status = EmployeeStatus.BUSY.value
-    
-    start_processing_time(db, next_entry.id)
-    
-    db.commit()
-    db.refresh(next_entry)
-    db.refresh(current_user)
-    
-    # Возвращаем данные с аудио
+    # Возвращаем данные со ссылкой на аудио
     response_data = {
         "id": next_entry.id,
         "queue_number": next_entry.queue_number,
@@ -156,6 +178,7 @@ async def call_next_applicant(
         "notes": next_entry.notes,
         "created_at": next_entry.created_at,
         "updated_at": next_entry.updated_at,
+        "assigned_employee_id": next_entry.assigned_employee_id,
         "assigned_employee_name": next_entry.assigned_employee_name,
         "processing_time": next_entry.processing_time,
         "form_language": next_entry.form_language,
@@ -164,13 +187,21 @@ async def call_next_applicant(
         "success": True  # ✅ ДОБАВЛЯЕМ success: True
     }
     
+    publish_queue_event("queue_called", next_entry, employee_id=stolen_from)
+    invalidate_user(current_user.id)
+    publish_employee_event(current_user)
+    # Следующие талоны этого стола озвучиваем в фоне
+    schedule_pregeneration(current_user.id)
+    if stolen_from:
+        schedule_pregeneration(stolen_from)
+    
     logger.info(f"Queue entry {next_entry.id} moved to IN_PROGRESS, employee now BUSY")
     
     return response_data
 
 @router.post("/complete-current", response_model=UserResponse)
-def complete_current_applicant(
-    db: Session = Depends(get_db),
+async def complete_current_applicant(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Завершить работу с текущим абитуриентом"""
@@ -184,10 +215,12 @@ def complete_current_applicant(
         )
     
     # Находим текущую активную заявку для этого сотрудника
-    current_entry = db.query(QueueEntry).filter(
-        QueueEntry.status == QueueStatus.IN_PROGRESS,
-        QueueEntry.assigned_employee_name == current_user.full_name
-    ).first()
+    current_entry = (await db.execute(
+        select(QueueEntry).where(
+            QueueEntry.status == QueueStatus.IN_PROGRESS,
+            QueueEntry.assigned_employee_id == current_user.id
+        )
+    )).scalars().first()
     
     if not current_entry:
         logger.warning(f"No active entry found for employee {current_user.full_name}")
@@ -198,7 +231,7 @@ def complete_current_applicant(
     
     # Завершаем заявку
     current_entry.status = QueueStatus.COMPLETED
-    end_processing_time(db, current_entry.id)
+    await end_processing_time(db, current_entry.id)
     db.add(current_entry)
     
     # 🎯 ВАЖНО: Определяем новый статус сотрудника
@@ -213,15 +246,19 @@ def complete_current_applicant(
     
     current_user.status = new_status
     
-    db.commit()
-    db.refresh(current_entry)
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_entry)
+    await db.refresh(current_user)
+    
+    publish_queue_event("queue_completed", current_entry)
+    invalidate_user(current_user.id)
+    publish_employee_event(current_user)
     
     return current_user
 
 @router.get("/status", response_model=UserResponse)
-def get_employee_status(
-    db: Session = Depends(get_db),
+async def get_employee_status(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Получить текущий статус сотрудника"""
@@ -229,8 +266,8 @@ def get_employee_status(
 
 # Существующие эндпоинты
 @router.get("/queue", response_model=List[QueueResponse])
-def list_queue(
-    db: Session = Depends(get_db),
+async def list_queue(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user),
     status: QueueStatus = None
 ):
@@ -238,61 +275,99 @@ def list_queue(
     logger.info(f"User {current_user.id} retrieving their queue with status {status}")
     
     # Получаем заявки, фильтруя по имени текущего сотрудника
-    query = db.query(QueueEntry).filter(
-        QueueEntry.assigned_employee_name == current_user.full_name
+    query = select(QueueEntry).where(
+        QueueEntry.assigned_employee_id == current_user.id
     )
     
     # Если указан статус, добавляем фильтр по нему
     if status:
-        query = query.filter(QueueEntry.status == status)
+        query = query.where(QueueEntry.status == status)
+    
+    # Сортируем по порядку в очереди
+    query = query.order_by(QueueEntry.order_key)
     
-    # Сортируем по номеру в очереди для удобства
-    query = query.order_by(QueueEntry.queue_number)
+    return (await db.execute(query)).scalars().all()
+
+@router.get("/queue/page", response_model=QueueListPage, response_model_exclude_unset=True)
+async def list_queue_page(
+    status: Optional[QueueStatus] = None,
+    limit: int = Query(settings.LIST_PAGE_DEFAULT_SIZE, ge=1, le=settings.LIST_PAGE_MAX_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    detailed: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_admission_user)
+):
+    """Queue entries of the current user page by page, oldest first"""
+    columns = [
+        QueueEntry.id, QueueEntry.queue_number, QueueEntry.full_name, QueueEntry.programs,
+        QueueEntry.status, QueueEntry.assigned_employee_id, QueueEntry.assigned_employee_name,
+        QueueEntry.created_at, QueueEntry.updated_at, QueueEntry.processing_time, QueueEntry.form_language
+    ]
+    if detailed:
+        columns += [QueueEntry.phone, QueueEntry.notes]
+    
+    query = select(*columns).where(QueueEntry.assigned_employee_id == current_user.id)
+    if status:
+        query = query.where(QueueEntry.status == status)
     
-    return query.all()
+    try:
+        page = await paginate_by_created(db, query, QueueEntry, limit, cursor, descending=False, with_total=include_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": page.items, "next_cursor": page.next_cursor, "total": page.total}
 
 @router.post("/next", response_model=QueueResponse)
-def process_next_in_queue(
-    db: Session = Depends(get_db),
+async def process_next_in_queue(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Move the next waiting applicant to in-progress status"""
     logger.info(f"User {current_user.id} processing next queue entry")
     
-    # Ищем следующего абитуриента в очереди, который выбрал этого сотрудника
-    next_entry = db.query(QueueEntry).filter(
-        QueueEntry.status == QueueStatus.WAITING,
-        QueueEntry.assigned_employee_name == current_user.full_name
-    ).order_by(QueueEntry.queue_number).first()
+    # Забираем заявку и занимаем сотрудника одной транзакцией;
+    # пока есть заявка в работе, повторный клик (или вторая вкладка) новую не возьмет
+    try:
+        next_entry, stolen_from = await claim_next_entry(db, current_user, require_idle=True)
+    except ValueError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Finish the current applicant before taking the next one"
+        )
     
     if not next_entry:
         logger.warning(f"No applicants assigned to employee {current_user.full_name}")
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No applicants assigned to you in the queue"
         )
     
-    next_entry.status = QueueStatus.IN_PROGRESS
-    current_user.status = EmployeeStatus.BUSY.value
+    await db.commit()
     
-    db.commit()
-    db.refresh(next_entry)
-    db.refresh(current_user)
+    publish_queue_event("queue_called", next_entry, employee_id=stolen_from)
+    invalidate_user(current_user.id)
+    publish_employee_event(current_user)
+    # Следующие талоны этого стола озвучиваем в фоне
+    schedule_pregeneration(current_user.id)
+    if stolen_from:
+        schedule_pregeneration(stolen_from)
     
     logger.info(f"Queue entry {next_entry.id} moved to IN_PROGRESS")
     
     return next_entry
 
 @router.put("/queue/{queue_id}", response_model=QueueResponse)
-def update_queue_status(
+async def update_queue_status(
     queue_id: str,
     queue_update: QueueUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Update queue entry status (for admission staff)"""
     logger.info(f"User {current_user.id} updating queue entry {queue_id}")
-    queue_entry = db.query(QueueEntry).filter(QueueEntry.id == queue_id).first()
+    queue_entry = await db.get(QueueEntry, queue_id)
     
     if not queue_entry:
         logger.warning(f"Queue entry {queue_id} not found")
@@ -301,17 +376,17 @@ def update_queue_status(
             detail="Queue entry not found"
         )
     
-    return update_queue_entry(db, queue_entry, queue_update)
+    return await update_queue_entry(db, queue_id, queue_update)
 
 @router.delete("/queue/{queue_id}", response_model=QueueResponse)
-def delete_queue_entry(
+async def delete_queue_entry(
     queue_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admission_user)
 ):
     """Delete a queue entry (for admission staff)"""
     logger.info(f"User {current_user.id} attempting to delete queue entry {queue_id}")
-    queue_entry = db.query(QueueEntry).filter(QueueEntry.id == queue_id).first()
+    queue_entry = await db.get(QueueEntry, queue_id)
     
     if not queue_entry:
         logger.warning(f"Queue entry {queue_id} not found")
@@ -320,7 +395,8 @@ def delete_queue_entry(
             detail="Queue entry not found"
         )
     
-    db.delete(queue_entry)
-    db.commit()
+    await db.delete(queue_entry)
+    await db.commit()
+    publish_queue_event("queue_deleted", queue_entry)
     logger.info(f"Queue entry {queue_id} deleted successfully")
     return queue_entry
\ No newline at end of file
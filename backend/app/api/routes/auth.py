@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.schemas import UserCreate, UserResponse, Token
 from app.models.user import User
-from app.security import create_access_token, get_password_hash, verify_password
+from app.security import create_access_token, verify_password_async
 from app.config import settings
+from app.services.passwords import login_throttle
 from app.services.user import create_user, get_user_by_email
 
 router = APIRouter()
@@ -24,26 +27,35 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     return create_user(db=db, user=user, role="applicant")
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """Login with email and password"""
-    # Get user by email
-    user = get_user_by_email(db, form_data.username)
+    account = form_data.username.strip().lower()
     
-    if not user:
+    # Серия неудачных попыток - отказываем до запроса в базу и bcrypt
+    retry_after = login_throttle.retry_after(account)
+    if retry_after:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(retry_after)},
         )
     
-    # Verify password
-    if not verify_password(form_data.password, user.hashed_password):
+    # Get user by email
+    user = (await db.execute(select(User).where(User.email == form_data.username))).scalars().first()
+    # Соединение возвращаем в пул до bcrypt: в очереди к пулу хэшей оно не нужно
+    await db.close()
+
+    # Verify password (bcrypt в отдельном пуле, не в общем threadpool)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
+        login_throttle.failure(account)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    login_throttle.success(account)
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -56,4 +68,4 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
         "access_token": access_token,
         "token_type": "bearer",
         "user": user
-    }
\ No newline at end of file
+    }
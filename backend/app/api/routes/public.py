@@ -1,58 +1,55 @@
 # app/api/routes/public.py
-from fastapi import APIRouter, Depends, HTTPException, Request, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, Path
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
+from typing import List, Optional, Tuple, Union
 from datetime import datetime
-from app.database import get_db
+from app.database import get_async_db
 from app.models.queue import QueueEntry, QueueStatus
 from app.models.user import User
-from app.schemas.queue import PublicQueueCreate, QueueResponse, PublicQueueResponse
+from app.schemas.queue import PublicQueueCreate, QueueResponse, PublicQueueResponse, PublicTicketStatusResponse
 from app.services.captcha import verify_captcha
 from app.services.queue import create_queue_entry, get_queue_count
+from app.services.numbering import next_order_key
+from app.services.events import DISPLAY_TOPIC, event_stream, is_valid_topic, publish_queue_event
+from app.services.speechkit import get_announcement_audio
+from app.services.display import display_queue_cache
+from app.services.positions import get_people_ahead, get_people_ahead_batch
+from app.services.wait_time import estimate_wait_minutes
+from app.normalization import normalize_name, normalize_phone
 from app.models.video import VideoSettings
 from app.schemas.video import VideoSettingsResponse
 
 router = APIRouter(prefix="/public")
 
 @router.get("/display-queue", response_model=List[dict])
-def get_display_queue(db: Session = Depends(get_db)):
-    """Get queue entries for public display (no auth required)"""
-    # Получаем записи очереди со статусом 'in_progress'
-    entries = db.query(QueueEntry).filter(
-        QueueEntry.status == QueueStatus.IN_PROGRESS
-    ).all()
-    
-    # Преобразуем в список словарей и добавляем информацию о столе
-    result = []
-    for entry in entries:
-        entry_dict = {
-            "id": entry.id,
-            "queue_number": entry.queue_number,
-            "status": entry.status,
-            "assigned_employee_name": entry.assigned_employee_name,
-            "employee_desk": None,
-            "programs": entry.programs 
-        }
-        
-        # Ищем информацию о столе сотрудника
-        if entry.assigned_employee_name:
-            employee = db.query(User).filter(User.full_name == entry.assigned_employee_name).first()
-            if employee and employee.desk:
-                entry_dict["employee_desk"] = employee.desk
-        
-        result.append(entry_dict)
+async def get_display_queue(request: Request):
+    """
+    Get queue entries for public display (no auth required)
     
-    return result
+    Табло опрашивают эндпоинт постоянно, поэтому ответ берется из кэша,
+    который сбрасывается при изменении очереди или сотрудников.
+    Совпал If-None-Match - отвечаем 304 без тела.
+    """
+    payload = await display_queue_cache.get()
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    
+    if payload.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=payload.body, media_type="application/json", headers=headers)
 
 @router.get("/employees", response_model=List[dict])
-def get_employees(db: Session = Depends(get_db)):
+async def get_employees(db: AsyncSession = Depends(get_async_db)):
     """Get all admission employees that are currently online (public endpoint)"""
     # Получаем только сотрудников admission, которые не в статусе offline
-    online_employees = db.query(User).filter(
-        User.role == "admission",
-        User.status != "offline"  # Исключаем сотрудников со статусом offline
-    ).all()
+    online_employees = (await db.execute(
+        select(User).where(
+            User.role == "admission",
+            User.status != "offline"  # Исключаем сотрудников со статусом offline
+        )
+    )).scalars().all()
     
     if not online_employees:
         # Если нет активных сотрудников
@@ -62,16 +59,16 @@ def get_employees(db: Session = Depends(get_db)):
     return [{"name": emp.full_name, "status": emp.status, "desk": emp.desk} for emp in online_employees]
 
 @router.post("/queue", response_model=QueueResponse)
-def add_to_queue(
+async def add_to_queue(
     queue_data: PublicQueueCreate,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add applicant to the queue (public endpoint) with automatic employee assignment"""
     print(f"🚀 Получены данные: {queue_data}")
     
     # Проверяем капчу
-    captcha_valid = verify_captcha(queue_data.captcha_token, request.client.host)
+    captcha_valid = await verify_captcha(queue_data.captcha_token, request.client.host)
     if not captcha_valid:
         print("❌ Капча не прошла проверку")
         raise HTTPException(status_code=400, detail="Invalid captcha")
@@ -79,10 +76,12 @@ def add_to_queue(
     print("✅ Капча прошла проверку")
     
     # Проверяем, нет ли уже заявки с таким телефоном
-    existing_entry = db.query(QueueEntry).filter(
-        QueueEntry.phone == queue_data.phone,
-        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
-    ).first()
+    existing_entry = (await db.execute(
+        select(QueueEntry).where(
+            QueueEntry.phone == queue_data.phone,
+            QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+        )
+    )).scalars().first()
     
     if existing_entry:
         print(f"❌ Заявка уже существует: {existing_entry.id}")
@@ -93,24 +92,39 @@ def add_to_queue(
     
     # Создаем заявку с автоматическим назначением сотрудника
     try:
-        result = create_queue_entry(db, queue_data)
+        result = await create_queue_entry(db, queue_data)
         print(f"✅ Заявка создана: {result.id}, номер: {result.queue_number}, сотрудник: {result.assigned_employee_name}")
         return result
     except Exception as e:
         print(f"❌ Ошибка создания заявки: {e}")
         raise HTTPException(status_code=500, detail=f"Error creating queue entry: {str(e)}")
 
-@router.get("/queue/check", response_model=PublicQueueResponse)
-def check_queue_by_name(
-    full_name: str = Query(..., description="ФИО для проверки статуса"),
-    db: Session = Depends(get_db)
+@router.get("/queue/check", response_model=Union[PublicQueueResponse, PublicTicketStatusResponse])
+async def check_queue_by_name(
+    full_name: Optional[str] = Query(None, description="ФИО для проверки статуса"),
+    phone: Optional[str] = Query(None, description="Телефон, указанный в заявке"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Проверка статуса заявки по ФИО абитуриента"""
+    """
+    Проверка статуса заявки по ФИО и/или телефону абитуриента
+
+    По одному телефону возвращаются только номер талона, статус и позиция:
+    id заявки дает право ее отменить, а ФИО и заметки - персональные данные.
+    """
+    name = normalize_name(full_name)
+    phone_digits = normalize_phone(phone)
+    if not name and not phone_digits:
+        raise HTTPException(status_code=400, detail="Укажите ФИО или телефон")
     
-    # Поиск заявки
-    queue_entry = db.query(QueueEntry).filter(
-        QueueEntry.full_name == full_name
-    ).order_by(desc(QueueEntry.created_at)).first()
+    # Поиск заявки: ФИО без учета регистра, лишних пробелов, ё/й и казахских букв
+    query = select(QueueEntry)
+    if name:
+        query = query.where(QueueEntry.search_name == name)
+    if phone_digits:
+        query = query.where(QueueEntry.phone_digits == phone_digits)
+    queue_entry = (await db.execute(
+        query.order_by(desc(QueueEntry.created_at)).limit(1)
+    )).scalars().first()
     
     if not queue_entry:
         raise HTTPException(
@@ -118,23 +132,33 @@ def check_queue_by_name(
             detail="Заявка не найдена"
         )
     
+    # Соединение запроса - обратно в пул: снимки очереди загружаются своим соединением,
+    # и запросы, держащие по соединению, под нагрузкой ждали бы загрузку до pool_timeout
+    await db.close()
+    
     # Получаем позицию в очереди и кол-во людей впереди, если в ожидании
     position = None
     people_ahead = None
     estimated_time = None
     
     if queue_entry.status == QueueStatus.WAITING:
-        # Позиция = количество людей со статусом WAITING и с меньшим номером + 1
-        position = db.query(QueueEntry).filter(
-            QueueEntry.status == QueueStatus.WAITING,
-            QueueEntry.queue_number < queue_entry.queue_number
-        ).count() + 1
+        # Кол-во людей впереди - из снимка очереди в памяти, без COUNT по таблице
+        people_ahead = await get_people_ahead(queue_entry.order_key)
+        position = people_ahead + 1
         
-        # Кол-во людей впереди = позиция - 1
-        people_ahead = position - 1
-        
-        # Примерное время ожидания: 5 минут на человека
-        estimated_time = people_ahead * 5
+        # Примерное время ожидания по статистике приемов и очереди своего сотрудника
+        estimated_time = await estimate_wait_minutes(
+            queue_entry.order_key, queue_entry.assigned_employee_id, queue_entry.programs
+        )
+    
+    if not name:
+        return PublicTicketStatusResponse(
+            queue_number=queue_entry.queue_number,
+            status=queue_entry.status,
+            position=position,
+            people_ahead=people_ahead,
+            estimated_time=estimated_time
+        )
     
     # Формируем ответ с дополнительными данными
     response = PublicQueueResponse.from_orm(queue_entry)
@@ -145,16 +169,18 @@ def check_queue_by_name(
     return response
 
 @router.delete("/queue/cancel/{queue_id}", response_model=QueueResponse)
-def cancel_queue_by_id(
+async def cancel_queue_by_id(
     queue_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Отмена заявки по ID"""
     
-    queue_entry = db.query(QueueEntry).filter(
-        QueueEntry.id == queue_id,
-        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
-    ).first()
+    queue_entry = (await db.execute(
+        select(QueueEntry).where(
+            QueueEntry.id == queue_id,
+            QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+        )
+    )).scalars().first()
     
     if not queue_entry:
         raise HTTPException(
@@ -164,22 +190,26 @@ def cancel_queue_by_id(
     
     # Меняем статус на COMPLETED (отменено)
     queue_entry.status = QueueStatus.COMPLETED
-    db.commit()
-    db.refresh(queue_entry)
+    await db.commit()
+    await db.refresh(queue_entry)
+    
+    publish_queue_event("queue_cancelled", queue_entry)
     
     return queue_entry
 
 @router.put("/queue/move-back/{queue_id}", response_model=PublicQueueResponse)
-def move_back_in_queue(
+async def move_back_in_queue(
     queue_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Перемещение заявки в конец очереди"""
     
-    queue_entry = db.query(QueueEntry).filter(
-        QueueEntry.id == queue_id,
-        QueueEntry.status == QueueStatus.WAITING
-    ).first()
+    queue_entry = (await db.execute(
+        select(QueueEntry).where(
+            QueueEntry.id == queue_id,
+            QueueEntry.status == QueueStatus.WAITING
+        )
+    )).scalars().first()
     
     if not queue_entry:
         raise HTTPException(
@@ -187,23 +217,21 @@ def move_back_in_queue(
             detail="Заявка не найдена или не находится в статусе ожидания"
         )
     
-    # Находим максимальный номер в очереди
-    last_entry = db.query(func.max(QueueEntry.queue_number)).scalar()
-    next_number = last_entry + 1 if last_entry else 1
+    # Ставим заявку в конец очереди, номер талона не меняется
+    queue_entry.order_key = await next_order_key(db)
+    await db.commit()
+    await db.refresh(queue_entry)
     
-    # Обновляем номер в очереди
-    queue_entry.queue_number = next_number
-    db.commit()
-    db.refresh(queue_entry)
+    publish_queue_event("queue_moved_back", queue_entry)
+    # До обращения к снимкам очереди, как в check_queue_by_name
+    await db.close()
     
     # Получаем позицию в очереди и кол-во людей впереди
-    position = db.query(QueueEntry).filter(
-        QueueEntry.status == QueueStatus.WAITING,
-        QueueEntry.queue_number < queue_entry.queue_number
-    ).count() + 1
-    
-    people_ahead = position - 1
-    estimated_time = people_ahead * 5
+    people_ahead = await get_people_ahead(queue_entry.order_key)
+    position = people_ahead + 1
+    estimated_time = await estimate_wait_minutes(
+        queue_entry.order_key, queue_entry.assigned_employee_id, queue_entry.programs
+    )
     
     # Формируем ответ с дополнительными данными
     response = PublicQueueResponse.from_orm(queue_entry)
@@ -213,14 +241,131 @@ def move_back_in_queue(
     
     return response
 
+@router.get("/queue/positions", response_model=List[dict])
+async def get_queue_positions(
+    queue_id: List[str] = Query([], description="ID заявок (до 100)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Позиции нескольких заявок за один запрос (для не ожидающих - null)"""
+    if len(queue_id) > 100:
+        raise HTTPException(status_code=400, detail="Too many queue ids (max 100)")
+    
+    rows = (await db.execute(
+        select(QueueEntry.id, QueueEntry.queue_number, QueueEntry.status, QueueEntry.order_key)
+        .where(QueueEntry.id.in_(queue_id))
+    )).all()
+    
+    # До обращения к снимку очереди, как в check_queue_by_name
+    await db.close()
+    
+    waiting_keys = [row.order_key for row in rows if row.status == QueueStatus.WAITING]
+    people_ahead = await get_people_ahead_batch(waiting_keys)
+    
+    return [
+        {
+            "id": row.id,
+            "queue_number": row.queue_number,
+            "status": row.status.value,
+            "people_ahead": people_ahead.get(row.order_key) if row.status == QueueStatus.WAITING else None,
+            "position": people_ahead[row.order_key] + 1 if row.status == QueueStatus.WAITING else None
+        }
+        for row in rows
+    ]
+
 @router.get("/queue/count")
-def get_queue_count_endpoint(db: Session = Depends(get_db)):  # Удалите async
-    return {"count": get_queue_count(db)}
+async def get_queue_count_endpoint(db: AsyncSession = Depends(get_async_db)):
+    return {"count": await get_queue_count(db)}
+
+@router.get("/events")
+async def subscribe_queue_events(
+    request: Request,
+    topic: List[str] = Query([DISPLAY_TOPIC], description="display, queue, employee:<id>, ticket:<id>")
+):
+    """
+    Server-Sent Events поток изменений очереди
+    
+    Клиент получает только уведомление о событии и сам перезапрашивает
+    нужные данные через обычные GET эндпоинты (они остаются как fallback).
+    """
+    invalid_topics = [t for t in topic if not is_valid_topic(t)]
+    if invalid_topics:
+        raise HTTPException(status_code=400, detail=f"Unknown topics: {', '.join(invalid_topics)}")
+    
+    return StreamingResponse(
+        event_stream(request, topic),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Отключаем буферизацию в nginx
+        }
+    )
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Разобрать "bytes=start-end" (один диапазон); None - диапазон некорректный"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start, _, end = spec.strip().partition("-")
+    try:
+        if start:
+            first = int(start)
+            last = int(end) if end else size - 1
+        else:
+            # bytes=-N - последние N байт
+            first = max(size - int(end), 0)
+            last = size - 1
+    except ValueError:
+        return None
+    last = min(last, size - 1)
+    if first > last:
+        return None
+    return first, last
+
+@router.get("/audio/{audio_id}")
+async def get_announcement_audio_file(
+    request: Request,
+    audio_id: str = Path(..., pattern="^[0-9a-f]{32}$")
+):
+    """
+    MP3 голосового объявления (ссылка приходит в speech.audio_url из call-next)
+    
+    Поддерживает ETag/If-None-Match и Range, чтобы браузер табло кэшировал файл.
+    Если объявление еще генерируется - ждет окончания синтеза.
+    """
+    item = await get_announcement_audio(audio_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    etag = f'"{item.etag}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=86400"
+    }
+    
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    size = len(item.audio)
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        first, last = byte_range
+        return Response(
+            content=item.audio[first:last + 1],
+            status_code=206,
+            media_type="audio/mpeg",
+            headers={**headers, "Content-Range": f"bytes {first}-{last}/{size}"}
+        )
+    
+    return Response(content=item.audio, media_type="audio/mpeg", headers=headers)
 
 @router.get("/video-settings", response_model=VideoSettingsResponse)
-def get_public_video_settings(db: Session = Depends(get_db)):
+async def get_public_video_settings(db: AsyncSession = Depends(get_async_db)):
     """Get current video settings for public display"""
-    settings = db.query(VideoSettings).first()
+    settings = (await db.execute(select(VideoSettings).limit(1))).scalars().first()
     if not settings:
         # Возвращаем дефолтные настройки если записи нет
         return VideoSettingsResponse(
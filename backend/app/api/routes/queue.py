@@ -1,22 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Path
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.models.queue import QueueEntry, QueueStatus
 from app.schemas import QueueCreate, QueueResponse, QueueStatusResponse, PublicQueueCreate, PublicQueueResponse
 from app.security import get_current_active_user
 from app.services import queue as queue_service
+from app.services.events import publish_queue_event
 
 router = APIRouter()
 
 @router.post("/queue", response_model=QueueResponse)
-def add_to_queue(
+async def add_to_queue(
     queue_data: QueueCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Добавить заявителя в очередь"""
@@ -26,10 +28,12 @@ def add_to_queue(
             detail="Only applicants can join the queue"
         )
     
-    existing_entry = db.query(QueueEntry).filter(
-        QueueEntry.phone == current_user.phone,
-        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
-    ).first()
+    existing_entry = (await db.execute(
+        select(QueueEntry).where(
+            QueueEntry.phone == current_user.phone,
+            QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+        )
+    )).scalars().first()
     
     if existing_entry:
         raise HTTPException(
@@ -37,11 +41,11 @@ def add_to_queue(
             detail="Вы уже стоите в очереди"
         )
     
-    return queue_service.create_queue_entry(db=db, user=current_user, queue_data=queue_data)
+    return await queue_service.create_queue_entry(db=db, user=current_user, queue_data=queue_data)
 
 @router.get("/queue/status", response_model=QueueStatusResponse)
-def get_user_queue_status(
-    db: Session = Depends(get_db),
+async def get_user_queue_status(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Получить текущий статус очереди заявителя"""
@@ -51,7 +55,7 @@ def get_user_queue_status(
             detail="Only applicants can check queue status"
         )
     
-    status = queue_service.get_queue_status(db, current_user.phone)
+    status = await queue_service.get_queue_status(db, current_user.phone)
     if not status:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,8 +65,8 @@ def get_user_queue_status(
     return status
 
 @router.delete("/queue/cancel", response_model=QueueResponse)
-def cancel_queue_by_user(
-    db: Session = Depends(get_db),
+async def cancel_queue_by_user(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Отменить текущую заявку в очереди пользователя (по телефону)"""
@@ -72,10 +76,12 @@ def cancel_queue_by_user(
             detail="Only applicants can cancel queue entries"
         )
     
-    queue_entry = db.query(QueueEntry).filter(
-        QueueEntry.phone == current_user.phone,
-        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
-    ).first()
+    queue_entry = (await db.execute(
+        select(QueueEntry).where(
+            QueueEntry.phone == current_user.phone,
+            QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+        )
+    )).scalars().first()
     
     if not queue_entry:
         raise HTTPException(
@@ -84,22 +90,26 @@ def cancel_queue_by_user(
         )
     
     queue_entry.status = QueueStatus.COMPLETED
-    db.commit()
-    db.refresh(queue_entry)
+    await db.commit()
+    await db.refresh(queue_entry)
+    
+    publish_queue_event("queue_cancelled", queue_entry)
     
     return queue_entry
 
 @router.delete("/queue/cancel/{queue_id}", response_model=QueueResponse)
-def cancel_queue_by_id(
+async def cancel_queue_by_id(
     queue_id: str = Path(..., description="ID заявки для отмены"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Отменить заявку в очереди по ID"""
-    queue_entry = db.query(QueueEntry).filter(
-        QueueEntry.id == queue_id,
-        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
-    ).first()
+    queue_entry = (await db.execute(
+        select(QueueEntry).where(
+            QueueEntry.id == queue_id,
+            QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+        )
+    )).scalars().first()
 
     if not queue_entry:
         raise HTTPException(
@@ -114,16 +124,18 @@ def cancel_queue_by_id(
         )
 
     queue_entry.status = QueueStatus.COMPLETED
-    db.commit()
-    db.refresh(queue_entry)
+    await db.commit()
+    await db.refresh(queue_entry)
+
+    publish_queue_event("queue_cancelled", queue_entry)
 
     return queue_entry
 
 @router.put("/queue/cancel/{queue_id}", response_model=QueueResponse)
-def cancel_queue_put(
+async def cancel_queue_put(
     queue_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Опциональный PUT для отмены заявки по ID (если фронтенд требует PUT)"""
-    return cancel_queue_by_id(queue_id, db, current_user)
\ No newline at end of file
+    return await cancel_queue_by_id(queue_id, db, current_user)
\ No newline at end of file
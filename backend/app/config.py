@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
@@ -9,9 +9,91 @@ class Settings(BaseSettings):
     ADMIN_EMAIL: str
     ADMIN_PASSWORD: str
     RECAPTCHA_SECRET_KEY: str = "6Lf_mUQrAAAAALFCOaj5iTDL2XYcVOu1vUmSnHdk"
+    RECAPTCHA_VERIFY_URL: str = "https://www.google.com/recaptcha/api/siteverify"
+    RECAPTCHA_ACTION: str = "submit_queue_form"   # action из PublicQueueForm
+    RECAPTCHA_MIN_SCORE: float = 0.5
+    RECAPTCHA_TIMEOUT_SECONDS: float = 3.0        # Дольше - считаем Google недоступным
+    RECAPTCHA_CACHE_TTL_SECONDS: int = 120        # Сколько помним использованный или отклоненный токен
+    RECAPTCHA_BREAKER_FAILURES: int = 5           # Ошибок подряд до открытия breaker
+    RECAPTCHA_BREAKER_RESET_SECONDS: float = 30.0
+    RECAPTCHA_FALLBACK_PER_MINUTE: int = 5        # Заявок с одного IP, пока Google недоступен
     
     # Google TTS вместо Yandex
     GOOGLE_TTS_API_KEY: Optional[str] = ""
+    GOOGLE_TTS_URL: str = "https://texttospeech.googleapis.com/v1/text:synthesize"
+    TTS_CACHE_DIR: str = "tts_cache"       # Каталог с готовыми mp3 объявлений
+    TTS_CACHE_MAX_ITEMS: int = 500         # Сколько объявлений держать в памяти
+    TTS_PREGENERATE_COUNT: int = 3         # Сколько следующих талонов озвучивать заранее
+
+    # Общий HTTP-клиент для внешних сервисов (reCAPTCHA, Google TTS)
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20        # На каждый внешний хост
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 10
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 5.0
+    HTTP_CLIENT_TIMEOUT: float = 15.0
+    HTTP_CLIENT_RETRIES: int = 2                 # Повторы при сетевых ошибках и 5xx/429
+    HTTP_CLIENT_BACKOFF: float = 0.2             # Пауза перед повтором: backoff * 2^попытка
+
+    QUEUE_TIMEZONE: str = "Asia/Almaty"          # Часовой пояс, по которому номера талонов сбрасываются в полночь
+
+    DISPLAY_CACHE_TTL_SECONDS: float = 30.0      # Страховочный TTL кэша /public/display-queue
+    POSITION_CACHE_TTL_SECONDS: float = 30.0     # Страховочный TTL снимка очереди для позиций
+
+    # Автоназначение новой заявки: least_loaded - меньше всего активных заявок,
+    # skills - навыки сотрудника (программы, язык), загрузка и средняя длительность приема.
+    # skills включается явно, после заполнения профилей сотрудников
+    ROUTING_STRATEGY: Literal["least_loaded", "skills"] = "least_loaded"
+    ROUTING_SKILL_WEIGHT: float = 1.0            # Штраф за неполное совпадение навыков
+    ROUTING_GENERALIST_MATCH: float = 0.8        # Совпадение для сотрудника без профиля
+
+    # Вызов следующего: pinned - только своя очередь, steal - при пустой своей
+    # забрать самую старую заявку у самого загруженного коллеги
+    QUEUE_DISPATCH_MODE: Literal["pinned", "steal"] = "pinned"
+    QUEUE_STEAL_MIN_BACKLOG: int = 1             # У коллеги с очередью короче не забираем
+
+    # Оценка времени ожидания по реальной длительности приемов
+    WAIT_TIME_DEFAULT_MINUTES: float = 5.0       # Пока статистики мало
+    WAIT_TIME_EWMA_ALPHA: float = 0.2            # Вес последнего приема в среднем
+    WAIT_TIME_MIN_SAMPLES: int = 5               # Минимум приемов, чтобы доверять среднему
+    WAIT_TIME_WARMUP_ROWS: int = 500             # Сколько завершенных заявок читать при старте
+
+    # Выгрузка очереди и архива в Excel/CSV
+    EXPORT_BATCH_SIZE: int = 1000                # Строк за один FETCH серверного курсора
+    EXPORT_WIDTH_SAMPLE_ROWS: int = 200          # По скольким первым строкам считать ширину колонок
+
+    # Постраничные списки заявок и архива (keyset по created_at, id)
+    LIST_PAGE_DEFAULT_SIZE: int = 50
+    LIST_PAGE_MAX_SIZE: int = 500
+
+    # Поиск заявок по ФИО/телефону (/admin/search)
+    SEARCH_MIN_SCORE: float = 0.5                # Доля совпавших триграмм запроса
+    SEARCH_CANDIDATE_LIMIT: int = 200            # Сколько кандидатов из архива ранжировать
+    SEARCH_TIMEOUT_MS: int = 500                 # statement_timeout запроса к архиву
+    SEARCH_INDEX_TTL_SECONDS: float = 30.0       # Страховочный TTL индекса очереди в памяти
+
+    # Очистка очереди от завершенных заявок (копии уже в архиве)
+    ARCHIVE_PURGE_INTERVAL_SECONDS: float = 300.0  # 0 - фоновая очистка отключена
+    ARCHIVE_RETENTION_HOURS: float = 12.0          # Сколько завершенные заявки остаются в очереди
+    ARCHIVE_PURGE_BATCH_SIZE: int = 1000           # Заявок в одном DELETE
+
+    # Кэш пользователя по токену в get_current_user
+    USER_CACHE_TTL_SECONDS: float = 30.0         # 0 - каждый запрос читает users
+    USER_CACHE_MAX_ITEMS: int = 1000
+
+    # bcrypt в отдельном пуле потоков и защита от подбора пароля
+    PASSWORD_HASH_WORKERS: int = 2               # Одновременных bcrypt (ядер CPU под логины)
+    PASSWORD_HASH_MAX_QUEUE: int = 200           # Сверх этого логин получает 503
+    LOGIN_MAX_FAILURES: int = 5                  # Неудачных входов в аккаунт за окно
+    LOGIN_FAILURE_WINDOW_SECONDS: float = 300.0
+
+    # Пул соединений с базой (одинаковые настройки для sync и async engine)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30        # Сколько секунд ждать свободное соединение
+    DB_POOL_RECYCLE: int = 1800      # Пересоздавать соединения старше N секунд
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 - без ограничения
 
     postgres_user: Optional[str] = None
     postgres_password: Optional[str] = None
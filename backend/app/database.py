@@ -1,22 +1,158 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+import threading
+import time
 
 from .config import settings
 
-# Create SQLAlchemy engine
-engine = create_engine(settings.DATABASE_URL)
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+def _statement_timeout_args(driver: str) -> dict:
+    """connect_args с statement_timeout для psycopg2 или asyncpg"""
+    if not settings.DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    if driver == "asyncpg":
+        return {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+
+class PoolWaitStats:
+    """Сколько запросы ждали соединение из пула"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0  # Новые соединения с базой (overflow, recycle, после обрыва)
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+            }
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool, который замеряет ожидание соединения
+
+    Время считается внутри pool.connect(), то есть только когда сессия
+    действительно берет соединение (лениво, при первом запросе к базе).
+    Запросы, обслуженные из кэша, пул не трогают и в статистику не попадают.
+    """
+    wait_stats = PoolWaitStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.wait_stats.record_timeout()
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    wait_stats = PoolWaitStats()
+
+# Create SQLAlchemy engine (синхронный - для скриптов и auth)
+engine = create_engine(
+    settings.DATABASE_URL,
+    connect_args=_statement_timeout_args("psycopg2"),
+    poolclass=TimedQueuePool,
+    **POOL_OPTIONS
+)
+sync_pool_stats = TimedQueuePool.wait_stats
+event.listen(engine, "connect", sync_pool_stats.record_connect)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(database_url: str) -> str:
+    """postgresql:// или postgresql+psycopg2:// -> postgresql+asyncpg://"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+# Асинхронный engine для API роутов (не блокирует event loop)
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    connect_args=_statement_timeout_args("asyncpg"),
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **POOL_OPTIONS
+)
+async_pool_stats = TimedAsyncAdaptedQueuePool.wait_stats
+event.listen(async_engine.sync_engine, "connect", async_pool_stats.record_connect)
+
+# expire_on_commit=False - объекты остаются доступными после commit без lazy load
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create Base class
 Base = declarative_base()
 
+def get_pool_status() -> dict:
+    """Состояние обоих пулов для внутреннего эндпоинта мониторинга"""
+    def describe(pool, stats: PoolWaitStats) -> dict:
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            **stats.snapshot(),
+        }
+
+    return {
+        "config": dict(POOL_OPTIONS),
+        "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS,
+        "async": describe(async_engine.pool, async_pool_stats),
+        "sync": describe(engine.pool, sync_pool_stats),
+    }
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get async DB session
+async def get_async_db():
+    # Соединение сессия возьмет из пула при первом запросе (ожидание считает TimedQueuePool)
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index, Computed
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from uuid import uuid4
 import enum
 
 from app.database import Base
+from app.normalization import search_name_sql, phone_digits_sql
 
 class ArchiveQueueStatus(str, enum.Enum):
     WAITING = "waiting"
@@ -16,13 +18,14 @@ class ArchivedQueueEntry(Base):
     __tablename__ = "archived_queue_entries"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid4()))
-    original_id = Column(String, nullable=False)  # ID из основной таблицы
+    original_id = Column(String, nullable=False, unique=True, index=True)  # ID из основной таблицы (одна запись на заявку)
     queue_number = Column(Integer, nullable=False)
     full_name = Column(String, nullable=False)
     phone = Column(String, nullable=False)
-    programs = Column(JSON, nullable=False)
+    programs = Column(JSONB, nullable=False)
     status = Column(Enum(ArchiveQueueStatus), nullable=False)
     notes = Column(String, nullable=True)
+    assigned_employee_id = Column(String, nullable=True)  # Без FK: архив переживает удаление сотрудника
     assigned_employee_name = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False)  # Оригинальное время создания
     updated_at = Column(DateTime(timezone=True), nullable=True)   # Оригинальное время обновления
@@ -30,4 +33,15 @@ class ArchivedQueueEntry(Base):
     processing_time = Column(Integer, nullable=True)
     form_language = Column(String, nullable=True)
     archived_at = Column(DateTime(timezone=True), server_default=func.now())  # Время архивирования
-    archive_reason = Column(String, nullable=True)  # Причина архивирования (limit_reached, manual, etc.)
\ No newline at end of file
+    archive_reason = Column(String, nullable=True)  # Причина архивирования (limit_reached, manual, etc.)
+    search_name = Column(String, Computed(search_name_sql("full_name"), persisted=True))
+    phone_digits = Column(String, Computed(phone_digits_sql("phone"), persisted=True))
+
+    __table_args__ = (
+        # Постраничный список архива: keyset по (created_at, id)
+        Index("ix_archived_queue_entries_created_id", "created_at", "id"),
+        Index("ix_archived_queue_entries_programs", "programs", postgresql_using="gin"),
+        Index("ix_archived_queue_entries_search_name_trgm", "search_name", postgresql_using="gin", postgresql_ops={"search_name": "gin_trgm_ops"}),
+        Index("ix_archived_queue_entries_phone_digits_trgm", "phone_digits", postgresql_using="gin", postgresql_ops={"phone_digits": "gin_trgm_ops"}),
+        Index("ix_archived_queue_entries_employee_name_trgm", "assigned_employee_name", postgresql_using="gin", postgresql_ops={"assigned_employee_name": "gin_trgm_ops"}),
+    )
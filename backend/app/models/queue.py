@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Enum, Index, ForeignKey, Computed
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from uuid import uuid4
 import enum
 
 from app.database import Base
+from app.normalization import search_name_sql, phone_digits_sql
 
 class QueueStatus(str, enum.Enum):
     WAITING = "waiting"
@@ -15,14 +17,51 @@ class QueueEntry(Base):
     __tablename__ = "queue_entries"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid4()))
-    queue_number = Column(Integer, nullable=False)
+    queue_number = Column(Integer, nullable=False)  # Номер талона (сбрасывается каждый день)
+    order_key = Column(BigInteger, nullable=False)  # Порядок в очереди (растет монотонно, меняется при move-back)
     full_name = Column(String, nullable=False)
     phone = Column(String, nullable=False)
-    programs = Column(JSON, nullable=False)  # Изменено с ARRAY(String) на JSON
+    programs = Column(JSONB, nullable=False)  # Список кодов программ; JSONB ради GIN-индекса
     status = Column(Enum(QueueStatus), nullable=False)
     notes = Column(String, nullable=True)
-    assigned_employee_name = Column(String, nullable=True)
+    assigned_employee_id = Column(String, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    assigned_employee_name = Column(String, nullable=True)  # Денормализованное имя для отображения
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     processing_time = Column(Integer, nullable=True)
-    form_language = Column(String, nullable=True)
\ No newline at end of file
+    form_language = Column(String, nullable=True)
+    # Для поиска: ФИО без регистра/диакритики и телефон цифрами (считает Postgres)
+    search_name = Column(String, Computed(search_name_sql("full_name"), persisted=True))
+    phone_digits = Column(String, Computed(phone_digits_sql("phone"), persisted=True))
+
+    __table_args__ = (
+        # call-next, /admission/queue, автоназначение: очередь сотрудника по статусу в порядке очереди
+        Index("ix_queue_entries_employee_status_order", "assigned_employee_id", "status", "order_key"),
+        # Подсчет позиции: WAITING с меньшим order_key
+        Index("ix_queue_entries_status_order", "status", "order_key"),
+        # Проверка дубликата по телефону - только среди активных заявок
+        Index(
+            "ix_queue_entries_phone_active", "phone",
+            postgresql_where=status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+        ),
+        # /public/queue/check: последняя заявка по нормализованному ФИО
+        Index("ix_queue_entries_search_name_created", "search_name", "created_at"),
+        # Поиск по части ФИО/телефона (LIKE '%...%', похожесть) - pg_trgm
+        Index("ix_queue_entries_search_name_trgm", "search_name", postgresql_using="gin", postgresql_ops={"search_name": "gin_trgm_ops"}),
+        Index("ix_queue_entries_phone_digits_trgm", "phone_digits", postgresql_using="gin", postgresql_ops={"phone_digits": "gin_trgm_ops"}),
+        # Постраничные списки: keyset по (created_at, id)
+        Index("ix_queue_entries_created_id", "created_at", "id"),
+        # Фильтр по программам: programs ?| array[коды]
+        Index("ix_queue_entries_programs", "programs", postgresql_using="gin"),
+        # Фоновая очистка: самые старые завершенные заявки
+        Index("ix_queue_entries_completed_updated", "updated_at", postgresql_where=status == QueueStatus.COMPLETED),
+    )
+
+class QueueCounter(Base):
+    """Единственная строка-счетчик, блокируется через SELECT ... FOR UPDATE при выдаче талона"""
+    __tablename__ = "queue_counters"
+
+    id = Column(Integer, primary_key=True)
+    number_date = Column(Date, nullable=False)  # День, к которому относится last_number
+    last_number = Column(Integer, nullable=False, default=0)
+    last_order_key = Column(BigInteger, nullable=False, default=0)
@@ -1,4 +1,5 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from uuid import uuid4
 from enum import Enum
@@ -23,5 +24,8 @@ class User(Base):
     desk = Column(String, nullable=True)
     status = Column(String, default=EmployeeStatus.OFFLINE.value)
     is_active = Column(Boolean, default=True)
+    # Профиль для автоназначения: коды программ и языки формы; пустой список - любые
+    programs = Column(JSONB, nullable=False, default=list, server_default=text("'[]'::jsonb"))
+    languages = Column(JSONB, nullable=False, default=list, server_default=text("'[]'::jsonb"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
@@ -0,0 +1,55 @@
+# app/normalization.py
+"""
+Нормализация ФИО и телефонов для поиска
+
+Одни и те же правила работают в Python (поисковый запрос) и в Postgres
+(генерируемые колонки search_name / phone_digits). Поэтому только translate
+и простые замены без классов символов: они ведут себя одинаково при любой
+локали базы (lower() в локали C не трогает кириллицу).
+"""
+import re
+
+# Регистр, ё/й, казахские буквы и латиница с диакритикой -> базовая строчная буква
+_FOLD = (
+    ("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"),
+    ("АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ", "абвгдеежзииклмнопрстуфхцчшщъыьэюя"),
+    ("ёй", "еи"),
+    ("ӘәІіҢңҒғҮүҰұҚқӨөҺһ", "ааииннггууууккоохх"),
+    ("ÀÁÂÃÄÅàáâãäåÇçÈÉÊËèéêëÌÍÎÏìíîïÑñ", "aaaaaaaaaaaacceeeeeeeeiiiiiiiinn"),
+    ("ÒÓÔÕÖòóôõöÙÚÛÜùúûüÝýÿĞğŞşİı", "oooooooooouuuuuuuuyyyggssii"),
+)
+NAME_FOLD_FROM = "".join(source for source, _ in _FOLD)
+NAME_FOLD_TO = "".join(target for _, target in _FOLD)
+
+_NAME_TABLE = str.maketrans(NAME_FOLD_FROM, NAME_FOLD_TO)
+_SEPARATORS = re.compile(r"[ \t\n\r\f\v.,'\"`-]+")
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+def normalize_name(value: str) -> str:
+    """'  Әлия  Ёлкина-Қасым ' -> 'алия елкина касым'"""
+    return _SEPARATORS.sub(" ", (value or "").translate(_NAME_TABLE)).strip(" ")
+
+def normalize_phone(value: str) -> str:
+    """Только цифры; казахстанские 8XXXXXXXXXX и XXXXXXXXXX -> 7XXXXXXXXXX"""
+    digits = _NON_DIGITS.sub("", value or "")
+    if len(digits) == 11 and digits.startswith("8"):
+        return "7" + digits[1:]
+    if len(digits) == 10:
+        return "7" + digits
+    return digits
+
+def search_name_sql(column: str) -> str:
+    """То же, что normalize_name, выражением Postgres (для генерируемой колонки)"""
+    return (
+        f"btrim(regexp_replace(translate({column}, '{NAME_FOLD_FROM}', '{NAME_FOLD_TO}'), "
+        f"'[[:space:].,''\"`-]+', ' ', 'g'), ' ')"
+    )
+
+def phone_digits_sql(column: str) -> str:
+    """То же, что normalize_phone, выражением Postgres"""
+    digits = f"regexp_replace({column}, '[^0-9]', '', 'g')"
+    return (
+        f"CASE WHEN length({digits}) = 11 AND left({digits}, 1) = '8' THEN '7' || substr({digits}, 2) "
+        f"WHEN length({digits}) = 10 THEN '7' || {digits} "
+        f"ELSE {digits} END"
+    )
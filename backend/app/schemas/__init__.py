@@ -17,7 +17,9 @@ from app.schemas.queue import (
     QueueResponse,
     QueueStatusResponse,
     PublicQueueCreate,
-    PublicQueueResponse
+    PublicQueueResponse,
+    QueueListItem,
+    QueueListPage
 )
 
 __all__ = [
@@ -34,5 +36,7 @@ __all__ = [
     'QueueResponse',
     'QueueStatusResponse',
     'PublicQueueCreate',
-    'PublicQueueResponse'
+    'PublicQueueResponse',
+    'QueueListItem',
+    'QueueListPage'
 ]
\ No newline at end of file
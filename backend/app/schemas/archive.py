@@ -26,6 +26,31 @@ class ArchivedQueueResponse(BaseModel):
         json_encoders={datetime: lambda v: v.isoformat()}
     )
 
+class ArchivedQueueListItem(BaseModel):
+    """Строка списка архива; phone и notes только при detailed=true"""
+    id: str
+    original_id: str
+    queue_number: int
+    full_name: str
+    programs: List[str]
+    status: ArchiveQueueStatus
+    assigned_employee_id: Optional[str] = None
+    assigned_employee_name: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    processing_time: Optional[int] = None
+    archived_at: Optional[datetime] = None
+    archive_reason: Optional[str] = None
+    phone: Optional[str] = None
+    notes: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ArchivedQueueListPage(BaseModel):
+    items: List[ArchivedQueueListItem]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
 class ArchiveStatistics(BaseModel):
     total_archived: int
     by_reason: dict
@@ -31,6 +31,7 @@ class PublicQueueCreate(BaseModel):
 class QueueResponse(QueueBase):
     id: str
     queue_number: int
+    assigned_employee_id: Optional[str] = None
     status: QueueStatus
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -44,6 +45,29 @@ class QueueResponse(QueueBase):
         json_encoders={datetime: lambda v: v.isoformat()}
     )
 
+class QueueListItem(BaseModel):
+    """Строка списка заявок; phone и notes только при detailed=true"""
+    id: str
+    queue_number: int
+    full_name: str
+    programs: List[str]
+    status: QueueStatus
+    assigned_employee_id: Optional[str] = None
+    assigned_employee_name: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    processing_time: Optional[int] = None
+    form_language: Optional[str] = None
+    phone: Optional[str] = None
+    notes: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class QueueListPage(BaseModel):
+    items: List[QueueListItem]
+    next_cursor: Optional[str] = None  # None - последняя страница
+    total: Optional[int] = None        # Только при include_total=true
+
 class QueueStatusResponse(BaseModel):
     queue_position: int
     total_waiting: int
@@ -67,4 +91,12 @@ class PublicQueueResponse(BaseModel):
     model_config = ConfigDict(
         from_attributes=True,
         json_encoders={datetime: lambda v: v.isoformat()}
-    )
\ No newline at end of file
+    )
+
+class PublicTicketStatusResponse(BaseModel):
+    """Статус талона при поиске только по телефону: без id, ФИО, телефона и заметок"""
+    queue_number: int
+    status: QueueStatus
+    position: Optional[int] = None
+    people_ahead: Optional[int] = None
+    estimated_time: Optional[int] = None
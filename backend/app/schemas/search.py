@@ -0,0 +1,21 @@
+from typing import List, Literal, Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+
+class SearchResult(BaseModel):
+    id: str
+    source: Literal["queue", "archive"]
+    queue_number: int
+    full_name: str
+    phone: str
+    status: str
+    assigned_employee_name: Optional[str] = None
+    created_at: datetime
+    score: float
+    original_id: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    partial: bool = False  # Архив не ответил за SEARCH_TIMEOUT_MS - только очередь
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 
@@ -21,6 +21,8 @@ class UserResponse(UserBase):
     role: str
     status: Optional[str] = None  # Добавляем статус
     desk: Optional[str] = None    # Добавляем стол
+    programs: List[str] = []      # Коды программ для автоназначения, пусто - любые
+    languages: List[str] = []     # Языки формы (ru, kk, en), пусто - любые
     is_active: bool
     created_at: datetime
 
@@ -43,6 +45,8 @@ class AdminUserCreate(BaseModel):
     phone: str
     password: str
     desk: Optional[str] = None  # Добавляем поле для стола
+    programs: List[str] = []
+    languages: List[str] = []
 
 # Схема для обновления пользователя
 class UserUpdate(BaseModel):
@@ -51,4 +55,6 @@ class UserUpdate(BaseModel):
     phone: Optional[str] = None
     desk: Optional[str] = None
     status: Optional[str] = None  # Добавляем статус
-    is_active: Optional[bool] = None
\ No newline at end of file
+    is_active: Optional[bool] = None
+    programs: Optional[List[str]] = None
+    languages: Optional[List[str]] = None
\ No newline at end of file
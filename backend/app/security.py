@@ -5,11 +5,14 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.config import settings
+from app.services.passwords import password_pool
+from app.services.user_cache import user_cache
 
 # Password context for hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -18,12 +21,16 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 def verify_password(plain_password, hashed_password):
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify password against hash (в пуле bcrypt, из sync-кода)"""
+    return password_pool.run_sync(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    """Verify password against hash без блокировки event loop"""
+    return await password_pool.run(pwd_context.verify, plain_password, hashed_password)
 
 def get_password_hash(password):
-    """Generate password hash"""
-    return pwd_context.hash(password)
+    """Generate password hash (в пуле bcrypt)"""
+    return password_pool.run_sync(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
@@ -39,7 +46,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     """Get current user from token"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,12 +64,20 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
     
+    # Сначала кэш: опрос /admission/status и /admission/queue обходится без SELECT users
+    cached = user_cache.get(user_id, token)
+    if cached is not None:
+        # load=False - объект попадает в сессию запроса без обращения к базе
+        return await db.merge(cached, load=False)
+    
     # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    generation = user_cache.generation(user_id)
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
     
     if user is None:
         raise credentials_exception
     
+    user_cache.put(token, user, generation)
     return user
 
 def get_current_active_user(current_user: User = Depends(get_current_user)):
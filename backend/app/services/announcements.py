@@ -0,0 +1,84 @@
+# app/services/announcements.py
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.queue import QueueEntry, QueueStatus
+from app.models.user import User
+from app.services.speechkit import generate_speech
+
+logger = logging.getLogger(__name__)
+
+# Фоновая задача предгенерации на каждого сотрудника (стол)
+_tasks: Dict[str, asyncio.Task] = {}
+# Сотрудники, у которых очередь изменилась во время предгенерации
+_rerun: Set[str] = set()
+
+async def pregenerate_for_employee(employee_id: str, limit: Optional[int] = None) -> int:
+    """
+    Озвучить заранее следующие N ожидающих талонов сотрудника
+
+    Returns:
+        Количество талонов, для которых объявление уже лежит в кэше
+    """
+    limit = settings.TTS_PREGENERATE_COUNT if limit is None else limit
+
+    # Соединение с базой держим только на время выборки, не на время синтеза
+    async with AsyncSessionLocal() as db:
+        desk = (await db.execute(
+            select(User.desk).where(User.id == employee_id)
+        )).scalar()
+        entries = (await db.execute(
+            select(QueueEntry.queue_number, QueueEntry.full_name, QueueEntry.form_language).where(
+                QueueEntry.status == QueueStatus.WAITING,
+                QueueEntry.assigned_employee_id == employee_id
+            ).order_by(QueueEntry.order_key).limit(limit)
+        )).all()
+
+    desk = desk or "не указан"
+    ready = 0
+    for entry in entries:
+        result = await generate_speech(
+            queue_number=entry.queue_number,
+            full_name=entry.full_name,
+            desk=desk,
+            language=entry.form_language or 'ru'
+        )
+        if result['success']:
+            ready += 1
+
+    logger.info(f"Pre-generated {ready}/{len(entries)} announcements for {employee_id}")
+    return ready
+
+async def _pregenerate_loop(employee_id: str):
+    try:
+        while True:
+            _rerun.discard(employee_id)
+            try:
+                await pregenerate_for_employee(employee_id)
+            except Exception as e:
+                logger.warning(f"Announcement pre-generation failed for {employee_id}: {e}")
+            if employee_id not in _rerun:
+                break
+    finally:
+        _tasks.pop(employee_id, None)
+
+def schedule_pregeneration(employee_id: Optional[str]):
+    """
+    Запустить предгенерацию в фоне (не блокирует запрос)
+
+    Если для сотрудника задача уже идет, она пройдет еще раз после завершения.
+    """
+    if not employee_id or not settings.GOOGLE_TTS_API_KEY or settings.TTS_PREGENERATE_COUNT <= 0:
+        return
+
+    task = _tasks.get(employee_id)
+    if task and not task.done():
+        _rerun.add(employee_id)
+        return
+
+    _tasks[employee_id] = asyncio.create_task(_pregenerate_loop(employee_id))
@@ -1,161 +1,145 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, delete, select, text
 from datetime import datetime, timedelta
+import asyncio
 import logging
-from typing import List
+from typing import Optional
+
+from app.config import settings
+from app.database import AsyncSessionLocal
 
 from app.models.queue import QueueEntry, QueueStatus
-from app.models.archive import ArchivedQueueEntry, ArchiveQueueStatus
+from app.models.archive import ArchivedQueueEntry
+from app.services.events import publish_global_event
 
 logger = logging.getLogger(__name__)
 
 QUEUE_LIMIT = 99  # Максимальное количество активных заявок
 
-def get_active_queue_count(db: Session) -> int:
+async def get_active_queue_count(db: AsyncSession) -> int:
     """Получить количество активных заявок (не completed и не cancelled)"""
-    return db.query(QueueEntry).filter(
-        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS, QueueStatus.PAUSED])
-    ).count()
+    result = await db.execute(
+        select(func.count(QueueEntry.id)).where(
+            QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS, QueueStatus.PAUSED])
+        )
+    )
+    return result.scalar()
 
-def get_completed_queue_count(db: Session) -> int:
+async def get_completed_queue_count(db: AsyncSession) -> int:
     """Получить количество завершенных заявок"""
-    return db.query(QueueEntry).filter(
-        QueueEntry.status == QueueStatus.COMPLETED
-    ).count()
-
-def archive_queue_entry(db: Session, queue_entry: QueueEntry, reason: str = "manual") -> ArchivedQueueEntry:
-    """Архивировать одну заявку"""
-    try:
-        # Создаем запись в архиве
-        archived_entry = ArchivedQueueEntry(
-            original_id=queue_entry.id,
-            queue_number=queue_entry.queue_number,
-            full_name=queue_entry.full_name,
-            phone=queue_entry.phone,
-            programs=queue_entry.programs,
-            status=ArchiveQueueStatus(queue_entry.status.value),
-            notes=queue_entry.notes,
-            assigned_employee_name=queue_entry.assigned_employee_name,
-            created_at=queue_entry.created_at,
-            updated_at=queue_entry.updated_at,
-            completed_at=queue_entry.updated_at if queue_entry.status == QueueStatus.COMPLETED else None,
-            processing_time=queue_entry.processing_time,
-            form_language=queue_entry.form_language,
-            archive_reason=reason
-        )
-        
-        db.add(archived_entry)
-        db.flush()  # Чтобы получить ID архивной записи
-        
-        logger.info(f"Archived queue entry {queue_entry.id} -> archive {archived_entry.id}")
-        return archived_entry
-        
-    except Exception as e:
-        logger.error(f"Error archiving queue entry {queue_entry.id}: {e}")
-        raise
+    result = await db.execute(
+        select(func.count(QueueEntry.id)).where(QueueEntry.status == QueueStatus.COMPLETED)
+    )
+    return result.scalar()
 
-def cleanup_old_completed_entries(db: Session, entries_to_remove: int = None) -> int:
+async def purge_queue_entries(db: AsyncSession, condition, reason: str) -> int:
     """
-    Архивировать и удалить старые завершенные заявки
-    
-    Args:
-        db: Database session
-        entries_to_remove: Количество записей для удаления. Если None, удаляем все completed старше 7 дней
-    
+    Удалить заявки по условию одним DELETE (без commit)
+
+    Копия в архиве уже есть и поддерживается триггерами на queue_entries,
+    при удалении они только проставляют archive_reason и archived_at. Причина
+    передается через настройку транзакции app.archive_reason.
+
     Returns:
-        Количество заархивированных записей
+        Количество удаленных заявок
     """
-    try:
-        if entries_to_remove is not None:
-            # Удаляем определенное количество самых старых completed заявок
-            old_entries = db.query(QueueEntry).filter(
-                QueueEntry.status == QueueStatus.COMPLETED
-            ).order_by(QueueEntry.updated_at.asc()).limit(entries_to_remove).all()
-        else:
-            # Удаляем completed заявки старше 7 дней
-            cutoff_date = datetime.utcnow() - timedelta(days=7)
-            old_entries = db.query(QueueEntry).filter(
-                and_(
-                    QueueEntry.status == QueueStatus.COMPLETED,
-                    QueueEntry.updated_at < cutoff_date
-                )
-            ).all()
-        
-        archived_count = 0
-        
-        for entry in old_entries:
-            try:
-                # Архивируем запись
-                archive_queue_entry(db, entry, reason="auto_cleanup")
-                
-                # Удаляем из основной таблицы
-                db.delete(entry)
-                archived_count += 1
-                
-                logger.info(f"Cleaned up completed entry {entry.id}")
-                
-            except Exception as e:
-                logger.error(f"Error cleaning up entry {entry.id}: {e}")
-                continue
-        
-        if archived_count > 0:
-            db.commit()
-            logger.info(f"Successfully archived and removed {archived_count} old completed entries")
-        
-        return archived_count
-        
-    except Exception as e:
-        logger.error(f"Error in cleanup_old_completed_entries: {e}")
-        db.rollback()
-        raise
+    await db.execute(text("SELECT set_config('app.archive_reason', :reason, true)"), {"reason": reason})
+    result = await db.execute(
+        delete(QueueEntry).where(condition).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
 
-def enforce_queue_limit(db: Session) -> bool:
+async def purge_completed_entries(retention: timedelta = None, batch_size: int = None) -> int:
     """
-    Очистить старые completed заявки если нужно
-    Всегда возвращает True - заявка всегда создается
+    Удалить из очереди completed заявки старше retention пачками по batch_size
+
+    Каждая пачка - один DELETE в своей транзакции, поэтому блокировки короткие,
+    а прерванная очистка продолжится со следующей пачки. Строки, заблокированные
+    запросами (или вторым воркером с той же задачей), пропускаются (SKIP LOCKED).
+
+    Returns:
+        Количество удаленных заявок
     """
-    try:
-        total_count = db.query(QueueEntry).count()
-        
-        if total_count >= QUEUE_LIMIT:
-            logger.info(f"Queue limit reached ({total_count}/{QUEUE_LIMIT}). Cleaning up old entries...")
-            
-            # Удаляем completed заявки для освобождения места
-            completed_count = get_completed_queue_count(db)
-            
-            if completed_count > 0:
-                entries_to_remove = max(1, completed_count - 5)  # Оставляем только 5 completed
-                cleaned_count = cleanup_old_completed_entries(db, entries_to_remove)
-                logger.info(f"Freed up {cleaned_count} slots by archiving completed entries")
-        
-        return True  # ВСЕГДА разрешаем создание новой заявки
-        
-    except Exception as e:
-        logger.error(f"Error in enforce_queue_limit: {e}")
-        return True  # Даже при ошибке разрешаем создание
+    if retention is None:
+        retention = timedelta(hours=settings.ARCHIVE_RETENTION_HOURS)
+    batch_size = batch_size or settings.ARCHIVE_PURGE_BATCH_SIZE
+    cutoff = datetime.utcnow() - retention
+
+    total = 0
+    while True:
+        batch = select(QueueEntry.id).where(
+            QueueEntry.status == QueueStatus.COMPLETED,
+            QueueEntry.updated_at < cutoff
+        ).order_by(QueueEntry.updated_at.asc()).limit(batch_size).with_for_update(skip_locked=True)
 
-def get_archive_statistics(db: Session) -> dict:
+        async with AsyncSessionLocal() as db:
+            removed = await purge_queue_entries(db, QueueEntry.id.in_(batch.scalar_subquery()), reason="auto_cleanup")
+            await db.commit()
+
+        total += removed
+        if removed < batch_size:
+            break
+
+    if total:
+        logger.info(f"Purged {total} completed entries older than {cutoff}")
+        publish_global_event("queue_purged")
+    return total
+
+async def _purge_loop():
+    while True:
+        await asyncio.sleep(settings.ARCHIVE_PURGE_INTERVAL_SECONDS)
+        try:
+            await purge_completed_entries()
+        except Exception as e:
+            logger.error(f"Scheduled archive purge failed: {e}")
+
+_purge_task: Optional[asyncio.Task] = None
+
+def start_purge_job():
+    """Запустить периодическую очистку (lifespan в main.py); интервал 0 - отключена"""
+    global _purge_task
+    if settings.ARCHIVE_PURGE_INTERVAL_SECONDS <= 0 or (_purge_task and not _purge_task.done()):
+        return
+    _purge_task = asyncio.create_task(_purge_loop())
+
+async def stop_purge_job():
+    global _purge_task
+    if _purge_task:
+        _purge_task.cancel()
+        try:
+            await _purge_task
+        except asyncio.CancelledError:
+            pass
+        _purge_task = None
+
+async def get_archive_statistics(db: AsyncSession) -> dict:
     """Получить статистику архива"""
     try:
-        total_archived = db.query(ArchivedQueueEntry).count()
+        total_archived = (await db.execute(select(func.count(ArchivedQueueEntry.id)))).scalar()
         
         # Статистика по причинам архивирования
-        by_reason = db.query(
-            ArchivedQueueEntry.archive_reason,
-            func.count(ArchivedQueueEntry.id)
-        ).group_by(ArchivedQueueEntry.archive_reason).all()
+        by_reason = (await db.execute(
+            select(
+                ArchivedQueueEntry.archive_reason,
+                func.count(ArchivedQueueEntry.id)
+            ).group_by(ArchivedQueueEntry.archive_reason)
+        )).all()
         
         # Статистика по статусам
-        by_status = db.query(
-            ArchivedQueueEntry.status,
-            func.count(ArchivedQueueEntry.id)
-        ).group_by(ArchivedQueueEntry.status).all()
+        by_status = (await db.execute(
+            select(
+                ArchivedQueueEntry.status,
+                func.count(ArchivedQueueEntry.id)
+            ).group_by(ArchivedQueueEntry.status)
+        )).all()
+        
+        current_queue_size = (await db.execute(select(func.count(QueueEntry.id)))).scalar()
         
         return {
             "total_archived": total_archived,
             "by_reason": dict(by_reason),
             "by_status": dict(by_status),
-            "current_queue_size": db.query(QueueEntry).count(),
+            "current_queue_size": current_queue_size,
             "queue_limit": QUEUE_LIMIT
         }
         
@@ -0,0 +1,151 @@
+# app/services/audio_cache.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedAudio:
+    audio_id: str
+    audio: bytes   # MP3
+    text: str
+    language: str  # Язык, которым реально озвучено (kk может упасть в ru)
+    expires_at: Optional[float] = None  # time.monotonic(), после которого объявление устарело; None - бессрочно
+    etag: str = field(init=False)
+
+    def __post_init__(self):
+        # ETag от содержимого: русский fallback и казахский вариант различаются
+        self.etag = hashlib.sha256(self.audio).hexdigest()[:16]
+
+def announcement_key(language: str, queue_number: int, desk: str) -> str:
+    """
+    Ключ объявления - хэш от (язык, номер, стол)
+
+    Текст объявления зависит только от этих трех значений, поэтому
+    одинаковый вызов всегда попадает в один и тот же файл.
+    """
+    raw = f"{language}|{queue_number}|{desk}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+class AudioCache:
+    """
+    LRU-кэш готовых mp3 в памяти + каталог на диске
+
+    Рядом с каждым mp3 лежит .json с текстом и языком объявления.
+    Память ограничена TTS_CACHE_MAX_ITEMS, диск переживает рестарт backend.
+    """
+
+    def __init__(self, directory: str, max_items: int):
+        self.directory = directory
+        self.max_items = max_items
+        self._items: "OrderedDict[str, CachedAudio]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, audio_id: str, extension: str = "mp3") -> str:
+        return os.path.join(self.directory, f"{audio_id}.{extension}")
+
+    def _remember(self, item: CachedAudio):
+        with self._lock:
+            self._items[item.audio_id] = item
+            self._items.move_to_end(item.audio_id)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def _read_file(self, audio_id: str) -> Optional[Tuple[bytes, dict]]:
+        """mp3 и метаданные (текст, язык); у файлов без .json метаданные пустые"""
+        try:
+            with open(self._path(audio_id), "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            with open(self._path(audio_id, "json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            meta = {}
+        return audio, meta
+
+    def _replace_file(self, path: str, content: bytes):
+        # Пишем во временный файл и переименовываем, чтобы не отдать недописанный файл
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _write_file(self, item: CachedAudio):
+        os.makedirs(self.directory, exist_ok=True)
+        meta = {"text": item.text, "language": item.language}
+        # Метаданные раньше mp3: если mp3 есть, то и текст с языком к нему есть
+        self._replace_file(self._path(item.audio_id, "json"), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        self._replace_file(self._path(item.audio_id), item.audio)
+
+    async def get(self, audio_id: str, text: str = "", language: str = "") -> Optional[CachedAudio]:
+        """
+        Найти объявление в памяти, затем на диске
+
+        text/language - для файлов, записанных без метаданных: если их не знает
+        и вызывающий, объявление отдается, но в память не кладется.
+        """
+        with self._lock:
+            item = self._items.get(audio_id)
+            if item and item.expires_at is not None and item.expires_at <= time.monotonic():
+                # Временное объявление (русский вместо казахского) - синтезируем заново
+                del self._items[audio_id]
+                item = None
+            if item:
+                self._items.move_to_end(audio_id)
+                self.hits += 1
+                return item
+
+        stored = await asyncio.to_thread(self._read_file, audio_id)
+        if stored is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        audio, meta = stored
+        item = CachedAudio(
+            audio_id=audio_id,
+            audio=audio,
+            text=meta.get("text") or text,
+            language=meta.get("language") or language
+        )
+        if item.text and item.language:
+            self._remember(item)
+        return item
+
+    async def put(self, item: CachedAudio, persist: bool = True):
+        """Сохранить объявление; persist=False - только в памяти"""
+        self._remember(item)
+        if not persist:
+            return
+        try:
+            await asyncio.to_thread(self._write_file, item)
+        except OSError as e:
+            logger.warning(f"Failed to store audio {item.audio_id} on disk: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._items)
+        return {
+            "memory_items": size,
+            "max_items": self.max_items,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+audio_cache = AudioCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_ITEMS)
@@ -1,36 +1,52 @@
 # app/services/captcha.py
-import httpx
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
 from app.config import settings
+from app.services.http_client import OutboundHTTPClient, get_http_client
 
-async def verify_captcha_v3(token: str, remote_ip: str, action: str = "submit") -> dict:
+VERDICT_CACHE_SIZE = 10000  # Сколько проверенных токенов помним
+
+async def _siteverify(token: str, remote_ip: str, action: str, http: OutboundHTTPClient) -> dict:
+    """Запрос к siteverify; сетевые ошибки и 5xx пробрасываются наружу"""
+    # Токен одноразовый - повторяем запрос только если соединение не установилось
+    response = await http.post(
+        settings.RECAPTCHA_VERIFY_URL,
+        idempotent=False,
+        data={
+            "secret": settings.RECAPTCHA_SECRET_KEY,
+            "response": token,
+            "remoteip": remote_ip
+        }
+    )
+    response.raise_for_status()
+
+    result = response.json()
+
+    # v3 возвращает score от 0 до 1 (1 = человек, 0 = бот)
+    # Также проверяем action для дополнительной безопасности
+    success = result.get("success", False)
+    score = result.get("score", 0.0)
+    action_match = result.get("action", "") == action
+
+    return {
+        "success": success,
+        "score": score,
+        "action_match": action_match,
+        "is_human": success and score >= settings.RECAPTCHA_MIN_SCORE and action_match,
+        "error_codes": result.get("error-codes", [])
+    }
+
+async def verify_captcha_v3(
+    token: str,
+    remote_ip: str,
+    action: str = "submit",
+    http: Optional[OutboundHTTPClient] = None
+) -> dict:
     """Verify reCAPTCHA v3 token and return score"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://www.google.com/recaptcha/api/siteverify",
-                data={
-                    "secret": settings.RECAPTCHA_SECRET_KEY,
-                    "response": token,
-                    "remoteip": remote_ip
-                }
-            )
-        
-        result = response.json()
-        
-        # v3 возвращает score от 0 до 1 (1 = человек, 0 = бот)
-        # Также проверяем action для дополнительной безопасности
-        success = result.get("success", False)
-        score = result.get("score", 0.0)
-        action_match = result.get("action", "") == action
-        
-        return {
-            "success": success,
-            "score": score,
-            "action_match": action_match,
-            "is_human": success and score >= 0.5 and action_match,  # Порог 0.5
-            "error_codes": result.get("error-codes", [])
-        }
-        
+        return await _siteverify(token, remote_ip, action, http or get_http_client())
     except Exception as e:
         print(f"reCAPTCHA v3 verification error: {e}")
         return {
@@ -41,8 +57,204 @@ async def verify_captcha_v3(token: str, remote_ip: str, action: str = "submit")
             "error_codes": ["network_error"]
         }
 
+class CaptchaMetrics:
+    """Задержка вызовов siteverify и исходы проверок"""
+
+    def __init__(self, window: int = 500):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.cache_hits = 0
+        self.fallback_allowed = 0
+        self.fallback_denied = 0
+
+    def record_call(self, seconds: float):
+        self.calls += 1
+        self.latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000, 2)
+
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "cache_hits": self.cache_hits,
+            "fallback_allowed": self.fallback_allowed,
+            "fallback_denied": self.fallback_denied,
+            "latency_ms": {
+                "avg": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+            },
+        }
+
+class CircuitBreaker:
+    """
+    closed -> open после N ошибок/таймаутов подряд
+
+    В состоянии open Google не вызываем RECAPTCHA_BREAKER_RESET_SECONDS,
+    затем пропускаем один пробный запрос (half_open).
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"⚡ reCAPTCHA circuit breaker открыт ({self.failures} ошибок подряд)")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+class LocalRateLimiter:
+    """Не больше N заявок в минуту с одного IP (пока Google недоступен)"""
+
+    def __init__(self, limit: int, period: float = 60.0):
+        self.limit = limit
+        self.period = period
+        self._hits: Dict[str, Deque[float]] = {}
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        hits = self._hits.setdefault(key, deque())
+        while hits and now - hits[0] > self.period:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            return False
+        hits.append(now)
+
+        # Чистим IP, которые давно не отправляли заявки
+        if len(self._hits) > VERDICT_CACHE_SIZE:
+            for stale in [k for k, v in self._hits.items() if not v or now - v[-1] > self.period]:
+                del self._hits[stale]
+        return True
+
+metrics = CaptchaMetrics()
+breaker = CircuitBreaker(settings.RECAPTCHA_BREAKER_FAILURES, settings.RECAPTCHA_BREAKER_RESET_SECONDS)
+fallback_limiter = LocalRateLimiter(settings.RECAPTCHA_FALLBACK_PER_MINUTE)
+
+# token -> когда забываем. Здесь токены, которые уже не пропустят: не прошедшие
+# проверку и уже использованные. Положительный вердикт не кэшируется - иначе один
+# прошедший токен создавал бы заявки до истечения кэша, а Google дубля не видел бы
+_spent_tokens: "OrderedDict[str, float]" = OrderedDict()
+_pending: Dict[str, asyncio.Task] = {}
+
+def _is_spent(token: str) -> bool:
+    expires_at = _spent_tokens.get(token)
+    if expires_at is None:
+        return False
+    if time.monotonic() > expires_at:
+        del _spent_tokens[token]
+        return False
+    return True
+
+def _spend(token: str):
+    _spent_tokens[token] = time.monotonic() + settings.RECAPTCHA_CACHE_TTL_SECONDS
+    while len(_spent_tokens) > VERDICT_CACHE_SIZE:
+        _spent_tokens.popitem(last=False)
+
+def _fallback_verdict(remote_ip: str) -> bool:
+    allowed = fallback_limiter.allow(remote_ip)
+    if allowed:
+        metrics.fallback_allowed += 1
+    else:
+        metrics.fallback_denied += 1
+        print(f"🚫 Лимит заявок без reCAPTCHA для {remote_ip}")
+    return allowed
+
+async def _verify_remote(token: str, remote_ip: str, action: str, http: OutboundHTTPClient) -> Optional[bool]:
+    """Вердикт Google или None, если Google недоступен/медленный"""
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(
+            _siteverify(token, remote_ip, action, http),
+            timeout=settings.RECAPTCHA_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        metrics.failures += 1
+        breaker.record_failure()
+        print(f"reCAPTCHA v3 verification error: {type(e).__name__} {e}")
+        return None
+    finally:
+        metrics.record_call(time.perf_counter() - start)
+
+    breaker.record_success()
+    if not result["is_human"]:
+        _spend(token)
+    return result["is_human"]
+
 # Основная функция для проверки (используется в роутах)
-async def verify_captcha(token: str, remote_ip: str) -> bool:
-    """Main function for v3 verification - returns boolean"""
-    result = await verify_captcha_v3(token, remote_ip, "submit")
-    return result["is_human"]
\ No newline at end of file
+async def verify_captcha(
+    token: Optional[str],
+    remote_ip: str,
+    action: Optional[str] = None,
+    http: Optional[OutboundHTTPClient] = None
+) -> bool:
+    """
+    Main function for v3 verification - returns boolean
+
+    Использованные и отклоненные токены -> Google (через circuit breaker) ->
+    локальный лимит по IP, если Google не ответил за RECAPTCHA_TIMEOUT_SECONDS
+    или breaker открыт. Прошедший токен пропускает одну заявку.
+    """
+    if not token:
+        return False
+
+    if _is_spent(token):
+        metrics.cache_hits += 1
+        return False
+
+    # Одновременные запросы с одним токеном ждут одну проверку
+    task = _pending.get(token)
+    if task is None:
+        if not breaker.allow_request():
+            return _fallback_verdict(remote_ip)
+        task = asyncio.create_task(
+            _verify_remote(token, remote_ip, action or settings.RECAPTCHA_ACTION, http or get_http_client())
+        )
+        _pending[token] = task
+        task.add_done_callback(lambda _: _pending.pop(token, None))
+
+    verdict = await asyncio.shield(task)
+    if verdict is None:
+        return _fallback_verdict(remote_ip)
+    # Одновременные отправки ждали одну проверку - пропускаем только первую
+    if not verdict or _is_spent(token):
+        return False
+    _spend(token)
+    return True
+
+def get_captcha_stats() -> dict:
+    return {
+        **metrics.snapshot(),
+        "breaker_state": breaker.state,
+        "spent_tokens": len(_spent_tokens),
+    }
@@ -0,0 +1,56 @@
+# app/services/display.py
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import List
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.queue import QueueEntry, QueueStatus
+from app.models.user import User
+from app.services.versioned_cache import VersionedCache
+
+@dataclass
+class CachedPayload:
+    body: bytes
+    etag: str
+
+async def load_display_queue() -> List[dict]:
+    """Вызванные заявки со столом сотрудника одним запросом"""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(
+                QueueEntry.id,
+                QueueEntry.queue_number,
+                QueueEntry.status,
+                QueueEntry.assigned_employee_name,
+                QueueEntry.programs,
+                User.desk
+            ).outerjoin(
+                User,
+                User.id == QueueEntry.assigned_employee_id
+            ).where(
+                QueueEntry.status == QueueStatus.IN_PROGRESS
+            ).order_by(QueueEntry.order_key)
+        )).all()
+
+    return [
+        {
+            "id": row.id,
+            "queue_number": row.queue_number,
+            "status": row.status.value,
+            "assigned_employee_name": row.assigned_employee_name,
+            "employee_desk": row.desk or None,
+            "programs": row.programs
+        }
+        for row in rows
+    ]
+
+async def load_display_payload() -> CachedPayload:
+    body = json.dumps(await load_display_queue(), ensure_ascii=False, default=str).encode("utf-8")
+    # ETag от содержимого: после события без видимых изменений табло получит 304
+    return CachedPayload(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+
+display_queue_cache: VersionedCache[CachedPayload] = VersionedCache(load_display_payload, settings.DISPLAY_CACHE_TTL_SECONDS)
@@ -0,0 +1,162 @@
+# app/services/events.py
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Топики, на которые подписываются клиенты:
+#   display            - табло в зале (вызовы, завершения, настройки видео, статусы сотрудников)
+#   queue              - любое изменение очереди (позиции, счетчик)
+#   employee:<id>      - очередь конкретного сотрудника
+#   ticket:<id>        - статус конкретной заявки
+DISPLAY_TOPIC = "display"
+QUEUE_TOPIC = "queue"
+
+SUBSCRIBER_QUEUE_SIZE = 100  # Сколько событий держим для медленного клиента
+KEEPALIVE_SECONDS = 15       # Комментарий-пинг, чтобы прокси не рвали соединение
+
+def employee_topic(employee_id: str) -> str:
+    return f"employee:{employee_id}"
+
+def ticket_topic(queue_id: str) -> str:
+    return f"ticket:{queue_id}"
+
+class EventBroker:
+    """
+    Простой in-process pub/sub для server-sent events
+
+    publish() можно вызывать из синхронных роутов (они работают в threadpool),
+    доставка в asyncio-очереди подписчиков идет через call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, topics: Iterable[str]) -> asyncio.Queue:
+        """Подписаться на топики (вызывается из event loop)"""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            for topic in topics:
+                self._subscribers[topic].add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, topics: Iterable[str]):
+        with self._lock:
+            for topic in topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is None:
+                    continue
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def publish(self, topic: str, event: dict):
+        """Отправить событие всем подписчикам топика (thread-safe)"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+
+        if not subscribers or self._loop is None or self._loop.is_closed():
+            return
+
+        event = {**event, "topic": topic}
+        for queue in subscribers:
+            self._loop.call_soon_threadsafe(self._deliver, queue, event)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Клиент не успевает читать - пропускаем событие, при следующем
+            # событии он все равно перезапросит данные через GET
+            logger.warning(f"Dropping event {event.get('type')} for slow subscriber")
+
+broker = EventBroker()
+
+# Версия состояния очереди/сотрудников: растет при каждом опубликованном
+# изменении, по ней инвалидируются in-process кэши (см. services/versioned_cache.py)
+_state_version = 0
+_version_lock = threading.Lock()
+
+def bump_state_version() -> int:
+    global _state_version
+    with _version_lock:
+        _state_version += 1
+        return _state_version
+
+def get_state_version() -> int:
+    return _state_version
+
+def publish_queue_event(event_type: str, queue_entry, employee_id: Optional[str] = None):
+    """
+    Опубликовать изменение заявки во все связанные топики
+
+    id заявки уходит только в ее собственный топик ticket:<id>: по id работают
+    публичные отмена и перенос в конец, а display/queue/employee:<id> слушает кто угодно.
+    """
+    bump_state_version()
+    status = getattr(queue_entry.status, "value", queue_entry.status)
+    event = {
+        "type": event_type,
+        "queue_number": queue_entry.queue_number,
+        "status": status,
+    }
+
+    broker.publish(QUEUE_TOPIC, event)
+    broker.publish(DISPLAY_TOPIC, event)
+    broker.publish(ticket_topic(queue_entry.id), {**event, "id": queue_entry.id})
+
+    for assigned_id in {employee_id, queue_entry.assigned_employee_id}:
+        if assigned_id:
+            broker.publish(employee_topic(assigned_id), event)
+
+def publish_employee_event(employee):
+    """Опубликовать изменение статуса сотрудника (табло + его собственный топик)"""
+    bump_state_version()
+    event = {
+        "type": "employee_status",
+        "id": employee.id,
+        "status": employee.status,
+        "desk": employee.desk,
+    }
+    broker.publish(DISPLAY_TOPIC, event)
+    broker.publish(employee_topic(employee.id), event)
+
+def publish_global_event(event_type: str, topics: Iterable[str] = (DISPLAY_TOPIC, QUEUE_TOPIC)):
+    """Событие без привязки к заявке (настройки видео, сброс нумерации)"""
+    bump_state_version()
+    for topic in topics:
+        broker.publish(topic, {"type": event_type})
+
+def is_valid_topic(topic: str) -> bool:
+    if topic in (DISPLAY_TOPIC, QUEUE_TOPIC):
+        return True
+    prefix, _, key = topic.partition(":")
+    return prefix in ("employee", "ticket") and bool(key)
+
+async def event_stream(request, topics: Iterable[str]):
+    """Генератор SSE-потока для StreamingResponse"""
+    topics = list(topics)
+    queue = broker.subscribe(topics)
+    try:
+        # Клиент переподключится через 5 секунд при обрыве
+        yield "retry: 5000\n\n"
+        while True:
+            if await request.is_disconnected():
+                break
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            # Без поля "event:", чтобы все типы приходили в EventSource.onmessage
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+    finally:
+        broker.unsubscribe(queue, topics)
@@ -0,0 +1,118 @@
+# app/services/export.py
+import csv
+import io
+import logging
+import tempfile
+from typing import Iterator, List
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
+from sqlalchemy import Select
+
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+EXPORT_HEADERS = ["ФИО", "Программы", "Номер", "Сотрудник", "Дата создания", "Статус", "Время обработки (сек)"]
+CHUNK_SIZE = 64 * 1024
+MAX_COLUMN_WIDTH = 50
+
+def _export_row(row) -> list:
+    programs = ", ".join(row.programs) if isinstance(row.programs, list) else row.programs
+    created_at = row.created_at.strftime("%Y-%m-%d %H:%M:%S") if row.created_at else "-"
+    return [
+        row.full_name,
+        programs,
+        row.queue_number,
+        row.assigned_employee_name or "-",
+        created_at,
+        row.status.value,
+        row.processing_time or "-"
+    ]
+
+def iter_export_rows(query: Select) -> Iterator[list]:
+    """
+    Строки выгрузки пачками по EXPORT_BATCH_SIZE (серверный курсор)
+
+    Синхронный генератор: StreamingResponse перебирает его в пуле потоков,
+    event loop не блокируется, а в памяти лежит только текущая пачка.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        for row in result:
+            yield _export_row(row)
+    finally:
+        db.close()
+
+def stream_csv(query: Select) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM, чтобы Excel открыл кириллицу без выбора кодировки
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+
+    for row in iter_export_rows(query):
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+def _column_widths(sample: List[list]) -> List[int]:
+    """Ширина колонок по заголовкам и первым строкам, а не по всем ячейкам"""
+    widths = [len(header) for header in EXPORT_HEADERS]
+    for row in sample:
+        for col, value in enumerate(row):
+            widths[col] = max(widths[col], len(str(value)))
+    return [min(width + 2, MAX_COLUMN_WIDTH) for width in widths]
+
+def stream_xlsx(query: Select) -> Iterator[bytes]:
+    """
+    xlsx в режиме write_only: строки сразу пишутся во временный файл на диске
+
+    xlsx - zip-архив, поэтому отдаем его после сборки, но кусками из файла,
+    а не копией всего буфера в памяти.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Queue Data")
+
+    rows = iter_export_rows(query)
+    sample = []
+    for row in rows:
+        sample.append(row)
+        if len(sample) >= settings.EXPORT_WIDTH_SAMPLE_ROWS:
+            break
+
+    # В write_only ширину колонок нужно задать до первой строки
+    for col, width in enumerate(_column_widths(sample), 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    header_cells = []
+    for header in EXPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        cell.alignment = Alignment(horizontal="center")
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    count = 0
+    for row in sample:
+        ws.append(row)
+        count += 1
+    for row in rows:
+        ws.append(row)
+        count += 1
+
+    with tempfile.TemporaryFile() as output:
+        wb.save(output)
+        logger.info(f"Excel export built: {count} rows, {output.tell()} bytes")
+        output.seek(0)
+        while chunk := output.read(CHUNK_SIZE):
+            yield chunk
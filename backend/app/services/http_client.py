@@ -0,0 +1,124 @@
+# app/services/http_client.py
+import asyncio
+import logging
+import random
+from typing import Dict, Iterable, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Ошибки, при которых запрос точно не ушел на сервер - повторять безопасно всегда
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _origin(url: str) -> str:
+    parsed = httpx.URL(url)
+    return f"{parsed.scheme}://{parsed.netloc.decode('ascii')}"
+
+class OutboundHTTPClient:
+    """
+    Один httpx.AsyncClient на все время работы приложения
+
+    Соединения (и TLS-сессии) к Google переиспользуются между запросами.
+    Для каждого внешнего хоста свой пул с лимитами HTTP_CLIENT_*.
+    Создается в lifespan (main.py); в скриптах - лениво при первом запросе.
+    """
+
+    def __init__(self, hosts: Iterable[str] = (), transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._hosts = list(hosts)
+        self._transport_override = transport  # Тесты: httpx.MockTransport вместо сети
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.retries = 0
+
+    def _transport(self, http2: bool) -> httpx.AsyncHTTPTransport:
+        return httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY
+            )
+        )
+
+    def _create_client(self) -> httpx.AsyncClient:
+        if self._transport_override is not None:
+            return httpx.AsyncClient(transport=self._transport_override, timeout=settings.HTTP_CLIENT_TIMEOUT)
+
+        http2 = settings.HTTP_CLIENT_HTTP2 and _http2_available()
+        if settings.HTTP_CLIENT_HTTP2 and not http2:
+            logger.warning("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+
+        mounts: Dict[str, httpx.AsyncHTTPTransport] = {
+            _origin(host): self._transport(http2) for host in self._hosts
+        }
+        return httpx.AsyncClient(
+            transport=self._transport(http2),
+            mounts=mounts,
+            timeout=httpx.Timeout(settings.HTTP_CLIENT_TIMEOUT, connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT)
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    async def start(self):
+        self.client
+        logger.info(f"Outbound HTTP client started (hosts: {', '.join(self._hosts)})")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """
+        Запрос с повторами и экспоненциальной паузой
+
+        idempotent=False - повторяем только если соединение не установилось
+        (например, токен reCAPTCHA нельзя проверить дважды).
+        """
+        attempt = 0
+        while True:
+            self.requests += 1
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                if not (idempotent and response.status_code in RETRY_STATUS_CODES) or attempt >= settings.HTTP_CLIENT_RETRIES:
+                    return response
+                reason = f"status {response.status_code}"
+            except httpx.TransportError as e:
+                retryable = isinstance(e, CONNECT_ERRORS) or idempotent
+                if not retryable or attempt >= settings.HTTP_CLIENT_RETRIES:
+                    raise
+                reason = type(e).__name__
+
+            delay = settings.HTTP_CLIENT_BACKOFF * (2 ** attempt) * (1 + random.random() / 2)
+            attempt += 1
+            self.retries += 1
+            logger.warning(f"{method} {url} failed ({reason}), retry {attempt} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "retries": self.retries}
+
+outbound_http = OutboundHTTPClient(hosts=[settings.RECAPTCHA_VERIFY_URL, settings.GOOGLE_TTS_URL])
+
+def get_http_client() -> OutboundHTTPClient:
+    """Общий клиент для сервисов (и Depends в роутах)"""
+    return outbound_http
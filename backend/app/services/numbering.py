@@ -0,0 +1,133 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from datetime import date, datetime
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+import logging
+
+from app.config import settings
+from app.models.queue import QueueEntry, QueueStatus, QueueCounter
+
+logger = logging.getLogger(__name__)
+
+COUNTER_ID = 1  # Счетчик один на всю очередь
+
+ACTIVE_STATUSES = [QueueStatus.WAITING, QueueStatus.IN_PROGRESS, QueueStatus.PAUSED]
+
+def local_today(now: Optional[datetime] = None) -> date:
+    """Текущий день приемной комиссии (QUEUE_TIMEZONE), а не сервера - в контейнере там UTC"""
+    zone = ZoneInfo(settings.QUEUE_TIMEZONE)
+    return (now.astimezone(zone) if now else datetime.now(zone)).date()
+
+async def _lock_counter(db: AsyncSession) -> QueueCounter:
+    """
+    Получить строку-счетчик под блокировкой FOR UPDATE
+
+    Блокировка держится до commit/rollback вызывающей транзакции, поэтому
+    параллельные заявки получают номера строго по очереди.
+    """
+    counter = (await db.execute(
+        select(QueueCounter).where(QueueCounter.id == COUNTER_ID)
+        .with_for_update().execution_options(populate_existing=True)
+    )).scalar_one_or_none()
+
+    if counter:
+        return counter
+
+    # Первый запуск: создаем счетчик, продолжая уже выданные номера
+    last_number = (await db.execute(
+        select(func.max(QueueEntry.queue_number)).where(QueueEntry.status.in_(ACTIVE_STATUSES))
+    )).scalar() or 0
+    last_order_key = (await db.execute(select(func.max(QueueEntry.order_key)))).scalar() or 0
+
+    # ON CONFLICT DO NOTHING - если счетчик параллельно создал другой запрос
+    await db.execute(
+        insert(QueueCounter).values(
+            id=COUNTER_ID,
+            number_date=local_today(),
+            last_number=last_number,
+            last_order_key=last_order_key
+        ).on_conflict_do_nothing(index_elements=[QueueCounter.id])
+    )
+    logger.info(f"Initialized queue counter (last_number={last_number}, last_order_key={last_order_key})")
+
+    return (await db.execute(
+        select(QueueCounter).where(QueueCounter.id == COUNTER_ID)
+        .with_for_update().execution_options(populate_existing=True)
+    )).scalar_one()
+
+async def issue_ticket_number(db: AsyncSession) -> Tuple[int, int]:
+    """
+    Выдать номер талона и ключ порядка для новой заявки
+
+    Номера идут подряд и начинаются с 1 каждый новый день (по QUEUE_TIMEZONE).
+    Номера, которые еще держат активные заявки прошлого дня, пропускаются.
+    Другие заявки не перенумеровываются. Коммит делает вызывающий код.
+
+    Returns:
+        (queue_number, order_key)
+    """
+    counter = await _lock_counter(db)
+
+    today = local_today()
+    if counter.number_date != today:
+        logger.info(f"New day {today}: ticket numbering restarts from 1")
+        counter.number_date = today
+        counter.last_number = 0
+
+    # Активных заявок не больше QUEUE_LIMIT, а в обычный день номеров
+    # больше last_number среди них нет - список пустой
+    held = (await db.execute(
+        select(QueueEntry.queue_number).where(
+            QueueEntry.status.in_(ACTIVE_STATUSES),
+            QueueEntry.queue_number > counter.last_number
+        ).order_by(QueueEntry.queue_number)
+    )).scalars().all()
+
+    number = counter.last_number + 1
+    for held_number in held:
+        if held_number == number:
+            number += 1
+        elif held_number > number:
+            break
+
+    counter.last_number = number
+    counter.last_order_key += 1
+    await db.flush()
+
+    return counter.last_number, counter.last_order_key
+
+async def next_order_key(db: AsyncSession) -> int:
+    """Выдать ключ порядка в конце очереди (для перемещения заявки назад)"""
+    counter = await _lock_counter(db)
+    counter.last_order_key += 1
+    await db.flush()
+    return counter.last_order_key
+
+async def reset_ticket_numbering(db: AsyncSession) -> int:
+    """
+    Перенумеровать активные заявки с 1 одним UPDATE и сдвинуть счетчик
+
+    Returns:
+        Количество перенумерованных заявок
+    """
+    counter = await _lock_counter(db)
+
+    ranked = select(
+        QueueEntry.id,
+        func.row_number().over(order_by=QueueEntry.order_key).label("new_number")
+    ).where(QueueEntry.status.in_(ACTIVE_STATUSES)).subquery()
+
+    result = await db.execute(
+        update(QueueEntry)
+        .where(QueueEntry.id == ranked.c.id)
+        .values(queue_number=ranked.c.new_number)
+        .execution_options(synchronize_session=False)
+    )
+
+    counter.number_date = local_today()
+    counter.last_number = result.rowcount
+    await db.flush()
+
+    return result.rowcount
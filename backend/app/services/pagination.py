@@ -0,0 +1,67 @@
+# app/services/pagination.py
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+@dataclass
+class KeysetPage:
+    items: List
+    next_cursor: Optional[str]
+    total: Optional[int] = None
+
+def encode_cursor(created_at: datetime, entry_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), entry_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Курсор -> (created_at, id); ValueError, если курсор поврежден"""
+    try:
+        created_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(entry_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+async def paginate_by_created(
+    db: AsyncSession,
+    query: Select,
+    model,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = True,
+    with_total: bool = False
+) -> KeysetPage:
+    """
+    Страница заявок по ключу (created_at, id) без OFFSET
+
+    query - выборка колонок с уже примененными фильтрами; в ней должны быть
+    created_at и id модели. Следующая страница начинается строго после
+    последней строки текущей, поэтому новые заявки не сдвигают страницы.
+    total считается отдельным COUNT только по запросу (with_total).
+    """
+    key = tuple_(model.created_at, model.id)
+    page_query = query
+    if cursor:
+        after = tuple_(*decode_cursor(cursor))
+        page_query = page_query.where(key < after if descending else key > after)
+    if descending:
+        page_query = page_query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        page_query = page_query.order_by(model.created_at, model.id)
+
+    # Берем на одну строку больше, чтобы понять, есть ли следующая страница
+    rows = (await db.execute(page_query.limit(limit + 1))).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if len(rows) > limit else None
+
+    total = None
+    if with_total:
+        total = (await db.execute(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )).scalar()
+
+    return KeysetPage(items=items, next_cursor=next_cursor, total=total)
@@ -0,0 +1,154 @@
+# app/services/passwords.py
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, TypeVar
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class PasswordPoolBusy(Exception):
+    """Очередь на bcrypt переполнена - запрос лучше повторить позже"""
+
+class PasswordHashPool:
+    """
+    Отдельный ограниченный пул потоков для bcrypt
+
+    bcrypt намеренно дорогой, поэтому волна логинов не должна занимать общий
+    threadpool, в котором работают sync-роуты. Одновременно считается не больше
+    workers хэшей, ждать может не больше max_queue; остальные получают PasswordPoolBusy.
+    """
+
+    def __init__(self, workers: int, max_queue: int, window: int = 500):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0  # В очереди и в работе
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.waits: Deque[float] = deque(maxlen=window)
+        self.durations: Deque[float] = deque(maxlen=window)
+
+    def _reserve(self):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordPoolBusy()
+            self._pending += 1
+            self.submitted += 1
+
+    def _wrap(self, func: Callable[..., T], *args) -> Callable[[], T]:
+        queued_at = time.perf_counter()
+
+        def job() -> T:
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._pending -= 1
+                    self.completed += 1
+                    self.waits.append(started - queued_at)
+                    self.durations.append(finished - started)
+
+        return job
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Выполнить в пуле из async-кода (event loop не блокируется)"""
+        self._reserve()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._wrap(func, *args))
+
+    def run_sync(self, func: Callable[..., T], *args) -> T:
+        """Выполнить в пуле из sync-кода (sync-роуты, скрипты) и дождаться результата"""
+        self._reserve()
+        return self._executor.submit(self._wrap(func, *args)).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits, durations = sorted(self.waits), sorted(self.durations)
+            pending = self._pending
+
+        def percentile(values, p: float) -> float:
+            if not values:
+                return 0.0
+            return round(values[min(int(len(values) * p), len(values) - 1)] * 1000, 2)
+
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(pending, self.workers),
+            "queued": max(pending - self.workers, 0),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_p50_ms": percentile(waits, 0.5),
+            "wait_p99_ms": percentile(waits, 0.99),
+            "hash_p50_ms": percentile(durations, 0.5),
+            "hash_p99_ms": percentile(durations, 0.99),
+        }
+
+password_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+class LoginThrottle:
+    """
+    Блокировка входа в аккаунт после серии неудачных попыток
+
+    Не больше max_failures ошибок за window секунд. Проверяется до bcrypt,
+    поэтому подбор пароля не тратит CPU. Успешный вход сбрасывает счетчик.
+    """
+
+    def __init__(self, max_failures: int, window: float, max_accounts: int = 10000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_accounts = max_accounts
+        self._failures: dict = {}
+        self.blocked = 0
+
+    def _recent(self, account: str, now: float) -> Deque[float]:
+        failures = self._failures.get(account)
+        if failures is None:
+            return deque()
+        while failures and now - failures[0] > self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[account]
+        return failures
+
+    def retry_after(self, account: str) -> int:
+        """Через сколько секунд можно пробовать снова; 0 - вход разрешен"""
+        now = time.monotonic()
+        failures = self._recent(account, now)
+        if len(failures) < self.max_failures:
+            return 0
+        self.blocked += 1
+        return max(int(self.window - (now - failures[0])) + 1, 1)
+
+    def failure(self, account: str):
+        now = time.monotonic()
+        if account not in self._failures and len(self._failures) >= self.max_accounts:
+            # Чистим аккаунты без свежих ошибок, чтобы словарь не рос бесконечно
+            for key in list(self._failures):
+                self._recent(key, now)
+        self._failures.setdefault(account, deque()).append(now)
+
+    def success(self, account: str):
+        self._failures.pop(account, None)
+
+    def stats(self) -> dict:
+        return {
+            "max_failures": self.max_failures,
+            "window_seconds": self.window,
+            "tracked_accounts": len(self._failures),
+            "blocked_attempts": self.blocked,
+        }
+
+login_throttle = LoginThrottle(settings.LOGIN_MAX_FAILURES, settings.LOGIN_FAILURE_WINDOW_SECONDS)
@@ -0,0 +1,64 @@
+# app/services/positions.py
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.queue import QueueEntry, QueueStatus
+from app.services.versioned_cache import VersionedCache
+
+async def load_waiting_order_keys() -> List[int]:
+    """
+    Отсортированные order_key всех ожидающих заявок
+
+    Покрывается индексом ix_queue_entries_status_order (index-only scan).
+    """
+    async with AsyncSessionLocal() as db:
+        return list((await db.execute(
+            select(QueueEntry.order_key)
+            .where(QueueEntry.status == QueueStatus.WAITING)
+            .order_by(QueueEntry.order_key)
+        )).scalars().all())
+
+# Снимок очереди обновляется при любом изменении заявок (call-next, отмена, move-back...)
+waiting_order_cache: VersionedCache[List[int]] = VersionedCache(
+    load_waiting_order_keys, settings.POSITION_CACHE_TTL_SECONDS
+)
+
+async def get_people_ahead_batch(order_keys: Iterable[int]) -> Dict[int, int]:
+    """Сколько ожидающих стоит перед каждым order_key (бинарный поиск по снимку)"""
+    waiting = await waiting_order_cache.get()
+    return {key: bisect_left(waiting, key) for key in order_keys}
+
+async def get_people_ahead(order_key: int) -> int:
+    return (await get_people_ahead_batch([order_key]))[order_key]
+
+async def load_waiting_order_keys_by_employee() -> Dict[str, List[int]]:
+    """Отсортированные order_key ожидающих заявок каждого сотрудника"""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(QueueEntry.assigned_employee_id, QueueEntry.order_key)
+            .where(
+                QueueEntry.status == QueueStatus.WAITING,
+                QueueEntry.assigned_employee_id.is_not(None)
+            )
+            .order_by(QueueEntry.order_key)
+        )).all()
+
+    by_employee: Dict[str, List[int]] = defaultdict(list)
+    for employee_id, order_key in rows:
+        by_employee[employee_id].append(order_key)
+    return dict(by_employee)
+
+# Личные очереди сотрудников - для оценки ожидания закрепленных заявок
+employee_order_cache: VersionedCache[Dict[str, List[int]]] = VersionedCache(
+    load_waiting_order_keys_by_employee, settings.POSITION_CACHE_TTL_SECONDS
+)
+
+async def get_people_ahead_of_employee(order_key: int, employee_id: str) -> int:
+    """Сколько ожидающих стоит перед order_key в очереди конкретного сотрудника"""
+    waiting = (await employee_order_cache.get()).get(employee_id, [])
+    return bisect_left(waiting, order_key)
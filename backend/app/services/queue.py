@@ -1,235 +1,187 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, select, update
+from typing import Optional, List, Tuple
 from uuid import uuid4
 import logging
-import random
+from app.config import settings
 from app.models.queue import QueueEntry, QueueStatus
 from app.models.user import User, EmployeeStatus
 from app.schemas.queue import QueueCreate, QueueUpdate, QueueStatusResponse, PublicQueueCreate, QueueResponse
-from app.services.archive import enforce_queue_limit, cleanup_old_completed_entries
-from sqlalchemy import text
-import json
+from app.services.archive import QUEUE_LIMIT, get_active_queue_count
+from app.services.announcements import schedule_pregeneration
+from app.services.events import publish_queue_event
+from app.services.numbering import issue_ticket_number
+from app.services.routing import Candidate, route, skill_match_clause
+from app.services.wait_time import estimator
 
 logger = logging.getLogger(__name__)
 
-def select_employee_automatically(db: Session) -> Optional[str]:
+async def get_admission_employee_by_name(db: AsyncSession, full_name: str) -> Optional[User]:
+    """Сотрудник приемной комиссии по имени (для заявок, где имя передано явно)"""
+    return (await db.execute(
+        select(User).where(User.role == "admission", User.full_name == full_name)
+        .order_by(User.created_at).limit(1)
+    )).scalars().first()
+
+async def select_employee_automatically(
+    db: AsyncSession,
+    programs: Optional[List[str]] = None,
+    language: Optional[str] = None
+) -> Optional[User]:
     """
     Автоматически выбирает сотрудника для новой заявки
     
     Алгоритм:
-    1. Находит всех доступных сотрудников (available, busy)
-    2. Считает количество активных заявок у каждого
-    3. Выбирает сотрудника с минимальным количеством заявок
-    4. При равенстве - случайный выбор
+    1. Один запрос: все доступные сотрудники (available, busy) и число их
+       активных заявок (LEFT JOIN + группировка по сотруднику)
+    2. Выбор в routing.route по ROUTING_STRATEGY: навыки (программы, язык),
+       загрузка и средняя длительность приема у сотрудника
     """
     try:
-        # Получаем всех доступных сотрудников (не offline, не paused)
-        available_employees = db.query(User).filter(
-            User.role == "admission",
-            User.status.in_([EmployeeStatus.AVAILABLE.value, EmployeeStatus.BUSY.value])
-        ).all()
+        active_count = func.count(QueueEntry.id)
+        
+        rows = (await db.execute(
+            select(User, active_count.label("active_count")).outerjoin(
+                QueueEntry,
+                and_(
+                    QueueEntry.assigned_employee_id == User.id,
+                    QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+                )
+            ).where(
+                User.role == "admission",
+                User.status.in_([EmployeeStatus.AVAILABLE.value, EmployeeStatus.BUSY.value])
+            ).group_by(User.id)
+        )).all()
         
-        if not available_employees:
+        if not rows:
             logger.warning("No available employees found for auto-assignment")
             return None
         
-        # Считаем количество активных заявок для каждого сотрудника
-        employee_workload = []
-        
-        for employee in available_employees:
-            # Считаем заявки со статусом WAITING и IN_PROGRESS
-            active_count = db.query(QueueEntry).filter(
-                QueueEntry.assigned_employee_name == employee.full_name,
-                QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
-            ).count()
-            
-            employee_workload.append({
-                'employee': employee,
-                'count': active_count
-            })
-            
-            logger.info(f"Employee {employee.full_name}: {active_count} active entries")
-        
-        # Находим минимальное количество заявок
-        min_count = min(emp['count'] for emp in employee_workload)
-        
-        # Находим всех сотрудников с минимальным количеством заявок
-        employees_with_min_count = [
-            emp['employee'] for emp in employee_workload 
-            if emp['count'] == min_count
+        employees = {row.User.id: row.User for row in rows}
+        candidates = [
+            Candidate(row.User.id, row.active_count, row.User.programs or [], row.User.languages or [])
+            for row in rows
         ]
+        # Статистика прогревается при старте; пока ее нет, service_seconds - константа
+        selected = route(candidates, programs or [], language, estimator.service_seconds)
         
-        # Если несколько сотрудников с одинаковым минимумом - выбираем случайно
-        selected_employee = random.choice(employees_with_min_count)
+        logger.info(f"Auto-selected employee: {employees[selected.employee_id].full_name} (workload: {selected.active} entries)")
         
-        logger.info(f"Auto-selected employee: {selected_employee.full_name} (workload: {min_count} entries)")
-        
-        return selected_employee.full_name
+        return employees[selected.employee_id]
         
     except Exception as e:
         logger.error(f"Error in automatic employee selection: {e}")
         return None
 
-def create_queue_entry(db: Session, queue: PublicQueueCreate) -> QueueResponse:
+async def create_queue_entry(db: AsyncSession, queue: PublicQueueCreate) -> QueueResponse:
     """Создать новую заявку с автоматическим распределением сотрудника"""
     try:
         # АВТОМАТИЧЕСКИ ВЫБИРАЕМ СОТРУДНИКА если не указан
-        if not queue.assigned_employee_name:
-            queue.assigned_employee_name = select_employee_automatically(db)
+        employee = None
+        if queue.assigned_employee_name:
+            employee = await get_admission_employee_by_name(db, queue.assigned_employee_name)
+        if not employee:
+            employee = await select_employee_automatically(db, queue.programs, queue.form_language)
             
-            if not queue.assigned_employee_name:
+            if not employee:
                 logger.error("No employees available for assignment")
                 raise Exception("В данный момент нет доступных сотрудников для обработки заявки")
         
-        # Остальная логика остается прежней
-        total_count = db.query(QueueEntry).count()
+        # Лимит считается по активным заявкам: завершенные убирает фоновая очистка (purge_completed_entries)
+        active_count = await get_active_queue_count(db)
         
-        if total_count >= 99:  # Если достигли лимита
-            logger.info(f"Queue limit reached ({total_count}/99). Auto-cleaning old completed entries...")
-            
-            # Удаляем ТОЛЬКО completed заявки (НЕ трогаем WAITING/IN_PROGRESS)
-            completed_entries = db.query(QueueEntry).filter(
-                QueueEntry.status == QueueStatus.COMPLETED
-            ).order_by(QueueEntry.updated_at.asc()).all()  # Сначала самые старые
-            
-            if completed_entries:
-                archived_count = 0
-                for entry in completed_entries:
-                    try:
-                        from app.services.archive import archive_queue_entry
-                        archive_queue_entry(db, entry, reason="auto_cleanup")
-                        db.delete(entry)
-                        archived_count += 1
-                    except Exception as e:
-                        logger.error(f"Error archiving entry {entry.id}: {e}")
-                        continue
-                
-                db.commit()
-                logger.info(f"Auto-cleaned {archived_count} COMPLETED entries")
-                
-                # Перенумеровываем ОСТАВШИЕСЯ заявки (WAITING/IN_PROGRESS/PAUSED)
-                remaining_entries = db.query(QueueEntry).order_by(QueueEntry.created_at.asc()).all()
-                
-                for i, entry in enumerate(remaining_entries, 1):
-                    entry.queue_number = i
-                    db.add(entry)
-                
-                db.commit()
-                logger.info(f"Re-numbered {len(remaining_entries)} remaining entries")
-            else:
-                logger.warning("Queue is full but no COMPLETED entries to clean!")
-                raise Exception("Queue is full and no completed entries available for cleanup")
+        if active_count >= QUEUE_LIMIT:
+            logger.warning(f"Queue limit reached ({active_count}/{QUEUE_LIMIT} active entries)")
+            raise Exception("Queue is full")
         
-        # Получаем следующий номер для новой заявки
-        max_queue_number = db.query(QueueEntry.queue_number).order_by(QueueEntry.queue_number.desc()).first()
-        queue_number = (max_queue_number[0] + 1) if max_queue_number else 1
+        # Получаем следующий номер под блокировкой счетчика (до commit ниже)
+        queue_number, order_key = await issue_ticket_number(db)
         
         # Создаем новую заявку в основной таблице
         db_queue = QueueEntry(
             id=str(uuid4()),
             queue_number=queue_number,
+            order_key=order_key,
             full_name=queue.full_name,
             phone=queue.phone,
             programs=queue.programs,
             status=QueueStatus.WAITING,
             notes=queue.notes,
-            assigned_employee_name=queue.assigned_employee_name,  # Теперь автоматически назначенный
+            assigned_employee_id=employee.id,
+            assigned_employee_name=employee.full_name,  # Имя храним для отображения
             form_language=queue.form_language 
         )
         
         db.add(db_queue)
-        db.flush()  # Чтобы получить ID
+        await db.flush()
+        await db.refresh(db_queue)  # Чтобы получить created_at из базы
         
-        # ОДНОВРЕМЕННО создаем копию в архиве
-        from app.models.archive import ArchivedQueueEntry, ArchiveQueueStatus
+        # Копию в архиве создает триггер sync_queue_entry_archive в той же транзакции
+        await db.commit()
         
-        archived_entry = ArchivedQueueEntry(
-            original_id=db_queue.id,
-            queue_number=db_queue.queue_number,
-            full_name=db_queue.full_name,
-            phone=db_queue.phone,
-            programs=db_queue.programs,
-            status=ArchiveQueueStatus.WAITING,
-            notes=db_queue.notes,
-            assigned_employee_name=db_queue.assigned_employee_name,
-            created_at=db_queue.created_at,
-            updated_at=None,
-            completed_at=None,
-            processing_time=None,
-            form_language=db_queue.form_language,
-            archive_reason="auto_backup"
-        )
+        logger.info(f"Created new queue entry {db_queue.id} with number {queue_number} assigned to {employee.full_name}")
         
-        db.add(archived_entry)
-        db.commit()
-        db.refresh(db_queue)
-        
-        logger.info(f"Created new queue entry {db_queue.id} with number {queue_number} assigned to {queue.assigned_employee_name}")
+        publish_queue_event("queue_created", db_queue)
+        # Озвучиваем заранее, пока заявитель ждет вызова
+        schedule_pregeneration(db_queue.assigned_employee_id)
         
         return db_queue
         
     except Exception as e:
         logger.error(f"Error creating queue entry: {e}")
-        db.rollback()
+        await db.rollback()
         raise
 
-def update_archive_status(db: Session, queue_entry: QueueEntry):
-    """Обновить статус в архиве при изменении в основной таблице"""
-    try:
-        from app.models.archive import ArchivedQueueEntry, ArchiveQueueStatus
-        
-        archived_entry = db.query(ArchivedQueueEntry).filter(
-            ArchivedQueueEntry.original_id == queue_entry.id
-        ).first()
-        
-        if archived_entry:
-            archived_entry.status = ArchiveQueueStatus(queue_entry.status.value)
-            archived_entry.updated_at = queue_entry.updated_at
-            archived_entry.processing_time = queue_entry.processing_time
-            
-            if queue_entry.status == QueueStatus.COMPLETED:
-                archived_entry.completed_at = queue_entry.updated_at
-            
-            db.add(archived_entry)
-            logger.info(f"Updated archive status for entry {queue_entry.id}")
-        
-    except Exception as e:
-        logger.warning(f"Failed to update archive status for {queue_entry.id}: {e}")
-
-def update_queue_entry(db: Session, queue_id: str, queue_update: QueueUpdate) -> QueueResponse:
-    queue_entry = db.query(QueueEntry).filter(QueueEntry.id == queue_id).first()
+async def update_queue_entry(db: AsyncSession, queue_id: str, queue_update: QueueUpdate) -> QueueResponse:
+    queue_entry = await db.get(QueueEntry, queue_id)
     if not queue_entry:
         return None
-    for key, value in queue_update.dict(exclude_unset=True).items():
+    previous_employee_id = queue_entry.assigned_employee_id
+    update_data = queue_update.dict(exclude_unset=True)
+    for key, value in update_data.items():
         setattr(queue_entry, key, value)
     
-    # Обновляем архив тоже
-    update_archive_status(db, queue_entry)
+    # Переназначение по имени - обновляем и ссылку на сотрудника
+    if "assigned_employee_name" in update_data:
+        employee = None
+        if queue_entry.assigned_employee_name:
+            employee = await get_admission_employee_by_name(db, queue_entry.assigned_employee_name)
+        queue_entry.assigned_employee_id = employee.id if employee else None
+    
+    await db.commit()
+    await db.refresh(queue_entry)
     
-    db.commit()
-    db.refresh(queue_entry)
+    publish_queue_event("queue_updated", queue_entry, employee_id=previous_employee_id)
     return queue_entry
 
-def get_all_queue_entries(db: Session, status: Optional[QueueStatus] = None) -> List[QueueResponse]:
-    query = db.query(QueueEntry)
+async def get_all_queue_entries(
+    db: AsyncSession,
+    status: Optional[QueueStatus] = None,
+    limit: Optional[int] = None
+) -> List[QueueResponse]:
+    """Заявки по порядку создания; для больших выборок - paginate_by_created"""
+    query = select(QueueEntry).order_by(QueueEntry.created_at, QueueEntry.id)
     if status:
-        query = query.filter(QueueEntry.status == status)
-    return query.all()
+        query = query.where(QueueEntry.status == status)
+    if limit:
+        query = query.limit(limit)
+    return (await db.execute(query)).scalars().all()
 
-def get_queue_count(db: Session) -> int:
-    query = text("""
-    SELECT COUNT(*) FROM queue_entries 
-    WHERE status::text IN ('waiting', 'in_progress')
-    """)
-    result = db.execute(query).scalar()
-    return result or 0
+async def get_queue_count(db: AsyncSession) -> int:
+    result = await db.execute(
+        select(func.count(QueueEntry.id)).where(
+            QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+        )
+    )
+    return result.scalar() or 0
 
-def get_queue_status(db: Session, phone: str) -> Optional[QueueStatusResponse]:
-    queue_entry = db.query(QueueEntry).filter(
-        QueueEntry.phone == phone,
-        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
-    ).first()
+async def get_queue_status(db: AsyncSession, phone: str) -> Optional[QueueStatusResponse]:
+    queue_entry = (await db.execute(
+        select(QueueEntry).where(
+            QueueEntry.phone == phone,
+            QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+        )
+    )).scalars().first()
     if not queue_entry:
         return None
     return QueueStatusResponse(
@@ -239,33 +191,165 @@ def get_queue_status(db: Session, phone: str) -> Optional[QueueStatusResponse]:
         created_at=queue_entry.created_at
     )
 
-def start_processing_time(db: Session, queue_id: str):
-    """Start processing time for a queue entry"""
-    queue_entry = db.query(QueueEntry).filter(QueueEntry.id == queue_id).first()
-    if not queue_entry:
-        return None
-    
-    queue_entry.status = QueueStatus.IN_PROGRESS
-    queue_entry.updated_at = func.now()
-    db.commit()
-    db.refresh(queue_entry)
-    return queue_entry
+async def _steal_from_busiest_colleague(db: AsyncSession, employee: User) -> Optional[QueueEntry]:
+    """
+    Самая старая ожидающая заявка сотрудника с самой длинной очередью
+
+    Строка блокируется (FOR UPDATE SKIP LOCKED) до commit вызывающей транзакции.
+    У коллег с очередью короче QUEUE_STEAL_MIN_BACKLOG не забираем.
+    При ROUTING_STRATEGY="skills" берем только заявки, которые маршрутизация могла бы
+    дать этому сотруднику (routing.skill_match > 0): самый загруженный коллега - среди
+    тех, у кого такие заявки есть.
+    """
+    waiting = func.count(QueueEntry.id)
+    backlog = select(
+        QueueEntry.assigned_employee_id,
+        waiting.label("waiting"),
+        func.min(QueueEntry.order_key).label("first_order_key")
+    ).where(
+        QueueEntry.status == QueueStatus.WAITING,
+        QueueEntry.assigned_employee_id.is_not(None),
+        QueueEntry.assigned_employee_id != employee.id
+    ).group_by(QueueEntry.assigned_employee_id).having(
+        waiting >= settings.QUEUE_STEAL_MIN_BACKLOG
+    ).subquery()
+
+    query = select(QueueEntry).join(
+        backlog, backlog.c.assigned_employee_id == QueueEntry.assigned_employee_id
+    ).where(QueueEntry.status == QueueStatus.WAITING)
+    if settings.ROUTING_STRATEGY == "skills":
+        candidate = Candidate(employee.id, 0, employee.programs or [], employee.languages or [])
+        query = query.where(skill_match_clause(candidate, QueueEntry.programs, QueueEntry.form_language))
+
+    return (await db.execute(
+        query.order_by(backlog.c.waiting.desc(), backlog.c.first_order_key, QueueEntry.order_key)
+        .limit(1).with_for_update(of=QueueEntry, skip_locked=True)
+    )).scalars().first()
+
+async def claim_next_entry(
+    db: AsyncSession,
+    employee: User,
+    required_status: Optional[str] = None,
+    require_idle: bool = False
+) -> Tuple[Optional[QueueEntry], Optional[str]]:
+    """
+    Взять следующую заявку сотрудника и перевести его в BUSY (без commit)
+
+    Сначала UPDATE users: блокирует строку сотрудника, поэтому двойной клик
+    и повтор запроса выполняются по очереди. required_status - статус, из
+    которого можно вызывать (иначе сотрудник не меняется), require_idle -
+    вызывать, только если у сотрудника нет заявки в работе.
+    Заявка забирается одним UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED):
+    строку, которую уже забирает другая транзакция, пропускаем, а не ждем.
+    В режиме QUEUE_DISPATCH_MODE="steal" при пустой своей очереди заявка
+    забирается у самого загруженного коллеги и переназначается на сотрудника.
+
+    Returns:
+        (заявка в статусе IN_PROGRESS или None, если очередь пуста;
+         id сотрудника, у которого заявка забрана, или None).
+        Вызывающий код делает commit, а при пустой очереди - rollback.
+
+    Raises:
+        ValueError: сотрудник уже не в статусе required_status
+            или (require_idle) уже принимает абитуриента
+    """
+    employee_update = update(User).where(User.id == employee.id)
+    if required_status:
+        employee_update = employee_update.where(User.status == required_status)
+    claimed_employee = (await db.execute(
+        employee_update.values(status=EmployeeStatus.BUSY.value).returning(User)
+        .execution_options(populate_existing=True)
+    )).scalars().first()
+    if claimed_employee is None:
+        raise ValueError(f"Employee {employee.id} is not {required_status}")
+
+    # Строка сотрудника уже заблокирована: параллельный вызов ждет коммита и видит его заявку
+    if require_idle:
+        current_id = (await db.execute(
+            select(QueueEntry.id).where(
+                QueueEntry.status == QueueStatus.IN_PROGRESS,
+                QueueEntry.assigned_employee_id == employee.id
+            ).limit(1)
+        )).scalar()
+        if current_id:
+            raise ValueError(f"Employee {employee.id} is already processing entry {current_id}")
 
-def end_processing_time(db: Session, queue_id: str):
+    next_id = select(QueueEntry.id).where(
+        QueueEntry.status == QueueStatus.WAITING,
+        QueueEntry.assigned_employee_id == employee.id
+    ).order_by(QueueEntry.order_key).limit(1).with_for_update(skip_locked=True).scalar_subquery()
+
+    # updated_at - начало приема, от него end_processing_time считает processing_time
+    claimed = (await db.execute(
+        update(QueueEntry).where(QueueEntry.id == next_id)
+        .values(status=QueueStatus.IN_PROGRESS, updated_at=func.now())
+        .returning(QueueEntry)
+        .execution_options(populate_existing=True)
+    )).scalars().first()
+    if claimed or settings.QUEUE_DISPATCH_MODE != "steal":
+        return claimed, None
+
+    stolen = await _steal_from_busiest_colleague(db, employee)
+    if not stolen:
+        return None, None
+
+    previous_employee_id = stolen.assigned_employee_id
+    stolen.status = QueueStatus.IN_PROGRESS
+    stolen.updated_at = func.now()
+    stolen.assigned_employee_id = employee.id
+    stolen.assigned_employee_name = employee.full_name
+    await db.flush()
+    await db.refresh(stolen)
+
+    logger.info(f"Employee {employee.id} took entry {stolen.id} (#{stolen.queue_number}) from {previous_employee_id}")
+    return stolen, previous_employee_id
+
+async def reassign_waiting_entries(db: AsyncSession, employee: User) -> List[QueueEntry]:
+    """
+    Раздать ожидающие заявки сотрудника другим через select_employee_automatically (без commit)
+
+    Сотрудник переводится в offline, чтобы выбор его не вернул; каждая переназначенная
+    заявка сразу учитывается в загрузке нового сотрудника. Порядок заявок не меняется.
+
+    Raises:
+        ValueError: нет других доступных сотрудников
+    """
+    employee.status = EmployeeStatus.OFFLINE.value
+    await db.flush()
+    entries = (await db.execute(
+        select(QueueEntry).where(
+            QueueEntry.status == QueueStatus.WAITING,
+            QueueEntry.assigned_employee_id == employee.id
+        ).order_by(QueueEntry.order_key).with_for_update()
+    )).scalars().all()
+
+    for entry in entries:
+        new_employee = await select_employee_automatically(db, entry.programs, entry.form_language)
+        if new_employee is None:
+            raise ValueError(f"No employee can take {len(entries)} waiting entries of {employee.id}")
+        entry.assigned_employee_id = new_employee.id
+        entry.assigned_employee_name = new_employee.full_name
+        await db.flush()
+
+    return entries
+
+async def end_processing_time(db: AsyncSession, queue_id: str):
     """End processing time and calculate the duration"""
-    queue_entry = db.query(QueueEntry).filter(QueueEntry.id == queue_id).first()
+    queue_entry = await db.get(QueueEntry, queue_id)
     if not queue_entry:
         return None
     
     # Calculate processing time in seconds
     if queue_entry.updated_at:
         # Получаем текущее время
-        current_time = db.query(func.now()).scalar()
+        current_time = (await db.execute(select(func.now()))).scalar()
         # Вычисляем разницу в секундах
         processing_time = int((current_time - queue_entry.updated_at).total_seconds())
         queue_entry.processing_time = processing_time
     
     queue_entry.status = QueueStatus.COMPLETED
-    db.commit()
-    db.refresh(queue_entry)
+    await db.commit()
+    await db.refresh(queue_entry)
+    
+    estimator.observe(queue_entry.processing_time, queue_entry.assigned_employee_id, queue_entry.programs)
     return queue_entry
\ No newline at end of file
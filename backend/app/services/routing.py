@@ -0,0 +1,95 @@
+# app/services/routing.py
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Sequence
+
+from sqlalchemy import and_, false, func, or_, true
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = "ru"  # Заявки без form_language озвучиваются по-русски
+
+@dataclass
+class Candidate:
+    employee_id: str
+    active: int  # WAITING + IN_PROGRESS у сотрудника сейчас
+    programs: Sequence[str] = field(default_factory=list)
+    languages: Sequence[str] = field(default_factory=list)
+
+def skill_match(candidate: Candidate, programs: Sequence[str], language: Optional[str]) -> float:
+    """
+    Насколько сотрудник подходит заявке: 0 - не подходит, 1 - специалист по всем ее программам
+
+    Язык - обязательное условие, если у сотрудника языки указаны.
+    Пустой список программ у сотрудника (или у заявки) - ROUTING_GENERALIST_MATCH.
+    """
+    if candidate.languages and (language or DEFAULT_LANGUAGE) not in candidate.languages:
+        return 0.0
+    if not candidate.programs or not programs:
+        return settings.ROUTING_GENERALIST_MATCH
+    covered = sum(1 for program in programs if program in candidate.programs)
+    return covered / len(programs)
+
+def skill_match_clause(candidate: Candidate, programs: ColumnElement, language: ColumnElement) -> ColumnElement:
+    """
+    SQL-условие skill_match(candidate, programs, language) > 0 для столбцов заявки
+
+    programs - JSONB-массив кодов, language - form_language (NULL - DEFAULT_LANGUAGE).
+    """
+    conditions = []
+    if candidate.languages:
+        conditions.append(func.coalesce(language, DEFAULT_LANGUAGE).in_(list(candidate.languages)))
+    generalist = settings.ROUTING_GENERALIST_MATCH > 0
+    if not candidate.programs:
+        conditions.append(true() if generalist else false())
+    elif generalist:
+        # programs ?| array[коды] - хотя бы одна программа сотрудника (GIN-индекс)
+        conditions.append(or_(func.jsonb_array_length(programs) == 0, programs.has_any(array(list(candidate.programs)))))
+    else:
+        conditions.append(programs.has_any(array(list(candidate.programs))))
+    return and_(*conditions)
+
+def route(
+    candidates: Sequence[Candidate],
+    programs: Sequence[str],
+    language: Optional[str],
+    service_seconds: Callable[[str, Sequence[str]], float],
+    strategy: Optional[str] = None
+) -> Optional[Candidate]:
+    """
+    Выбрать сотрудника для новой заявки
+
+    least_loaded (по умолчанию) - меньше всего активных заявок, как было до навыков.
+    skills - минимум ожидаемого времени до приема: (активные + 1) * средний прием
+    сотрудника по этим программам, со штрафом ROUTING_SKILL_WEIGHT за неполное
+    совпадение навыков. Если не подходит никто, выбираем среди всех без учета навыков.
+    При равенстве - случайный выбор, чтобы не нагружать одного сотрудника.
+    """
+    if not candidates:
+        return None
+
+    strategy = strategy or settings.ROUTING_STRATEGY
+    if strategy == "least_loaded":
+        scored = [(candidate.active, candidate) for candidate in candidates]
+    else:
+        matching = [(skill_match(candidate, programs, language), candidate) for candidate in candidates]
+        matching = [(match, candidate) for match, candidate in matching if match > 0]
+        if not matching:
+            logger.info(f"No employee matches programs={list(programs)} language={language}, routing by workload only")
+            matching = [(1.0, candidate) for candidate in candidates]
+        scored = [
+            (
+                (candidate.active + 1) * service_seconds(candidate.employee_id, programs)
+                * (1 + settings.ROUTING_SKILL_WEIGHT * (1 - match)),
+                candidate
+            )
+            for match, candidate in matching
+        ]
+
+    best = min(score for score, _ in scored)
+    return random.choice([candidate for score, candidate in scored if score == best])
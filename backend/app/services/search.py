@@ -0,0 +1,217 @@
+# app/services/search.py
+import heapq
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, literal, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.archive import ArchivedQueueEntry
+from app.models.queue import QueueEntry
+from app.normalization import normalize_name, normalize_phone
+from app.services.versioned_cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+MIN_PHONE_DIGITS = 4  # Короче - скорее часть ФИО/номера талона, чем телефон
+
+@dataclass
+class SearchHit:
+    id: str
+    source: str  # queue | archive
+    queue_number: int
+    full_name: str
+    phone: str
+    status: str
+    assigned_employee_name: Optional[str]
+    created_at: datetime
+    score: float
+    original_id: Optional[str] = None  # Для архива - id заявки в очереди
+
+def trigrams(value: str) -> Set[str]:
+    """Триграммы как в pg_trgm: каждое слово дополняется двумя пробелами слева и одним справа"""
+    result = set()
+    for word in value.split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+def parse_query(query: str) -> Tuple[str, str]:
+    """Запрос -> (нормализованное ФИО, цифры телефона); заполнено одно из двух"""
+    if not re.search(r"[^\d\s()+\-]", query) and len(re.sub(r"\D", "", query)) >= MIN_PHONE_DIGITS:
+        return "", normalize_phone(query)
+    return normalize_name(query), ""
+
+def phone_score(digits: str, phone_digits: Optional[str]) -> float:
+    if not phone_digits or digits not in phone_digits:
+        return 0.0
+    if phone_digits == digits:
+        return 1.0
+    # Чаще всего вводят последние цифры номера
+    return 0.9 if phone_digits.endswith(digits) else 0.7
+
+def name_score(name: str, name_trigrams: Set[str], search_name: Optional[str], shared: Optional[int] = None) -> float:
+    """
+    Доля триграмм запроса, найденных в ФИО (аналог word_similarity из pg_trgm)
+
+    Опечатка в одной букве теряет 2-3 триграммы, а не весь результат.
+    Точное совпадение и вхождение целиком поднимаются наверх.
+    """
+    if not search_name or not name_trigrams:
+        return 0.0
+    if search_name == name:
+        return 1.0
+    if f" {name} " in f" {search_name} ":
+        return 0.97
+    if name in search_name:
+        return 0.95
+    if shared is None:
+        shared = len(name_trigrams & trigrams(search_name))
+    return round(0.9 * shared / len(name_trigrams), 3)
+
+class LiveSearchIndex:
+    """Инвертированный индекс триграмм по заявкам в очереди (строится из снимка таблицы)"""
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.postings: Dict[str, List[int]] = {}
+        for position, row in enumerate(rows):
+            for trigram in trigrams(row.search_name or ""):
+                self.postings.setdefault(trigram, []).append(position)
+
+    def search(self, name: str, digits: str, limit: int) -> List[SearchHit]:
+        scored: List[Tuple[float, int]] = []
+        if name:
+            name_trigrams = trigrams(name)
+            # Считаем общие триграммы только у заявок, где есть хоть одна
+            shared = Counter()
+            for trigram in name_trigrams:
+                shared.update(self.postings.get(trigram, ()))
+            for position, count in shared.items():
+                score = name_score(name, name_trigrams, self.rows[position].search_name, count)
+                if score >= settings.SEARCH_MIN_SCORE:
+                    scored.append((score, position))
+        elif digits:
+            for position, row in enumerate(self.rows):
+                score = phone_score(digits, row.phone_digits)
+                if score:
+                    scored.append((score, position))
+
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], self.rows[item[1]].created_at))
+        return [_hit(self.rows[position], "queue", score) for score, position in best]
+
+def _hit(row, source: str, score: float) -> SearchHit:
+    return SearchHit(
+        id=row.id,
+        source=source,
+        queue_number=row.queue_number,
+        full_name=row.full_name,
+        phone=row.phone,
+        status=row.status.value,
+        assigned_employee_name=row.assigned_employee_name,
+        created_at=row.created_at,
+        score=score,
+        original_id=getattr(row, "original_id", None)
+    )
+
+def _columns(model) -> list:
+    return [
+        model.id, model.queue_number, model.full_name, model.phone, model.status,
+        model.assigned_employee_name, model.created_at, model.search_name, model.phone_digits
+    ]
+
+async def load_live_search_index() -> LiveSearchIndex:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(*_columns(QueueEntry)))).all()
+    return LiveSearchIndex(rows)
+
+# Индекс пересобирается после любого изменения очереди (версия состояния из events)
+live_search_cache: VersionedCache[LiveSearchIndex] = VersionedCache(
+    load_live_search_index, settings.SEARCH_INDEX_TTL_SECONDS
+)
+
+# Установлен ли pg_trgm (проверяется один раз)
+_trgm_available: Optional[bool] = None
+
+async def trgm_available(db: AsyncSession) -> bool:
+    global _trgm_available
+    if _trgm_available is None:
+        _trgm_available = bool((await db.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        )).scalar())
+        if not _trgm_available:
+            logger.warning("pg_trgm is not installed: archive search uses plain substring matching")
+    return _trgm_available
+
+async def search_archive(db: AsyncSession, name: str, digits: str, limit: int) -> List[SearchHit]:
+    """
+    Кандидаты из архива запросом к базе, ранжирование - тем же name_score, что и для очереди
+
+    Кандидатов не больше SEARCH_CANDIDATE_LIMIT, запрос ограничен SEARCH_TIMEOUT_MS.
+    """
+    model = ArchivedQueueEntry
+    query = select(*_columns(model), model.original_id)
+    if name:
+        if await trgm_available(db):
+            # q <% search_name: похожесть на слово из ФИО (опечатки), GIN gin_trgm_ops
+            query = query.where(literal(name).op("<%")(model.search_name)).order_by(
+                func.word_similarity(name, model.search_name).desc()
+            )
+        else:
+            query = query.where(
+                *[model.search_name.contains(token, autoescape=True) for token in name.split()]
+            ).order_by(model.created_at.desc())
+    else:
+        query = query.where(model.phone_digits.contains(digits, autoescape=True)).order_by(model.created_at.desc())
+
+    try:
+        # SET LOCAL действует до конца текущей транзакции (сессия запроса ее откатит)
+        await db.execute(text(f"SET LOCAL statement_timeout = {int(settings.SEARCH_TIMEOUT_MS)}"))
+        rows = (await db.execute(query.limit(settings.SEARCH_CANDIDATE_LIMIT))).all()
+    except DBAPIError as e:
+        await db.rollback()
+        logger.warning(f"Archive search timed out or failed: {e}")
+        raise TimeoutError("archive search") from e
+
+    name_trigrams = trigrams(name)
+    scored = []
+    for row in rows:
+        score = name_score(name, name_trigrams, row.search_name) if name else phone_score(digits, row.phone_digits)
+        if score >= settings.SEARCH_MIN_SCORE:
+            scored.append((score, row))
+    best = heapq.nlargest(limit, scored, key=lambda item: (item[0], item[1].created_at))
+    return [_hit(row, "archive", score) for score, row in best]
+
+async def search_entries(db: AsyncSession, query: str, source: str = "all", limit: int = 20) -> Tuple[List[SearchHit], bool]:
+    """
+    Поиск заявок по ФИО или телефону: очередь - в памяти, архив - в базе
+
+    Returns:
+        (результаты по убыванию score, partial - архив не успел ответить)
+    """
+    name, digits = parse_query(query)
+    if not name and not digits:
+        return [], False
+
+    hits: List[SearchHit] = []
+    partial = False
+    if source in ("all", "queue"):
+        hits += (await live_search_cache.get()).search(name, digits, limit)
+    if source in ("all", "archive"):
+        try:
+            archived = await search_archive(db, name, digits, limit)
+        except TimeoutError:
+            archived, partial = [], True
+        # Архив содержит и текущие заявки - показываем их один раз, из очереди
+        live_ids = {hit.id for hit in hits}
+        hits += [hit for hit in archived if hit.original_id not in live_ids]
+
+    hits.sort(key=lambda hit: (hit.score, hit.created_at), reverse=True)
+    return hits[:limit], partial
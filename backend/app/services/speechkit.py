@@ -1,6 +1,10 @@
-import httpx
+import asyncio
 import base64
+import time
+from typing import Dict, Optional, Tuple
 from app.config import settings
+from app.services.audio_cache import CachedAudio, announcement_key, audio_cache
+from app.services.http_client import OutboundHTTPClient, get_http_client
 
 # Голоса для разных языков в Google Cloud TTS
 VOICE_CONFIG = {
@@ -38,143 +42,220 @@ ANNOUNCEMENT_TEMPLATES = {
     'en': "Ticket number {queue_number}, please proceed to desk {desk}"
 }
 
+KAZAKH_RETRY_SECONDS = 600  # Если ни один казахский голос не ответил - не пробуем их 10 минут
+
+# Казахский голос, который последним сработал - пробуем его первым
+_kazakh_voice: Optional[dict] = None
+_kazakh_unavailable_until = 0.0
+
+# Синтез, который уже идет (call-next и предгенерация не дублируют запрос)
+_inflight: Dict[str, asyncio.Task] = {}
+
+AUDIO_URL_TEMPLATE = "/api/public/audio/{audio_id}"
+
+def _speech_result(success: bool, text: str, language: str, audio_id: Optional[str] = None, error: Optional[str] = None) -> dict:
+    """Ответ об объявлении: сам mp3 отдается отдельно через /public/audio/{audio_id}"""
+    return {
+        'success': success,
+        'audio_id': audio_id if success else None,
+        'audio_url': AUDIO_URL_TEMPLATE.format(audio_id=audio_id) if success else None,
+        'text': text,
+        'language': language,
+        'error': error
+    }
+
+async def _request_tts(http: OutboundHTTPClient, text: str, language_code: str, name: str, gender: str) -> bytes:
+    """Один запрос к Google TTS, возвращает mp3 или бросает исключение"""
+    request_data = {
+        "input": {"text": text},
+        "voice": {
+            "languageCode": language_code,
+            "name": name,
+            "ssmlGender": gender
+        },
+        "audioConfig": {
+            "audioEncoding": "MP3",
+            "speakingRate": 1.0
+        }
+    }
+    response = await http.post(
+        settings.GOOGLE_TTS_URL,
+        params={"key": settings.GOOGLE_TTS_API_KEY},
+        json=request_data,
+        timeout=30.0
+    )
+    print(f"📡 Ответ Google для {name}: {response.status_code}")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"Google API Error: {response.status_code}")
+
+    return base64.b64decode(response.json().get('audioContent', ''))
+
+async def _synthesize_kazakh(http: OutboundHTTPClient, text: str) -> Optional[bytes]:
+    """Перебрать казахские голоса, начиная с последнего рабочего"""
+    global _kazakh_voice, _kazakh_unavailable_until
+
+    if time.monotonic() < _kazakh_unavailable_until:
+        print("⏭️ Казахские голоса недавно не работали, сразу используем русский")
+        return None
+
+    voices = list(KAZAKH_FALLBACK_VOICES)
+    if _kazakh_voice in voices:
+        voices.remove(_kazakh_voice)
+        voices.insert(0, _kazakh_voice)
+
+    for voice_option in voices:
+        print(f"🔄 Пробуем казахский голос: {voice_option['name']}")
+        try:
+            audio = await _request_tts(http, text, 'kk-KZ', voice_option['name'], voice_option['gender'])
+        except Exception as e:
+            print(f"❌ Голос {voice_option['name']} не работает: {e}")
+            if voice_option is _kazakh_voice:
+                _kazakh_voice = None
+            continue
+
+        print(f"✅ Казахский голос {voice_option['name']} работает! Размер: {len(audio)} байт")
+        _kazakh_voice = voice_option
+        return audio
+
+    _kazakh_unavailable_until = time.monotonic() + KAZAKH_RETRY_SECONDS
+    return None
+
+async def _synthesize(http: OutboundHTTPClient, audio_id: str, text: str, language: str) -> CachedAudio:
+    """Сгенерировать объявление и положить в кэш"""
+    if language == 'kk':
+        audio = await _synthesize_kazakh(http, text)
+        if audio:
+            item = CachedAudio(audio_id=audio_id, audio=audio, text=text, language='kk')
+            await audio_cache.put(item)
+            return item
+
+        # Если ни один казахский голос не работает
+        print("❌ Все казахские голоса не работают, используем русский")
+        spoken_language = 'ru'
+    else:
+        spoken_language = language
+
+    voice_config = VOICE_CONFIG[spoken_language]
+    print(f"🚀 Отправляем в Google TTS...")
+    audio = await _request_tts(
+        http, text,
+        voice_config['languageCode'], voice_config['name'], voice_config['ssmlGender']
+    )
+    print(f"✅ Google TTS успех! Размер: {len(audio)} байт")
+
+    # Русский вместо казахского держим только в памяти и только пока казахские
+    # голоса не пробуем снова - потом этот талон опять озвучиваем по-казахски
+    fallback = spoken_language != language
+    item = CachedAudio(
+        audio_id=audio_id, audio=audio, text=text, language=spoken_language,
+        expires_at=time.monotonic() + KAZAKH_RETRY_SECONDS if fallback else None
+    )
+    await audio_cache.put(item, persist=not fallback)
+    return item
+
+def _announcement_text(queue_number: int, full_name: str, desk: str, language: str) -> Tuple[str, str]:
+    """(язык, текст) объявления; неизвестный язык озвучиваем по-русски"""
+    if language not in VOICE_CONFIG:
+        language = 'ru'
+    template = ANNOUNCEMENT_TEMPLATES.get(language, ANNOUNCEMENT_TEMPLATES['ru'])
+    return language, template.format(
+        queue_number=queue_number,
+        full_name=full_name,
+        desk=desk
+    )
+
+def _log_synthesis_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        print(f"💥 Google TTS exception: {task.exception()}")
+
+def _start_synthesis(http: OutboundHTTPClient, audio_id: str, text: str, language: str) -> asyncio.Task:
+    """Запустить синтез или вернуть уже идущий для этого объявления"""
+    task = _inflight.get(audio_id)
+    if task is None:
+        task = asyncio.create_task(_synthesize(http, audio_id, text, language))
+        _inflight[audio_id] = task
+        task.add_done_callback(lambda _: _inflight.pop(audio_id, None))
+        task.add_done_callback(_log_synthesis_error)
+    return task
+
 async def generate_speech(
     queue_number: int,
     full_name: str,
     desk: str,
-    language: str = 'ru'
+    language: str = 'ru',
+    http: Optional[OutboundHTTPClient] = None
 ) -> dict:
     """
-    Генерирует речь через Google Cloud Text-to-Speech
+    Возвращает объявление из кэша или генерирует через Google Cloud Text-to-Speech
+
+    Ждет окончания синтеза. Кэш ключуется по (язык, номер, стол) - повторный вызов
+    того же талона и талоны, озвученные заранее (см. services/announcements.py),
+    не ходят в Google.
     """
+    text = ''
     try:
         print(f"🎤 Google TTS: номер {queue_number}, {full_name}, стол {desk}, язык {language}")
         
-        if not settings.GOOGLE_TTS_API_KEY:
-            return {
-                'success': False,
-                'audio_base64': None,
-                'text': '',
-                'language': language,
-                'error': 'Google API ключ не настроен'
-            }
-        
-        # Определяем язык
-        if language not in VOICE_CONFIG:
-            language = 'ru'
-        
-        # Формируем текст
-        template = ANNOUNCEMENT_TEMPLATES.get(language, ANNOUNCEMENT_TEMPLATES['ru'])
-        text = template.format(
-            queue_number=queue_number,
-            full_name=full_name,
-            desk=desk
-        )
-        
+        language, text = _announcement_text(queue_number, full_name, desk, language)
         print(f"📝 Текст: {text}")
         
-        # URL с API ключом
-        url = f"https://texttospeech.googleapis.com/v1/text:synthesize?key={settings.GOOGLE_TTS_API_KEY}"
-        
-        # Для казахского пробуем разные голоса
-        if language == 'kk':
-            for voice_option in KAZAKH_FALLBACK_VOICES:
-                print(f"🔄 Пробуем казахский голос: {voice_option['name']}")
-                
-                request_data = {
-                    "input": {"text": text},
-                    "voice": {
-                        "languageCode": 'kk-KZ',
-                        "name": voice_option['name'],
-                        "ssmlGender": voice_option['gender']
-                    },
-                    "audioConfig": {
-                        "audioEncoding": "MP3",
-                        "speakingRate": 1.0
-                    }
-                }
-                
-                try:
-                    async with httpx.AsyncClient() as client:
-                        response = await client.post(url, json=request_data, timeout=30.0)
-                    
-                    print(f"📡 Ответ Google для {voice_option['name']}: {response.status_code}")
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        audio_base64 = result.get('audioContent', '')
-                        print(f"✅ Казахский голос {voice_option['name']} работает! Размер: {len(audio_base64)} символов")
-                        
-                        return {
-                            'success': True,
-                            'audio_base64': audio_base64,
-                            'text': text,
-                            'language': language,
-                            'error': None
-                        }
-                    else:
-                        print(f"❌ Голос {voice_option['name']} не работает: {response.status_code}")
-                        
-                except Exception as e:
-                    print(f"💥 Ошибка с голосом {voice_option['name']}: {e}")
-                    continue
-            
-            # Если ни один казахский голос не работает
-            print("❌ Все казахские голоса не работают, используем русский")
-            language = 'ru'
-        
-        # Обычная генерация для других языков или fallback
-        voice_config = VOICE_CONFIG[language]
-        request_data = {
-            "input": {"text": text},
-            "voice": {
-                "languageCode": voice_config['languageCode'],
-                "name": voice_config['name'],
-                "ssmlGender": voice_config['ssmlGender']
-            },
-            "audioConfig": {
-                "audioEncoding": "MP3",
-                "speakingRate": 1.0
-            }
-        }
-        
-        print(f"🚀 Отправляем в Google TTS...")
+        audio_id = announcement_key(language, queue_number, desk)
+        cached = await audio_cache.get(audio_id, text=text, language=language)
+        if cached:
+            print(f"💾 Объявление из кэша: {audio_id}")
+            return _speech_result(True, cached.text, cached.language, audio_id=audio_id)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=request_data, timeout=30.0)
-        
-        print(f"📡 Ответ Google: {response.status_code}")
+        if not settings.GOOGLE_TTS_API_KEY:
+            return _speech_result(False, '', language, error='Google API ключ не настроен')
         
-        if response.status_code == 200:
-            result = response.json()
-            audio_base64 = result.get('audioContent', '')
-            
-            print(f"✅ Google TTS успех! Размер: {len(audio_base64)} символов")
-            
-            return {
-                'success': True,
-                'audio_base64': audio_base64,
-                'text': text,
-                'language': language,
-                'error': None
-            }
-        else:
-            error_text = response.text
-            print(f"❌ Google TTS ошибка: {response.status_code} - {error_text}")
-            return {
-                'success': False,
-                'audio_base64': None,
-                'text': text,
-                'language': language,
-                'error': f"Google API Error: {response.status_code}"
-            }
+        # shield - отмена одного ожидающего не прерывает синтез для остальных
+        item = await asyncio.shield(_start_synthesis(http or get_http_client(), audio_id, text, language))
+        return _speech_result(True, item.text, item.language, audio_id=audio_id)
             
     except Exception as e:
         print(f"💥 Google TTS exception: {e}")
-        return {
-            'success': False,
-            'audio_base64': None,
-            'text': text if 'text' in locals() else '',
-            'language': language,
-            'error': str(e)
-        }
\ No newline at end of file
+        return _speech_result(False, text, language, error=str(e))
+
+async def request_speech(
+    queue_number: int,
+    full_name: str,
+    desk: str,
+    language: str = 'ru',
+    http: Optional[OutboundHTTPClient] = None
+) -> dict:
+    """
+    То же, что generate_speech, но не ждет синтеза
+
+    Возвращает audio_id сразу; если объявления еще нет в кэше, синтез идет в фоне,
+    а /public/audio/{audio_id} дождется его окончания.
+    """
+    language, text = _announcement_text(queue_number, full_name, desk, language)
+    audio_id = announcement_key(language, queue_number, desk)
+
+    cached = await audio_cache.get(audio_id, text=text, language=language)
+    if cached:
+        print(f"💾 Объявление из кэша: {audio_id}")
+        return _speech_result(True, cached.text, cached.language, audio_id=audio_id)
+
+    if not settings.GOOGLE_TTS_API_KEY:
+        return _speech_result(False, '', language, error='Google API ключ не настроен')
+
+    print(f"🚀 Объявление {audio_id} генерируется в фоне")
+    _start_synthesis(http or get_http_client(), audio_id, text, language)
+    return _speech_result(True, text, language, audio_id=audio_id)
+
+async def get_announcement_audio(audio_id: str) -> Optional[CachedAudio]:
+    """mp3 объявления из кэша; если синтез еще идет - дождаться его"""
+    cached = await audio_cache.get(audio_id)
+    if cached:
+        return cached
+
+    task = _inflight.get(audio_id)
+    if task is None:
+        return None
+
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        return None
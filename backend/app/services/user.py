@@ -25,6 +25,11 @@ def create_user(db: Session, user: UserCreate | AdminUserCreate, role: str = "ap
     if hasattr(user, 'desk') and user.desk is not None:
         user_data["desk"] = user.desk
     
+    # Профиль для автоназначения (только у сотрудников приемной комиссии)
+    for skill in ("programs", "languages"):
+        if getattr(user, skill, None):
+            user_data[skill] = getattr(user, skill)
+    
     # Создаем объект пользователя с использованием словаря
     db_user = User(**user_data)
     
@@ -0,0 +1,85 @@
+# app/services/user_cache.py
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+
+_COLUMNS = [column.key for column in User.__table__.columns]
+
+class UserPrincipalCache:
+    """
+    Пользователь по (user_id, токен) для get_current_user без SELECT users
+
+    Хранятся значения колонок, а не объект сессии: каждый запрос получает
+    свою копию и может менять ее (статус сотрудника) в своей сессии.
+    Любое изменение пользователя должно вызывать invalidate(user_id),
+    TTL - страховка на изменения в обход приложения.
+    """
+
+    def __init__(self, ttl_seconds: float, max_items: int):
+        self.ttl = ttl_seconds
+        self.max_items = max_items
+        # (user_id, токен) -> (когда истекает, значения колонок)
+        self._items: "OrderedDict[Tuple[str, str], Tuple[float, dict]]" = OrderedDict()
+        # Счетчик изменений пользователя: загрузка, начатая до invalidate, не попадет в кэш
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    def get(self, user_id: str, token: str) -> Optional[User]:
+        """Отсоединенный (detached) User или None; в сессию его добавляет db.merge(load=False)"""
+        key = (user_id, token)
+        cached = self._items.get(key)
+        if cached is None or cached[0] <= time.monotonic():
+            if cached is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        user = User(**cached[1])
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, token: str, user: User, generation: int):
+        if self.ttl <= 0 or self.generation(user.id) != generation:
+            return
+        key = (user.id, token)
+        self._items[key] = (time.monotonic() + self.ttl, {name: getattr(user, name) for name in _COLUMNS})
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        """Забыть пользователя во всех токенах (изменение статуса, данных, удаление)"""
+        self._generations[user_id] = self.generation(user_id) + 1
+        for key in [key for key in self._items if key[0] == user_id]:
+            del self._items[key]
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self._items),
+            "max_items": self.max_items,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+user_cache = UserPrincipalCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_ITEMS)
+
+def invalidate_user(user_id: Optional[str]):
+    if user_id:
+        user_cache.invalidate(user_id)
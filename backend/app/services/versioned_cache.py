@@ -0,0 +1,43 @@
+# app/services/versioned_cache.py
+import asyncio
+import time
+from typing import Awaitable, Callable, Generic, Optional, Tuple, TypeVar
+
+from app.services.events import get_state_version
+
+T = TypeVar("T")
+
+class VersionedCache(Generic[T]):
+    """
+    Значение, посчитанное из базы, пока версия состояния очереди не изменилась
+
+    Версию поднимают publish_*_event при каждом изменении заявок и сотрудников.
+    TTL - страховка на случай изменений в обход событий (скрипты, другой процесс).
+    Одновременные промахи ждут одну загрузку из базы.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[T]], ttl_seconds: float):
+        self._loader = loader
+        self._ttl = ttl_seconds
+        # (версия, время загрузки, значение)
+        self._entry: Optional[Tuple[int, float, T]] = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self, version: int) -> bool:
+        return (
+            self._entry is not None
+            and self._entry[0] == version
+            and time.monotonic() - self._entry[1] < self._ttl
+        )
+
+    async def get(self) -> T:
+        if self._fresh(get_state_version()):
+            return self._entry[2]
+
+        async with self._lock:
+            # Версию берем до запроса: если очередь изменится во время загрузки,
+            # следующий вызов загрузит данные заново
+            version = get_state_version()
+            if not self._fresh(version):
+                self._entry = (version, time.monotonic(), await self._loader())
+            return self._entry[2]
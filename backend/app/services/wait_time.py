@@ -0,0 +1,207 @@
+# app/services/wait_time.py
+import asyncio
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.archive import ArchivedQueueEntry, ArchiveQueueStatus
+from app.models.user import User, EmployeeStatus
+from app.services.positions import get_people_ahead, get_people_ahead_of_employee
+from app.services.versioned_cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+MAX_SERVICE_SECONDS = 2 * 60 * 60  # Дольше - забытая заявка, а не реальный прием
+
+class Ewma:
+    """Экспоненциально сглаженное среднее времени приема (секунды)"""
+
+    __slots__ = ("value", "samples")
+
+    def __init__(self):
+        self.value: Optional[float] = None
+        self.samples = 0
+
+    def add(self, seconds: float, alpha: float):
+        self.value = seconds if self.value is None else alpha * seconds + (1 - alpha) * self.value
+        self.samples += 1
+
+async def load_completed_services(limit: int) -> list:
+    """Последние завершенные приемы (сотрудник, программы, длительность), новые первыми"""
+    # Архив содержит и текущие заявки (триггер), поэтому читаем только его
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(
+                ArchivedQueueEntry.assigned_employee_id, ArchivedQueueEntry.programs,
+                ArchivedQueueEntry.processing_time
+            ).where(
+                ArchivedQueueEntry.status == ArchiveQueueStatus.COMPLETED,
+                ArchivedQueueEntry.processing_time > 0
+            ).order_by(
+                func.coalesce(ArchivedQueueEntry.completed_at, ArchivedQueueEntry.archived_at).desc()
+            ).limit(limit)
+        )).all()
+
+class WaitTimeEstimator:
+    """
+    Скользящая статистика времени приема: сотрудник по программе, сотрудник,
+    программа и в целом
+
+    Обновляется при каждом завершении приема (end_processing_time),
+    при первом обращении прогревается последними завершенными приемами из архива.
+    """
+
+    def __init__(self, alpha: float, min_samples: int, default_minutes: float):
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.default_seconds = default_minutes * 60
+        self.overall = Ewma()
+        self.by_employee: Dict[str, Ewma] = {}
+        self.by_program: Dict[str, Ewma] = {}
+        self.by_employee_program: Dict[Tuple[str, str], Ewma] = {}
+        self._warmed = False
+        self._warm_lock = asyncio.Lock()
+
+    def observe(self, seconds: Optional[int], employee_id: Optional[str] = None, programs: Iterable[str] = ()):
+        """Учесть завершенный прием"""
+        # До прогрева не считаем: прогрев сам прочитает этот прием из базы
+        if not self._warmed:
+            return
+        if not seconds or seconds <= 0 or seconds > MAX_SERVICE_SECONDS:
+            return
+        self.overall.add(seconds, self.alpha)
+        if employee_id:
+            self.by_employee.setdefault(employee_id, Ewma()).add(seconds, self.alpha)
+        for program in programs or ():
+            self.by_program.setdefault(program, Ewma()).add(seconds, self.alpha)
+            if employee_id:
+                self.by_employee_program.setdefault((employee_id, program), Ewma()).add(seconds, self.alpha)
+
+    def _reliable(self, stats: Optional[Ewma]) -> Optional[float]:
+        return stats.value if stats and stats.samples >= self.min_samples else None
+
+    def _program_average(self, stats: Iterable[Optional[Ewma]]) -> Optional[float]:
+        values: List[float] = [value for value in map(self._reliable, stats) if value is not None]
+        return sum(values) / len(values) if values else None
+
+    def service_seconds(self, employee_id: Optional[str] = None, programs: Iterable[str] = ()) -> float:
+        """
+        Ожидаемая длительность одного приема
+
+        Приоритет: сотрудник по этим программам -> программы с поправкой на скорость
+        сотрудника (его среднее к общему) -> программы -> сотрудник -> общее -> константа.
+        """
+        programs = list(programs or ())
+
+        if employee_id:
+            own = self._program_average(self.by_employee_program.get((employee_id, p)) for p in programs)
+            if own is not None:
+                return own
+
+        employee = self._reliable(self.by_employee.get(employee_id)) if employee_id else None
+        overall = self._reliable(self.overall)
+
+        program = self._program_average(self.by_program.get(p) for p in programs)
+        if program is not None:
+            if employee is not None and overall:
+                return program * employee / overall
+            return program
+
+        if employee is not None:
+            return employee
+        if overall is not None:
+            return overall
+        return self.default_seconds
+
+    def estimate_minutes(
+        self,
+        people_ahead: int,
+        active_desks: int,
+        employee_id: Optional[str] = None,
+        programs: Iterable[str] = ()
+    ) -> int:
+        """Ожидание в минутах: люди впереди обслуживаются параллельно active_desks столами"""
+        if people_ahead <= 0:
+            return 0
+        seconds = people_ahead * self.service_seconds(employee_id, programs) / max(active_desks, 1)
+        return math.ceil(seconds / 60)
+
+    async def warm_up(self):
+        """Прогреть статистику последними WAIT_TIME_WARMUP_ROWS завершенными приемами"""
+        if self._warmed:
+            return
+        async with self._warm_lock:
+            if self._warmed:
+                return
+
+            # Без статистики оценка и маршрутизация берут WAIT_TIME_DEFAULT_MINUTES,
+            # а следующий вызов попробует прогреться снова
+            try:
+                rows = await load_completed_services(settings.WAIT_TIME_WARMUP_ROWS)
+            except Exception as e:
+                logger.warning(f"Wait time estimator warm-up failed, using default service time: {e}")
+                return
+
+            self._warmed = True
+            # Старые сначала, чтобы последние приемы весили больше
+            for row in reversed(rows):
+                self.observe(row.processing_time, row.assigned_employee_id, row.programs)
+
+            logger.info(f"Wait time estimator warmed up with {len(rows)} completed entries")
+
+    def snapshot(self) -> dict:
+        def describe(stats: Ewma) -> dict:
+            return {"avg_seconds": round(stats.value or 0), "samples": stats.samples}
+
+        return {
+            "overall": describe(self.overall),
+            "employees": {key: describe(value) for key, value in self.by_employee.items()},
+            "programs": {key: describe(value) for key, value in self.by_program.items()},
+            "employee_programs": {
+                f"{employee}/{program}": describe(value)
+                for (employee, program), value in self.by_employee_program.items()
+            },
+        }
+
+estimator = WaitTimeEstimator(
+    alpha=settings.WAIT_TIME_EWMA_ALPHA,
+    min_samples=settings.WAIT_TIME_MIN_SAMPLES,
+    default_minutes=settings.WAIT_TIME_DEFAULT_MINUTES
+)
+
+async def load_active_desks() -> int:
+    """Сколько сотрудников сейчас принимают (AVAILABLE или BUSY)"""
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(func.count(User.id)).where(
+                User.role == "admission",
+                User.status.in_([EmployeeStatus.AVAILABLE.value, EmployeeStatus.BUSY.value])
+            )
+        )).scalar() or 0
+
+# Статусы сотрудников меняются через publish_employee_event - кэш сбрасывается вместе с ними
+active_desks_cache: VersionedCache[int] = VersionedCache(load_active_desks, settings.POSITION_CACHE_TTL_SECONDS)
+
+async def estimate_wait_minutes(
+    order_key: int,
+    employee_id: Optional[str] = None,
+    programs: Iterable[str] = ()
+) -> int:
+    """
+    Примерное ожидание заявки с данным order_key
+
+    Закрепленную заявку (режим pinned) примет только ее сотрудник: считаем его личную
+    очередь впереди и его время приема. Без сотрудника или в режиме steal заявку может
+    забрать любой стол - тогда все ожидающие впереди делятся на число работающих столов.
+    """
+    await estimator.warm_up()
+    if employee_id and settings.QUEUE_DISPATCH_MODE == "pinned":
+        people_ahead = await get_people_ahead_of_employee(order_key, employee_id)
+        return estimator.estimate_minutes(people_ahead, 1, employee_id, programs)
+
+    people_ahead = await get_people_ahead(order_key)
+    return estimator.estimate_minutes(people_ahead, await active_desks_cache.get(), None, programs)
@@ -1,13 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response
 from app.api.routes import auth, queue, admission, admin, public
-from app.database import Base, engine
 from app.config import settings
+from app.services.archive import start_purge_job, stop_purge_job
+from app.services.http_client import outbound_http
+from app.services.passwords import PasswordPoolBusy
+from app.services.wait_time import estimator
 
-Base.metadata.create_all(bind=engine)
+# Схема базы управляется миграциями Alembic: alembic upgrade head
 
-app = FastAPI(title="Admission Queue API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Один HTTP-клиент к внешним сервисам на все время работы (keep-alive, HTTP/2)
+    await outbound_http.start()
+    # Завершенные заявки уходят из очереди в фоне, а не в запросе на новый талон
+    start_purge_job()
+    # Статистика приемов для оценки ожидания и автоназначения - до первого запроса
+    await estimator.warm_up()
+    yield
+    await stop_purge_job()
+    await outbound_http.close()
+
+app = FastAPI(title="Admission Queue API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +33,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy(request, exc):
+    # Волна логинов больше очереди bcrypt - просим повторить, а не копим запросы
+    return JSONResponse(status_code=503, content={"detail": "Server is busy, try again"}, headers={"Retry-After": "1"})
+
 @app.options("/{path:path}")
 async def handle_options():
     return Response(status_code=204)
@@ -8,67 +8,56 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import SessionLocal, engine
-from app.models.queue import QueueEntry
-from app.models.archive import ArchivedQueueEntry, ArchiveQueueStatus
-from sqlalchemy.orm import Session
-from datetime import datetime
+from app.database import SessionLocal
+from app.models.queue import QueueEntry, QueueStatus
+from app.models.archive import ArchivedQueueEntry
+from sqlalchemy import case, cast, func, literal, select, String
+from sqlalchemy.dialects.postgresql import insert
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Колонки, которые берутся из заявки как есть
+COPIED_COLUMNS = (
+    "queue_number", "full_name", "phone", "programs", "notes", "assigned_employee_id",
+    "assigned_employee_name", "created_at", "updated_at", "processing_time", "form_language",
+)
+
 def migrate_all_to_archive():
-    """Перенести все существующие заявки в архив"""
+    """
+    Перенести все существующие заявки в архив одним INSERT ... SELECT
+
+    Уже перенесенные заявки (тот же original_id) обновляются, а не дублируются,
+    поэтому скрипт можно запускать повторно. Новые изменения архив получает
+    триггером sync_queue_entry_archive.
+    """
     db = SessionLocal()
     
     try:
-        # Получаем все заявки из основной таблицы
-        all_entries = db.query(QueueEntry).all()
-        
-        logger.info(f"Найдено {len(all_entries)} заявок для переноса в архив")
-        
-        migrated_count = 0
-        
-        for entry in all_entries:
-            try:
-                # Проверяем, не существует ли уже в архиве
-                existing = db.query(ArchivedQueueEntry).filter(
-                    ArchivedQueueEntry.original_id == entry.id
-                ).first()
-                
-                if existing:
-                    logger.info(f"Заявка {entry.id} уже есть в архиве, пропускаем")
-                    continue
-                
-                # Создаем запись в архиве
-                archived_entry = ArchivedQueueEntry(
-                    original_id=entry.id,
-                    queue_number=entry.queue_number,
-                    full_name=entry.full_name,
-                    phone=entry.phone,
-                    programs=entry.programs,
-                    status=ArchiveQueueStatus(entry.status.value),
-                    notes=entry.notes,
-                    assigned_employee_name=entry.assigned_employee_name,
-                    created_at=entry.created_at,
-                    updated_at=entry.updated_at,
-                    completed_at=entry.updated_at if entry.status.value == 'COMPLETED' else None,
-                    processing_time=entry.processing_time,
-                    form_language=entry.form_language,
-                    archive_reason="initial_migration"
-                )
-                
-                db.add(archived_entry)
-                migrated_count += 1
-                
-                logger.info(f"Перенесена заявка {entry.id} (#{entry.queue_number}) - {entry.full_name}")
-                
-            except Exception as e:
-                logger.error(f"Ошибка при переносе заявки {entry.id}: {e}")
-                continue
+        source = select(
+            cast(func.gen_random_uuid(), String),
+            QueueEntry.id,
+            *[getattr(QueueEntry, column) for column in COPIED_COLUMNS],
+            # queuestatus -> archivequeuestatus через текст (имена значений совпадают)
+            cast(cast(QueueEntry.status, String), ArchivedQueueEntry.status.type),
+            case((QueueEntry.status == QueueStatus.COMPLETED, QueueEntry.updated_at)),
+            literal("initial_migration"),
+        )
+        statement = insert(ArchivedQueueEntry).from_select(
+            ["id", "original_id", *COPIED_COLUMNS, "status", "completed_at", "archive_reason"],
+            source
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[ArchivedQueueEntry.original_id],
+            set_={
+                **{column: statement.excluded[column] for column in COPIED_COLUMNS if column != "created_at"},
+                "status": statement.excluded.status,
+                "completed_at": func.coalesce(ArchivedQueueEntry.completed_at, statement.excluded.completed_at),
+            }
+        )
         
-        # Сохраняем все изменения
+        migrated_count = db.execute(statement).rowcount
         db.commit()
         
         logger.info(f"✅ Успешно перенесено {migrated_count} заявок в архив")
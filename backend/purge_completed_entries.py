@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Скрипт для очистки очереди от завершенных заявок (копии остаются в архиве)
+То же делает фоновая задача приложения; скрипт - для ручного запуска или cron
+
+    python purge_completed_entries.py --retention-hours 0 --batch-size 5000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from app.config import settings
+from app.services.archive import purge_completed_entries
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Удалить из очереди завершенные заявки старше срока хранения")
+    parser.add_argument("--retention-hours", type=float, default=settings.ARCHIVE_RETENTION_HOURS,
+                        help="сколько часов завершенная заявка остается в очереди")
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_PURGE_BATCH_SIZE,
+                        help="заявок в одном DELETE")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    removed = asyncio.run(purge_completed_entries(timedelta(hours=args.retention_hours), args.batch_size))
+    logger.info(f"✅ Удалено {removed} заявок за {time.monotonic() - started:.1f} с")
+
+if __name__ == "__main__":
+    print("🚀 Очищаем очередь от завершенных заявок...")
+    main()
+    print("✅ Очистка завершена!")
@@ -1,15 +1,36 @@
-from app.database import engine, Base
-from app.models.queue import QueueEntry
-from app.models.user import User
+import os
+
+from alembic import command
+from alembic.config import Config
+
+from app.database import engine
+from app.models import Base  # Импортирует все модели для drop_all
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return config
 
 def reset_database():
+    """
+    Пересоздать схему миграциями: alembic downgrade base && alembic upgrade head
+
+    create_all не создает триггеры синхронизации архива и расширение pg_trgm,
+    поэтому схему строят только миграции.
+    """
+    config = alembic_config()
+
     print("Удаляем все таблицы...")
+    command.downgrade(config, "base")
+    # База, созданная create_all без Alembic, не помечена ревизией - downgrade ее не трогает
     Base.metadata.drop_all(bind=engine)
 
     print("Создаём все таблицы заново...")
-    Base.metadata.create_all(bind=engine)
+    command.upgrade(config, "head")
 
     print("Готово!")
 
 if __name__ == "__main__":
-    reset_database()
\ No newline at end of file
+    reset_database()
@@ -0,0 +1,35 @@
+# tests/benchmarks/common.py
+#
+# Замеры запускаются отдельно от тестов, на тестовой базе (TEST_DATABASE_URL):
+#   pytest -m benchmark -s tests/benchmarks
+# Размеры задаются переменными окружения BENCH_*; по умолчанию - быстрый прогон.
+import os
+import time
+from contextlib import contextmanager
+from typing import List, Sequence
+
+def bench_size(name: str, default: int) -> int:
+    """Размер замера из окружения: BENCH_<NAME>"""
+    return int(os.environ.get(f"BENCH_{name.upper()}", default))
+
+def percentile(values: Sequence[float], p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+def report(title: str, seconds: Sequence[float]):
+    """Строка с avg/p50/p99/max в миллисекундах"""
+    print(
+        f"{title}: n={len(seconds)} avg={sum(seconds) / max(len(seconds), 1) * 1000:.2f} ms "
+        f"p50={percentile(seconds, 0.5) * 1000:.2f} ms p99={percentile(seconds, 0.99) * 1000:.2f} ms "
+        f"max={max(seconds, default=0) * 1000:.2f} ms"
+    )
+
+@contextmanager
+def stopwatch(samples: List[float]):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append(time.perf_counter() - start)
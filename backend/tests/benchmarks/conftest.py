@@ -0,0 +1,38 @@
+# tests/benchmarks/conftest.py
+import os
+
+import httpx
+import pytest
+
+from app.api.routes import public
+from app.services import display, positions, wait_time
+from app.services.versioned_cache import VersionedCache
+
+@pytest.fixture
+def fresh_caches(monkeypatch):
+    """Кэши с asyncio.Lock заново - у каждого замера свой цикл событий"""
+    display_cache = VersionedCache(display.load_display_payload, 3600)
+    monkeypatch.setattr(display, "display_queue_cache", display_cache)
+    monkeypatch.setattr(public, "display_queue_cache", display_cache)
+    monkeypatch.setattr(positions, "waiting_order_cache", VersionedCache(positions.load_waiting_order_keys, 3600))
+    monkeypatch.setattr(
+        positions, "employee_order_cache", VersionedCache(positions.load_waiting_order_keys_by_employee, 3600)
+    )
+    monkeypatch.setattr(wait_time, "active_desks_cache", VersionedCache(wait_time.load_active_desks, 3600))
+
+@pytest.fixture
+async def api(fresh_caches):
+    """
+    Клиент API: приложение в процессе или BENCH_BASE_URL (запущенный сервер)
+
+    С BENCH_BASE_URL тот же замер можно снять с любой ревизии, например до перехода на async.
+    """
+    base_url = os.environ.get("BENCH_BASE_URL")
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=30)
+    else:
+        from main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=30)
+    async with client:
+        yield client
@@ -0,0 +1,134 @@
+# tests/benchmarks/simulation.py
+#
+# Дискретно-событийная модель смены: столы со своими очередями, перерывы,
+# выдача заявки при создании (assign) и, в режиме steal, забор самой старой
+# заявки у сотрудника с самой длинной очередью - как claim_next_entry.
+import heapq
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, List, Optional, Sequence
+
+@dataclass
+class Ticket:
+    arrival: float  # минуты от начала смены
+    programs: List[str] = field(default_factory=list)
+    language: str = "ru"
+    started: Optional[float] = None
+
+    @property
+    def wait(self) -> float:
+        return self.started - self.arrival
+
+@dataclass
+class Desk:
+    employee_id: str
+    speed: float = 1.0  # множитель времени приема: 1.5 - в полтора раза медленнее
+    programs: List[str] = field(default_factory=list)
+    languages: List[str] = field(default_factory=list)
+    break_at: Optional[float] = None
+    break_minutes: float = 0
+    queue: Deque[Ticket] = field(default_factory=deque)
+    current: Optional[Ticket] = None
+    on_break: bool = False
+    break_due: bool = False
+
+    @property
+    def active(self) -> int:
+        """WAITING + IN_PROGRESS, как в select_employee_automatically"""
+        return len(self.queue) + (1 if self.current else 0)
+
+    @property
+    def idle(self) -> bool:
+        return not self.on_break and self.current is None
+
+@dataclass
+class ShiftResult:
+    tickets: List[Ticket]
+    idle_while_waiting: float  # минуты простоя столов, пока у коллег кто-то ждет
+
+def least_loaded(rng: random.Random) -> Callable[[Ticket, Sequence[Desk]], Desk]:
+    """Выдача при создании: меньше всего активных заявок, ничья - случайно"""
+    def assign(ticket: Ticket, desks: Sequence[Desk]) -> Desk:
+        fewest = min(desk.active for desk in desks)
+        return rng.choice([desk for desk in desks if desk.active == fewest])
+    return assign
+
+def simulate_shift(
+    desks: Sequence[Desk],
+    tickets: Sequence[Ticket],
+    assign: Callable[[Ticket, Sequence[Desk]], Desk],
+    service_minutes: Callable[[Desk, Ticket], float],
+    steal: bool = False,
+    steal_min_backlog: int = 1,
+    on_complete: Optional[Callable[[Desk, Ticket, float], None]] = None,
+) -> ShiftResult:
+    """Прогнать смену до последнего принятого посетителя"""
+    events = []
+    sequence = 0
+
+    def schedule(time: float, kind: str, payload):
+        nonlocal sequence
+        heapq.heappush(events, (time, sequence, kind, payload))
+        sequence += 1
+
+    for ticket in tickets:
+        schedule(ticket.arrival, "arrival", ticket)
+    for desk in desks:
+        if desk.break_at is not None:
+            schedule(desk.break_at, "break", desk)
+
+    def start(desk: Desk, ticket: Ticket, now: float):
+        ticket.started = now
+        desk.current = ticket
+        schedule(now + service_minutes(desk, ticket), "finish", desk)
+
+    def take_break(desk: Desk, now: float):
+        desk.break_due = False
+        desk.on_break = True
+        schedule(now + desk.break_minutes, "back", desk)
+
+    def dispatch(now: float):
+        for desk in desks:
+            if not desk.idle:
+                continue
+            if desk.queue:
+                start(desk, desk.queue.popleft(), now)
+            elif steal:
+                busiest = max(desks, key=lambda colleague: len(colleague.queue))
+                if len(busiest.queue) >= steal_min_backlog:
+                    start(desk, busiest.queue.popleft(), now)
+
+    idle_while_waiting = 0.0
+    now = 0.0
+    while events:
+        time, _, kind, payload = heapq.heappop(events)
+        if any(desk.queue for desk in desks):
+            idle_while_waiting += (time - now) * sum(1 for desk in desks if desk.idle and not desk.queue)
+        now = time
+
+        if kind == "arrival":
+            available = [desk for desk in desks if not desk.on_break] or list(desks)
+            assign(payload, available).queue.append(payload)
+        elif kind == "finish":
+            ticket, payload.current = payload.current, None
+            if on_complete:
+                on_complete(payload, ticket, now - ticket.started)
+            if payload.break_due:
+                take_break(payload, now)
+        elif kind == "break":
+            payload.break_due = True
+            if payload.idle:
+                take_break(payload, now)
+        elif kind == "back":
+            payload.on_break = False
+        dispatch(now)
+
+    return ShiftResult(list(tickets), idle_while_waiting)
+
+def poisson_arrivals(rng: random.Random, per_hour: float, minutes: float) -> List[float]:
+    arrivals, now = [], rng.expovariate(per_hour / 60)
+    while now < minutes:
+        arrivals.append(now)
+        now += rng.expovariate(per_hour / 60)
+    return arrivals
@@ -0,0 +1,56 @@
+# tests/benchmarks/test_assignment_bench.py
+#
+# Автоназначение: один сгруппированный запрос против прежнего цикла с COUNT на
+# каждого сотрудника. BENCH_DESKS - число столов, BENCH_ROUNDS - повторов.
+import pytest
+from sqlalchemy import func, select
+
+from app.models.queue import QueueEntry, QueueStatus
+from app.models.user import EmployeeStatus, User
+from app.services.queue import select_employee_automatically
+from tests.benchmarks.common import bench_size, report, stopwatch
+from tests.helpers import add_employee, add_waiting, count_queries
+
+pytestmark = [pytest.mark.anyio, pytest.mark.benchmark]
+
+async def select_employee_per_desk_count(db):
+    """Прежний алгоритм: список сотрудников и отдельный COUNT активных заявок каждого"""
+    employees = (await db.execute(
+        select(User).where(
+            User.role == "admission",
+            User.status.in_([EmployeeStatus.AVAILABLE.value, EmployeeStatus.BUSY.value])
+        )
+    )).scalars().all()
+    workload = []
+    for employee in employees:
+        active = (await db.execute(
+            select(func.count(QueueEntry.id)).where(
+                QueueEntry.assigned_employee_id == employee.id,
+                QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+            )
+        )).scalar()
+        workload.append((active, employee))
+    return min(workload, key=lambda item: item[0])[1]
+
+async def test_grouped_assignment_vs_per_desk_counts(db):
+    desks = bench_size("desks", 30)
+    rounds = bench_size("rounds", 200)
+    for i in range(desks):
+        await add_waiting(db, await add_employee(db, f"Сотрудник {i}", desk=str(i)), i % 5)
+
+    results = {}
+    for name, select_employee in [
+        ("grouped", select_employee_automatically),
+        ("per-desk COUNT", select_employee_per_desk_count),
+    ]:
+        samples = []
+        with count_queries() as queries:
+            for _ in range(rounds):
+                with stopwatch(samples):
+                    await select_employee(db)
+                await db.rollback()
+        results[name] = queries[0] / rounds
+        report(f"{name} ({desks} desks, {results[name]:.0f} queries/call)", samples)
+
+    assert results["grouped"] == 1
+    assert results["per-desk COUNT"] == desks + 1
@@ -0,0 +1,78 @@
+# tests/benchmarks/test_display_bench.py
+#
+# Табло: BENCH_SCREENS экранов опрашивают /public/display-queue одновременно -
+# сколько запросов к базе и сколько ответов 304 на каждый круг опроса.
+# Рассылка SSE: BENCH_SUBSCRIBERS подписчиков display, BENCH_EVENTS событий.
+import asyncio
+import os
+import time
+from collections import Counter
+
+import pytest
+
+from app.models.queue import QueueStatus
+from app.models.user import User
+from app.services.events import DISPLAY_TOPIC, broker, publish_employee_event, publish_queue_event
+from tests.benchmarks.common import bench_size, report
+from tests.helpers import add_employee, add_waiting, count_queries
+
+pytestmark = [pytest.mark.anyio, pytest.mark.benchmark]
+
+async def test_polling_screens_hit_database_once_per_change(db, api):
+    if os.environ.get("BENCH_BASE_URL"):
+        pytest.skip("Запросы к базе считаются только для приложения в процессе")
+    screens = bench_size("screens", 100)
+    employees = []
+    for i in range(5):
+        employee = await add_employee(db, f"Сотрудник {i}", desk=str(i + 1))
+        entry = (await add_waiting(db, employee))[0]
+        entry.status = QueueStatus.IN_PROGRESS
+        await db.commit()
+        publish_queue_event("queue_called", entry)
+        employees.append(employee.id)
+
+    etags = [""] * screens
+
+    async def poll(screen: int):
+        response = await api.get("/api/public/display-queue", headers={"If-None-Match": etags[screen]})
+        etags[screen] = response.headers["ETag"]
+        return response.status_code
+
+    async def poll_round(title: str):
+        with count_queries() as queries:
+            statuses = Counter(await asyncio.gather(*(poll(screen) for screen in range(screens))))
+        print(f"{title}: {queries[0]} queries, statuses {dict(statuses)}")
+        return queries[0], statuses
+
+    print()
+    assert (await poll_round("cold cache"))[0] == 1
+    assert await poll_round("nothing changed") == (0, Counter({304: screens}))
+
+    # Статус сотрудника не виден на табло: один запрос, содержимое то же - 304
+    employee = await db.get(User, employees[0])
+    employee.status = "paused"
+    await db.commit()
+    publish_employee_event(employee)
+    assert await poll_round("employee status changed") == (1, Counter({304: screens}))
+
+    employee.desk = "42"
+    await db.commit()
+    publish_employee_event(employee)
+    assert await poll_round("desk changed") == (1, Counter({200: screens}))
+
+async def test_sse_fan_out_to_display_subscribers():
+    subscribers = bench_size("subscribers", 1000)
+    events = bench_size("events", 50)
+    queues = [broker.subscribe([DISPLAY_TOPIC]) for _ in range(subscribers)]
+    try:
+        samples = []
+        for i in range(events):
+            start = time.perf_counter()
+            broker.publish(DISPLAY_TOPIC, {"type": "bench", "n": i})
+            for queue in queues:
+                assert (await queue.get())["n"] == i
+            samples.append(time.perf_counter() - start)
+        report(f"publish -> delivered to {subscribers} subscribers", samples)
+    finally:
+        for queue in queues:
+            broker.unsubscribe(queue, [DISPLAY_TOPIC])
@@ -0,0 +1,63 @@
+# tests/benchmarks/test_export_bench.py
+#
+# Выгрузка архива в CSV и xlsx: пик памяти Python (tracemalloc) на BENCH_EXPORT_ROWS
+# строк и на их пятой части. При потоковой выгрузке пик не растет с размером.
+import time
+import tracemalloc
+
+import pytest
+from sqlalchemy import select, text
+
+from app.models.archive import ArchivedQueueEntry as model
+from app.services.export import stream_csv, stream_xlsx
+from tests.benchmarks.common import bench_size
+from tests.conftest import TABLES
+
+pytestmark = pytest.mark.benchmark
+
+QUERY = select(
+    model.full_name,
+    model.programs,
+    model.queue_number,
+    model.assigned_employee_name,
+    model.created_at,
+    model.status,
+    model.processing_time
+).order_by(model.created_at, model.id)
+
+def _fill_archive(engine, rows: int):
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {TABLES} CASCADE"))
+        connection.execute(text("""
+            INSERT INTO archived_queue_entries
+                (id, original_id, queue_number, full_name, phone, programs, status,
+                 assigned_employee_name, created_at, completed_at, processing_time)
+            SELECT 'export-' || i, 'export-' || i, i % 999 + 1, 'Абитуриент Тестовый ' || i,
+                   '+7700' || lpad(i::text, 7, '0'), '["it", "law"]', 'COMPLETED'::archivequeuestatus,
+                   'Сотрудник ' || i % 8, now() - make_interval(secs => i), now(), 300
+            FROM generate_series(1, :rows) AS i
+        """), {"rows": rows})
+
+def _export(stream) -> tuple:
+    """Байты, секунды и пик памяти одной выгрузки"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = sum(len(chunk) for chunk in stream(QUERY))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+@pytest.mark.parametrize("stream", [stream_csv, stream_xlsx], ids=["csv", "xlsx"])
+def test_export_memory_does_not_grow_with_rows(database, stream):
+    rows = bench_size("export_rows", 100_000)
+    peaks = []
+    print()
+    for count in (rows // 5, rows):
+        _fill_archive(database, count)
+        size, elapsed, peak = _export(stream)
+        peaks.append(peak)
+        print(f"{stream.__name__}: {count} rows, {size / 2 ** 20:.1f} MB in {elapsed:.1f} s, peak {peak / 2 ** 20:.1f} MB")
+
+    # В пять раз больше строк - пик памяти почти тот же
+    assert peaks[1] < 1.5 * peaks[0]
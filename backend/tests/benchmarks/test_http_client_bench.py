@@ -0,0 +1,84 @@
+# tests/benchmarks/test_http_client_bench.py
+#
+# Общий keep-alive клиент против нового клиента на каждый запрос к siteverify.
+# Заглушка - локальный HTTP/1.1 сервер; BENCH_HANDSHAKE_MS - пауза на каждое новое
+# соединение (TLS и RTT до Google), BENCH_CALLS - число проверок.
+import asyncio
+import json
+
+import pytest
+
+from app.config import settings
+from app.services.captcha import verify_captcha_v3
+from app.services.http_client import OutboundHTTPClient
+from tests.benchmarks.common import bench_size, report, stopwatch
+
+pytestmark = [pytest.mark.anyio, pytest.mark.benchmark]
+
+class KeepAliveStub:
+    """siteverify на asyncio: отвечает success, соединение держит открытым"""
+
+    def __init__(self, handshake_seconds: float):
+        self.handshake_seconds = handshake_seconds
+        self.connections = 0
+        self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_seconds)
+        body = json.dumps({"success": True, "score": 0.9, "action": settings.RECAPTCHA_ACTION}).encode()
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = next(
+                    (int(line.split(b":")[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")),
+                    0
+                )
+                await reader.readexactly(length)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/recaptcha/api/siteverify"
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+
+async def _new_client_per_call(url: str):
+    http = OutboundHTTPClient(hosts=[url])
+    try:
+        return await verify_captcha_v3("token", "10.0.0.1", settings.RECAPTCHA_ACTION, http=http)
+    finally:
+        await http.close()
+
+@pytest.mark.parametrize("handshake_ms", [0, bench_size("handshake_ms", 50)])
+async def test_shared_client_vs_client_per_call(handshake_ms, monkeypatch):
+    calls = bench_size("calls", 200)
+    stub = KeepAliveStub(handshake_ms / 1000)
+    async with stub as url:
+        monkeypatch.setattr(settings, "RECAPTCHA_VERIFY_URL", url)
+        shared = OutboundHTTPClient(hosts=[url])
+        results = {}
+        for name, verify in [
+            ("client per call", lambda: _new_client_per_call(url)),
+            ("shared client", lambda: verify_captcha_v3("token", "10.0.0.1", settings.RECAPTCHA_ACTION, http=shared)),
+        ]:
+            samples = []
+            connections = stub.connections
+            for _ in range(calls):
+                with stopwatch(samples):
+                    assert (await verify())["is_human"]
+            results[name] = sum(samples) / calls
+            report(f"{name}, handshake {handshake_ms} ms, {stub.connections - connections} connections", samples)
+        await shared.close()
+
+    assert results["shared client"] < results["client per call"]
@@ -0,0 +1,53 @@
+# tests/benchmarks/test_load.py
+#
+# Нагрузка на публичные эндпоинты: BENCH_CLIENTS одновременных клиентов делают
+# BENCH_REQUESTS запросов вперемешку (статус заявки, позиции, счетчик, табло).
+# Для сравнения ревизий (например, sync до перехода на AsyncSession) запустите
+# сервер нужной ревизии на той же базе и задайте BENCH_BASE_URL.
+import asyncio
+import time
+from collections import defaultdict
+
+import pytest
+
+from tests.benchmarks.common import bench_size, report
+from tests.helpers import add_employee, add_waiting
+
+pytestmark = [pytest.mark.anyio, pytest.mark.benchmark]
+
+async def test_public_endpoints_under_concurrent_load(db, api):
+    clients = bench_size("clients", 50)
+    total = bench_size("requests", 2000)
+    entries = []
+    for i in range(10):
+        entries += await add_waiting(db, await add_employee(db, f"Сотрудник {i}", desk=str(i)), 10)
+    names = [entry.full_name for entry in entries]
+    ids = [entry.id for entry in entries]
+
+    requests = [
+        ("check", lambda i: api.get("/api/public/queue/check", params={"full_name": names[i % len(names)]})),
+        ("positions", lambda i: api.get("/api/public/queue/positions", params={"queue_id": ids[i % 90:i % 90 + 10]})),
+        ("count", lambda i: api.get("/api/public/queue/count")),
+        ("display", lambda i: api.get("/api/public/display-queue")),
+    ]
+    latencies = defaultdict(list)
+    errors = []
+    counter = iter(range(total))
+
+    async def client():
+        for i in counter:
+            name, send = requests[i % len(requests)]
+            start = time.perf_counter()
+            response = await send(i)
+            latencies[name].append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors.append((name, response.status_code))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{total} requests, {clients} clients: {total / elapsed:.0f} req/s")
+    for name, samples in latencies.items():
+        report(name, samples)
+    assert not errors
@@ -0,0 +1,67 @@
+# tests/benchmarks/test_login_bench.py
+#
+# Волна логинов (BENCH_LOGINS одновременных, bcrypt в своем пуле) во время опроса
+# табло каждые 20 мс: сколько логинов прошло и как выросла задержка /display-queue.
+# С BENCH_BASE_URL (сервер на той же базе) замер снимается с любой ревизии.
+import asyncio
+import time
+from collections import Counter
+
+import pytest
+
+from app.security import get_password_hash
+from app.services.passwords import password_pool
+from tests.benchmarks.common import bench_size, report
+from tests.helpers import add_employee
+
+pytestmark = [pytest.mark.anyio, pytest.mark.benchmark]
+
+PASSWORD = "bench-password"
+
+async def _poll_display(api, stop: asyncio.Event) -> list:
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await api.get("/api/public/display-queue")
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.02)
+    return samples
+
+async def _poll_for(api, seconds: float) -> list:
+    stop = asyncio.Event()
+    poller = asyncio.create_task(_poll_display(api, stop))
+    await asyncio.sleep(seconds)
+    stop.set()
+    return await poller
+
+async def test_login_wave_with_display_polling(db, api):
+    logins = bench_size("logins", 100)
+    employee = await add_employee(db, "Сотрудник")
+    # Ответ логина валидирует email и телефон пользователя
+    employee.email = f"bench-{employee.id[:8]}@example.com"
+    employee.phone = "+77000000000"
+    employee.hashed_password = get_password_hash(PASSWORD)
+    await db.commit()
+    email = employee.email
+
+    idle = await _poll_for(api, 2)
+
+    async def login():
+        start = time.perf_counter()
+        response = await api.post("/api/login", data={"username": email, "password": PASSWORD})
+        return response.status_code, time.perf_counter() - start
+
+    stop = asyncio.Event()
+    poller = asyncio.create_task(_poll_display(api, stop))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    busy = await poller
+
+    statuses = Counter(status for status, _ in results)
+    print(f"\n{logins} logins in {elapsed:.1f} s ({password_pool.workers} bcrypt workers): {dict(statuses)}")
+    report("login", [seconds for _, seconds in results])
+    report("display-queue idle", idle)
+    report("display-queue during logins", busy)
+    assert statuses == Counter({200: logins})
@@ -0,0 +1,84 @@
+# tests/benchmarks/test_program_filter_bench.py
+#
+# Фильтр по программам в архиве: прежний programs::text ILIKE '%"code"%' (через OR)
+# против programs ?| array[...] с GIN-индексом. BENCH_ROWS строк архива, по две
+# программы в строке; в исходном замере - 1 000 000.
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app.api.routes.admin import PROGRAM_MAPPING, program_index
+from tests.benchmarks.common import bench_size, report, stopwatch
+
+pytestmark = [pytest.mark.anyio, pytest.mark.benchmark]
+
+CASES = {
+    "finance": ["finance"],
+    "itLaw, law, it": ["itLaw", "law", "it"],
+}
+
+def linear_program_lookup(program_name: str) -> list:
+    """Прежний поиск кодов: проход по всем названиям на каждый запрос"""
+    query = program_name.lower().strip()
+    codes = [PROGRAM_MAPPING[query]] if query in PROGRAM_MAPPING else []
+    for name, code in PROGRAM_MAPPING.items():
+        if (query in name or name in query) and code not in codes:
+            codes.append(code)
+    return codes or [query]
+
+def test_program_name_index_matches_linear_scan():
+    names = list(PROGRAM_MAPPING)
+    # Полные названия, их начала и концы, названия внутри длинного ввода, опечатки
+    queries = names + [name[:5] for name in names] + [name[-6:] for name in names]
+    queries += [f"программа {name} 2026" for name in names[::5]] + ["несуществующая", "xyz"]
+
+    linear, indexed = [], []
+    for query in queries:
+        with stopwatch(linear):
+            expected = linear_program_lookup(query)
+        with stopwatch(indexed):
+            codes = program_index.lookup(query)
+        assert sorted(codes) == sorted(expected), query
+
+    report(f"linear scan, {len(queries)} queries", linear)
+    report(f"ProgramNameIndex, {len(queries)} queries", indexed)
+
+def _fill_archive(engine, rows: int):
+    codes = sorted(set(PROGRAM_MAPPING.values()))
+    with engine.begin() as connection:
+        connection.execute(text("""
+            INSERT INTO archived_queue_entries
+                (id, original_id, queue_number, full_name, phone, programs, status, created_at)
+            SELECT 'bench-' || i, 'bench-' || i, i % 999 + 1, 'Абитуриент ' || i, '+7700' || lpad(i::text, 7, '0'),
+                   jsonb_build_array((:codes)[1 + i % :n], (:codes)[1 + (i * 7 + 3) % :n]),
+                   'COMPLETED', now() - make_interval(mins => i)
+            FROM generate_series(1, :rows) AS i
+        """), {"codes": codes, "n": len(codes), "rows": rows})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE archived_queue_entries"))
+
+def _timed(engine, sql: str) -> tuple:
+    with engine.connect() as connection:
+        start = time.perf_counter()
+        result = connection.execute(text(sql)).all()
+        return time.perf_counter() - start, result
+
+async def test_program_filter_ilike_vs_jsonb_gin(db, database):
+    rows = bench_size("rows", 200_000)
+    _fill_archive(database, rows)
+
+    print(f"\n{rows} archived rows")
+    for title, codes in CASES.items():
+        ilike = " OR ".join(f"""programs::text ILIKE '%"{code}"%'""" for code in codes)
+        jsonb = "programs ?| array[" + ", ".join(f"'{code}'" for code in codes) + "]"
+        results = {}
+        for name, condition in [("ILIKE", ilike), ("?| GIN", jsonb)]:
+            count_time, count = _timed(database, f"SELECT count(*) FROM archived_queue_entries WHERE {condition}")
+            page_time, page = _timed(
+                database,
+                f"SELECT id FROM archived_queue_entries WHERE {condition} ORDER BY created_at DESC LIMIT 50"
+            )
+            results[name] = (count, page)
+            print(f"{title:16} {name:7} count {count[0][0]:>7} in {count_time * 1000:8.1f} ms, newest 50 in {page_time * 1000:8.1f} ms")
+        assert results["ILIKE"] == results["?| GIN"]
@@ -0,0 +1,65 @@
+# tests/benchmarks/test_purge_bench.py
+#
+# Фоновая очистка: BENCH_ROWS завершенных заявок старше срока хранения удаляются
+# пачками по 1000 и 5000 - на схеме head и на ревизии 0008 (до частичного индекса
+# по updated_at и триггера на весь DELETE).
+import math
+import time
+from datetime import timedelta
+
+import pytest
+from alembic import command
+from sqlalchemy import text
+
+from app.database import async_engine
+from app.services.archive import purge_completed_entries
+from reset_db import alembic_config
+from tests.benchmarks.common import bench_size
+from tests.conftest import TABLES
+
+pytestmark = [pytest.mark.anyio, pytest.mark.benchmark]
+
+def _fill_completed(engine, rows: int):
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {TABLES} CASCADE"))
+        # Активные заявки рядом с завершенными: очистка их не трогает
+        connection.execute(text("""
+            INSERT INTO queue_entries
+                (id, queue_number, order_key, full_name, phone, programs, status, created_at, updated_at)
+            SELECT 'purge-' || i, i % 999 + 1, i, 'Абитуриент ' || i, '+7700' || lpad(i::text, 7, '0'), '[]',
+                   CASE WHEN i % 20 = 0 THEN 'WAITING' ELSE 'COMPLETED' END::queuestatus,
+                   now() - interval '5 days', now() - interval '2 days' - make_interval(secs => i)
+            FROM generate_series(1, :rows) AS i
+        """), {"rows": rows})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE queue_entries, archived_queue_entries"))
+
+async def _purge(engine, rows: int, batch_size: int) -> str:
+    _fill_completed(engine, rows)
+    completed = rows - rows // 20
+    start = time.perf_counter()
+    purged = await purge_completed_entries(retention=timedelta(hours=24), batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    assert purged == completed
+
+    with engine.connect() as connection:
+        archived = connection.execute(text(
+            "SELECT count(*) FROM archived_queue_entries WHERE archive_reason = 'auto_cleanup'"
+        )).scalar()
+    assert archived == completed
+    batches = math.ceil((completed + 1) / batch_size)
+    return f"{completed} entries, batch {batch_size}: {elapsed:.2f} s, {elapsed / batches * 1000:.0f} ms per batch"
+
+async def test_purge_batches_head_vs_row_triggers(db, database):
+    rows = bench_size("rows", 100_000)
+    config = alembic_config()
+    print()
+    try:
+        for revision in ["0008", "head"]:
+            await async_engine.dispose()
+            command.upgrade(config, revision) if revision == "head" else command.downgrade(config, revision)
+            for batch_size in (1000, 5000):
+                print(f"{revision}: {await _purge(database, rows, batch_size)}")
+    finally:
+        await async_engine.dispose()
+        command.upgrade(config, "head")
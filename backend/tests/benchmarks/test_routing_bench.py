@@ -0,0 +1,99 @@
+# tests/benchmarks/test_routing_bench.py
+#
+# Реплей ROUTING_STRATEGY: least_loaded против skills на одних и тех же сменах.
+# Каждая заявка выбирает стол через routing.route, прогноз приема - живой
+# WaitTimeEstimator, который учится на завершенных приемах смены.
+# 8 столов: 6 специалистов по одной программе и 2 универсала; ~55 заявок в час,
+# 80% с одной программой, языки ru/kk/en = 60/32/8.
+# Время приема: специалист x0.8, чужая программа x1.4, незнакомый язык x2.
+import math
+import random
+
+import pytest
+
+from app.config import settings
+from app.services.routing import Candidate, route
+from app.services.wait_time import WaitTimeEstimator
+from tests.benchmarks.common import bench_size, percentile
+from tests.benchmarks.simulation import Desk, Ticket, poisson_arrivals, simulate_shift
+
+pytestmark = pytest.mark.benchmark
+
+PROGRAMS = ["it", "law", "finance", "medicine", "economics", "pedagogy"]
+LANGUAGES = {"ru": 0.60, "kk": 0.32, "en": 0.08}
+SHIFT_MINUTES = 8 * 60
+ARRIVALS_PER_HOUR = 55
+MEAN_SERVICE_MINUTES = 6
+SERVICE_SIGMA = 0.5
+
+def _desks():
+    specialists = [
+        Desk(f"specialist-{program}", programs=[program], languages=["ru", "kk"] if i < 4 else ["ru", "en"])
+        for i, program in enumerate(PROGRAMS)
+    ]
+    generalists = [Desk("generalist-kk", languages=["ru", "kk", "en"]), Desk("generalist-ru", languages=["ru"])]
+    return specialists + generalists
+
+def _tickets(rng: random.Random):
+    tickets = []
+    for arrival in poisson_arrivals(rng, ARRIVALS_PER_HOUR, SHIFT_MINUTES):
+        programs = rng.sample(PROGRAMS, 1 if rng.random() < 0.8 else 2)
+        language = rng.choices(list(LANGUAGES), weights=list(LANGUAGES.values()))[0]
+        tickets.append(Ticket(arrival, programs=programs, language=language))
+    return tickets
+
+def _multiplier(desk: Desk, ticket: Ticket) -> float:
+    """Специалист x0.8, чужая программа x1.4, универсал и частичное совпадение x1, незнакомый язык x2"""
+    covered = set(ticket.programs) & set(desk.programs)
+    if not desk.programs or 0 < len(covered) < len(ticket.programs):
+        multiplier = 1.0
+    else:
+        multiplier = 0.8 if covered else 1.4
+    if ticket.language not in desk.languages:
+        multiplier *= 2
+    return multiplier
+
+def _shift(seed: int, strategy: str, estimator: WaitTimeEstimator):
+    rng = random.Random(seed)
+    tickets = _tickets(rng)
+    mu = math.log(MEAN_SERVICE_MINUTES) - SERVICE_SIGMA ** 2 / 2
+    durations = {id(ticket): rng.lognormvariate(mu, SERVICE_SIGMA) for ticket in tickets}
+    # route() выбирает среди равных через модуль random
+    random.seed(seed)
+
+    def assign(ticket, desks):
+        candidates = [Candidate(desk.employee_id, desk.active, desk.programs, desk.languages) for desk in desks]
+        chosen = route(candidates, ticket.programs, ticket.language, estimator.service_seconds, strategy)
+        return next(desk for desk in desks if desk.employee_id == chosen.employee_id)
+
+    def observe(desk, ticket, minutes):
+        estimator.observe(int(minutes * 60), desk.employee_id, ticket.programs)
+
+    return simulate_shift(
+        _desks(), tickets, assign,
+        service_minutes=lambda desk, ticket: durations[id(ticket)] * _multiplier(desk, ticket),
+        on_complete=observe,
+    )
+
+def test_skill_routing_cuts_average_wait():
+    shifts = bench_size("routing_shifts", 10)
+    summary = {}
+    for strategy in ("least_loaded", "skills"):
+        estimator = WaitTimeEstimator(
+            alpha=settings.WAIT_TIME_EWMA_ALPHA, min_samples=settings.WAIT_TIME_MIN_SAMPLES,
+            default_minutes=MEAN_SERVICE_MINUTES,
+        )
+        estimator._warmed = True
+        waits, served, last_start = [], 0, 0.0
+        for seed in range(shifts):
+            result = _shift(seed, strategy, estimator)
+            waits.extend(ticket.wait for ticket in result.tickets)
+            served += len(result.tickets)
+            last_start += max(ticket.started for ticket in result.tickets)
+        summary[strategy] = sum(waits) / len(waits)
+        print(
+            f"\n{strategy}: {served} tickets, wait avg {summary[strategy]:.1f} min, "
+            f"p90 {percentile(waits, 0.9):.1f} min, {served / (last_start / 60):.1f} tickets/h"
+        )
+
+    assert summary["skills"] < summary["least_loaded"]
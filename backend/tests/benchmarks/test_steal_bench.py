@@ -0,0 +1,60 @@
+# tests/benchmarks/test_steal_bench.py
+#
+# Модель QUEUE_DISPATCH_MODE: pinned против steal на одних и тех же сменах.
+# 8 столов со скоростью 0.7-1.5x и перерывом 15-30 минут, 60 посетителей в час,
+# логнормальный прием со средним 6 минут. Выдача при создании - least-loaded.
+import math
+import random
+
+import pytest
+
+from tests.benchmarks.common import bench_size, percentile
+from tests.benchmarks.simulation import Desk, Ticket, least_loaded, poisson_arrivals, simulate_shift
+
+pytestmark = pytest.mark.benchmark
+
+DESKS = 8
+SHIFT_MINUTES = 8 * 60
+ARRIVALS_PER_HOUR = 60
+MEAN_SERVICE_MINUTES = 6
+SERVICE_SIGMA = 0.5
+
+def _shift(seed: int, steal: bool):
+    rng = random.Random(seed)
+    desks = [
+        Desk(
+            employee_id=f"desk-{i}",
+            speed=rng.uniform(0.7, 1.5),
+            break_at=rng.uniform(120, SHIFT_MINUTES - 120),
+            break_minutes=rng.uniform(15, 30),
+        )
+        for i in range(DESKS)
+    ]
+    tickets = [Ticket(arrival) for arrival in poisson_arrivals(rng, ARRIVALS_PER_HOUR, SHIFT_MINUTES)]
+    # Среднее логнормального распределения: exp(mu + sigma^2 / 2)
+    mu = math.log(MEAN_SERVICE_MINUTES) - SERVICE_SIGMA ** 2 / 2
+    durations = {id(ticket): rng.lognormvariate(mu, SERVICE_SIGMA) for ticket in tickets}
+
+    return simulate_shift(
+        desks, tickets,
+        assign=least_loaded(random.Random(seed + 1)),
+        service_minutes=lambda desk, ticket: durations[id(ticket)] * desk.speed,
+        steal=steal,
+    )
+
+def test_steal_mode_cuts_average_wait():
+    shifts = bench_size("shifts", 40)
+    summary = {}
+    for mode in ("pinned", "steal"):
+        waits, idle = [], 0.0
+        for seed in range(shifts):
+            result = _shift(seed, steal=mode == "steal")
+            waits.extend(ticket.wait for ticket in result.tickets)
+            idle += result.idle_while_waiting
+        summary[mode] = sum(waits) / len(waits)
+        print(
+            f"\n{mode}: {len(waits)} tickets in {shifts} shifts, wait avg {summary[mode]:.1f} min, "
+            f"p90 {percentile(waits, 0.9):.1f} min, desk idle while others wait {idle / shifts:.1f} min per shift"
+        )
+
+    assert summary["steal"] < summary["pinned"]
@@ -0,0 +1,71 @@
+# tests/helpers.py
+from contextlib import contextmanager
+from typing import List
+from uuid import uuid4
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_engine
+from app.models.queue import QueueEntry, QueueStatus
+from app.models.user import EmployeeStatus, User
+from app.services.events import publish_queue_event
+from app.services.numbering import issue_ticket_number
+
+async def add_employee(db: AsyncSession, name: str, status: str = EmployeeStatus.AVAILABLE.value, desk: str = "1") -> User:
+    employee = User(
+        id=str(uuid4()),
+        email=f"{uuid4().hex[:8]}@test.local",
+        full_name=name,
+        hashed_password="-",
+        role="admission",
+        desk=desk,
+        status=status,
+    )
+    db.add(employee)
+    await db.commit()
+    return employee
+
+async def add_waiting(db: AsyncSession, employee: User, count: int = 1) -> List[QueueEntry]:
+    """Ожидающие заявки сотрудника, каждая своей транзакцией, как create_queue_entry"""
+    entries = []
+    for _ in range(count):
+        queue_number, order_key = await issue_ticket_number(db)
+        entry = QueueEntry(
+            id=str(uuid4()),
+            queue_number=queue_number,
+            order_key=order_key,
+            full_name=f"Абитуриент {queue_number}",
+            phone=f"+7700{queue_number:07d}",
+            programs=[],
+            status=QueueStatus.WAITING,
+            assigned_employee_id=employee.id,
+            assigned_employee_name=employee.full_name,
+        )
+        db.add(entry)
+        await db.commit()
+        publish_queue_event("queue_created", entry)
+        entries.append(entry)
+    return entries
+
+async def waiting_people_ahead(db: AsyncSession) -> dict:
+    """Эталон: id ожидающей заявки -> сколько ожидающих перед ней (прямой запрос)"""
+    ids = (await db.execute(
+        select(QueueEntry.id).where(QueueEntry.status == QueueStatus.WAITING).order_by(QueueEntry.order_key)
+    )).scalars().all()
+    await db.rollback()
+    return {entry_id: index for index, entry_id in enumerate(ids)}
+
+@contextmanager
+def count_queries():
+    """Счетчик SQL-запросов async engine: with count_queries() as queries: ... queries[0]"""
+    queries = [0]
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        queries[0] += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", on_execute)
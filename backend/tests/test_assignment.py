@@ -0,0 +1,117 @@
+# tests/test_assignment.py
+from collections import Counter
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.api.routes.admin import delete_employee
+
+from app.models.queue import QueueEntry, QueueStatus
+from app.models.user import EmployeeStatus, User
+from app.services.queue import select_employee_automatically
+from app.services.routing import Candidate, skill_match, skill_match_clause
+from tests.helpers import add_employee, add_waiting, count_queries
+
+pytestmark = pytest.mark.anyio
+
+async def test_least_loaded_employee_in_one_query(db):
+    busy = await add_employee(db, "Загруженный", status=EmployeeStatus.BUSY.value)
+    await add_waiting(db, busy, 3)
+    finished = await add_employee(db, "Все принял", desk="2")
+    done = await add_waiting(db, finished, 2)
+    for entry in done:
+        entry.status = QueueStatus.COMPLETED
+    await add_employee(db, "Ушел", status=EmployeeStatus.OFFLINE.value, desk="3")
+    await db.commit()
+    finished_id = finished.id
+
+    with count_queries() as queries:
+        selected = await select_employee_automatically(db)
+
+    # Завершенные заявки не нагрузка, offline не выбирается, сотрудник без заявок - в LEFT JOIN с нулем
+    assert selected.id == finished_id
+    assert queries[0] == 1
+
+async def test_employee_without_entries_beats_loaded_colleagues(db):
+    for i in range(3):
+        await add_waiting(db, await add_employee(db, f"Сотрудник {i}", desk=str(i)), i + 1)
+    newcomer = await add_employee(db, "Новый", desk="9")
+
+    assert (await select_employee_automatically(db)).id == newcomer.id
+
+async def test_no_available_employees(db):
+    await add_employee(db, "Ушел", status=EmployeeStatus.OFFLINE.value)
+
+    assert await select_employee_automatically(db) is None
+
+async def test_skill_match_clause_agrees_with_skill_match(db):
+    employee = await add_employee(db, "Сотрудник")
+    tickets = {}
+    for programs in ([], ["it"], ["law"], ["it", "law"]):
+        for language in (None, "ru", "kk", "en"):
+            entry = (await add_waiting(db, employee))[0]
+            entry.programs, entry.form_language = programs, language
+            tickets[entry.id] = (programs, language)
+    await db.commit()
+
+    profiles = [([], []), (["it"], []), ([], ["kk"]), (["it", "finance"], ["ru", "en"])]
+    for programs, languages in profiles:
+        candidate = Candidate("candidate", 0, programs, languages)
+        matched = set((await db.execute(
+            select(QueueEntry.id).where(skill_match_clause(candidate, QueueEntry.programs, QueueEntry.form_language))
+        )).scalars())
+        expected = {entry_id for entry_id, ticket in tickets.items() if skill_match(candidate, *ticket) > 0}
+        assert matched == expected, (programs, languages)
+
+async def _entries_of(db, employee_ids):
+    rows = (await db.execute(
+        select(QueueEntry.id, QueueEntry.assigned_employee_id).where(QueueEntry.status == QueueStatus.WAITING)
+    )).all()
+    await db.rollback()
+    return {entry_id: employee_id for entry_id, employee_id in rows if employee_id in employee_ids or employee_id is None}
+
+async def test_deleted_employee_waiting_queue_is_reassigned(db):
+    leaving = await add_employee(db, "Уходит")
+    entries = [entry.id for entry in await add_waiting(db, leaving, 3)]
+    loaded = await add_employee(db, "Загруженный", desk="2")
+    await add_waiting(db, loaded, 2)
+    free = await add_employee(db, "Свободный", desk="3")
+    leaving_id, loaded_id, free_id = leaving.id, loaded.id, free.id
+
+    result = await delete_employee(leaving_id, db=db, current_user=None)
+
+    assert result["reassigned_entries"] == 3
+    assert await db.get(User, leaving_id) is None
+    owners = await _entries_of(db, {leaving_id, loaded_id, free_id, None})
+    # Заявки не остались без сотрудника; свободный получил больше, чем загруженный
+    assert Counter(owners[entry_id] for entry_id in entries) in (
+        Counter({free_id: 3}), Counter({free_id: 2, loaded_id: 1})
+    )
+
+async def test_employee_is_not_deleted_without_someone_to_take_the_queue(db):
+    leaving = await add_employee(db, "Уходит")
+    leaving_id = leaving.id
+    await add_waiting(db, leaving, 2)
+    await add_employee(db, "Ушел", status=EmployeeStatus.OFFLINE.value, desk="2")
+
+    with pytest.raises(HTTPException) as exc:
+        await delete_employee(leaving_id, db=db, current_user=None)
+
+    assert exc.value.status_code == 409
+    assert list((await _entries_of(db, {leaving_id, None})).values()) == [leaving_id] * 2
+    assert (await db.get(User, leaving_id)).status == EmployeeStatus.AVAILABLE.value
+
+async def test_employee_with_applicant_in_progress_is_not_deleted(db):
+    busy = await add_employee(db, "Принимает", status=EmployeeStatus.BUSY.value)
+    busy_id = busy.id
+    entry = (await add_waiting(db, busy))[0]
+    entry.status = QueueStatus.IN_PROGRESS
+    await db.commit()
+    await add_employee(db, "Свободный", desk="2")
+
+    with pytest.raises(HTTPException) as exc:
+        await delete_employee(busy_id, db=db, current_user=None)
+
+    assert exc.value.status_code == 409
+    assert await db.get(User, busy_id) is not None
@@ -0,0 +1,37 @@
+# tests/test_audio_cache.py
+import pytest
+
+from app.services.audio_cache import AudioCache, CachedAudio, announcement_key
+
+pytestmark = pytest.mark.anyio
+
+async def test_disk_hit_keeps_announcement_metadata(tmp_path):
+    audio_id = announcement_key("kk", 12, "3")
+    await AudioCache(str(tmp_path), 10).put(
+        CachedAudio(audio_id=audio_id, audio=b"mp3", text="Талон нөмірі 12, 3 үстеліне өтіңіз", language="kk")
+    )
+
+    # После рестарта: /public/audio/{id} читает файл, не зная текста и языка
+    cache = AudioCache(str(tmp_path), 10)
+    from_disk = await cache.get(audio_id)
+    from_memory = await cache.get(audio_id)
+
+    for item in (from_disk, from_memory):
+        assert item.audio == b"mp3"
+        assert item.text == "Талон нөмірі 12, 3 үстеліне өтіңіз"
+        assert item.language == "kk"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["hits"] == 1
+
+async def test_file_without_metadata_is_not_remembered_blank(tmp_path):
+    audio_id = announcement_key("ru", 5, "1")
+    (tmp_path / f"{audio_id}.mp3").write_bytes(b"old mp3")
+    cache = AudioCache(str(tmp_path), 10)
+
+    blank = await cache.get(audio_id)
+    described = await cache.get(audio_id, text="Талон номер 5, пройдите к столу 1", language="ru")
+    remembered = await cache.get(audio_id)
+
+    assert blank.audio == b"old mp3" and blank.text == ""
+    assert described.text == remembered.text == "Талон номер 5, пройдите к столу 1"
+    assert remembered.language == "ru"
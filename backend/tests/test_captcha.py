@@ -0,0 +1,109 @@
+# tests/test_captcha.py
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import captcha
+from app.services.captcha import CaptchaMetrics, CircuitBreaker, LocalRateLimiter, verify_captcha
+from app.services.http_client import OutboundHTTPClient
+
+pytestmark = pytest.mark.anyio
+
+VERIFY_URL = "https://recaptcha.test/siteverify"
+
+class FakeSiteverify:
+    """Заглушка Google siteverify: score по токену, down - сервис недоступен, delay - медленный"""
+
+    def __init__(self):
+        self.calls = 0
+        self.down = False
+        self.delay = 0.0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.down:
+            return httpx.Response(503)
+        token = dict(httpx.QueryParams(request.content.decode()))["response"]
+        return httpx.Response(200, json={
+            "success": True,
+            "score": 0.1 if token.startswith("bot") else 0.9,
+            "action": settings.RECAPTCHA_ACTION,
+        })
+
+@pytest.fixture
+def siteverify(monkeypatch):
+    fake = FakeSiteverify()
+    monkeypatch.setattr(settings, "RECAPTCHA_VERIFY_URL", VERIFY_URL)
+    monkeypatch.setattr(captcha, "metrics", CaptchaMetrics())
+    monkeypatch.setattr(captcha, "breaker", CircuitBreaker(failure_threshold=3, reset_seconds=60))
+    monkeypatch.setattr(captcha, "fallback_limiter", LocalRateLimiter(limit=2))
+    monkeypatch.setattr(captcha, "_spent_tokens", captcha.OrderedDict())
+    monkeypatch.setattr(captcha, "_pending", {})
+    return fake
+
+@pytest.fixture
+async def http(siteverify):
+    client = OutboundHTTPClient(transport=httpx.MockTransport(siteverify))
+    yield client
+    await client.close()
+
+async def test_rejected_token_is_not_sent_again(siteverify, http):
+    assert not await verify_captcha("bot-1", "10.0.0.1", http=http)
+    assert not await verify_captcha("bot-1", "10.0.0.1", http=http)
+
+    assert siteverify.calls == 1
+    assert captcha.metrics.cache_hits == 1
+
+async def test_passing_token_cannot_be_replayed(siteverify, http):
+    assert await verify_captcha("human-1", "10.0.0.1", http=http)
+    assert not await verify_captcha("human-1", "10.0.0.1", http=http)
+    assert not await verify_captcha("human-1", "10.0.0.7", http=http)
+
+    assert siteverify.calls == 1
+    assert captcha.metrics.calls == 1
+
+async def test_duplicate_submits_share_one_verification(siteverify, http):
+    verdicts = await asyncio.gather(*(verify_captcha("human-2", "10.0.0.1", http=http) for _ in range(10)))
+
+    # Одна проверка в Google и одна заявка по токену
+    assert verdicts.count(True) == 1
+    assert siteverify.calls == 1
+
+async def test_breaker_opens_and_falls_back_to_local_rate_limit(siteverify, http):
+    siteverify.down = True
+
+    # Каждая ошибка Google - проверка по локальному лимиту (2 заявки с IP)
+    results = [await verify_captcha(f"token-{i}", "10.0.0.2", http=http) for i in range(3)]
+    assert results == [True, True, False]
+    assert captcha.breaker.state == "open"
+    assert captcha.metrics.failures == 3
+
+    # Breaker открыт: Google не вызываем, другой IP проходит по своему лимиту
+    calls = siteverify.calls
+    assert await verify_captcha("token-4", "10.0.0.3", http=http)
+    assert not await verify_captcha("token-5", "10.0.0.2", http=http)
+    assert siteverify.calls == calls
+    assert captcha.metrics.fallback_denied == 2
+
+async def test_half_open_trial_closes_breaker(siteverify, http):
+    siteverify.down = True
+    for i in range(3):
+        await verify_captcha(f"token-{i}", "10.0.0.4", http=http)
+    assert captcha.breaker.state == "open"
+
+    siteverify.down = False
+    captcha.breaker.opened_at -= captcha.breaker.reset_seconds
+    assert await verify_captcha("human-3", "10.0.0.5", http=http)
+    assert captcha.breaker.state == "closed"
+
+async def test_slow_verifier_degrades_to_local_rate_limit(siteverify, http, monkeypatch):
+    monkeypatch.setattr(settings, "RECAPTCHA_TIMEOUT_SECONDS", 0.05)
+    siteverify.delay = 1.0
+
+    assert await verify_captcha("human-4", "10.0.0.6", http=http)
+    assert captcha.metrics.failures == 1
+    assert captcha.metrics.fallback_allowed == 1
+    assert captcha.metrics.snapshot()["latency_ms"]["max"] < 1000
@@ -0,0 +1,140 @@
+# tests/test_claim.py
+import asyncio
+from collections import Counter
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+
+from app.api.routes.admission import call_next_applicant, process_next_in_queue
+from app.config import settings
+from app.database import AsyncSessionLocal, async_engine
+from app.models.queue import QueueEntry, QueueStatus
+from app.models.user import User
+from tests.helpers import add_employee, add_waiting
+
+pytestmark = pytest.mark.anyio
+
+DESKS = 50
+
+@pytest.fixture(autouse=True)
+def no_tts(monkeypatch):
+    # Без ключа объявления не синтезируются и не уходят в сеть
+    monkeypatch.setattr(settings, "GOOGLE_TTS_API_KEY", "")
+
+@pytest.fixture
+def commits():
+    """Счетчик COMMIT на async engine"""
+    counter = Counter()
+
+    def on_commit(connection):
+        counter["commits"] += 1
+
+    event.listen(async_engine.sync_engine, "commit", on_commit)
+    yield counter
+    event.remove(async_engine.sync_engine, "commit", on_commit)
+
+async def _click(route, employee_id: str):
+    """Один запрос сотрудника своей сессией, как в get_async_db"""
+    async with AsyncSessionLocal() as session:
+        employee = await session.get(User, employee_id)
+        try:
+            result = await route(db=session, current_user=employee)
+        except HTTPException as exc:
+            return exc.status_code
+        if isinstance(result, dict):
+            return result["id"] if result["success"] else None
+        return result.id
+
+async def _claims(db):
+    rows = (await db.execute(
+        select(QueueEntry.id, QueueEntry.assigned_employee_id).where(QueueEntry.status == QueueStatus.IN_PROGRESS)
+    )).all()
+    await db.rollback()
+    return dict(rows)
+
+async def _desks(db, entries_each: int):
+    employees = []
+    for i in range(DESKS):
+        employee = await add_employee(db, f"Сотрудник {i}", desk=str(i))
+        await add_waiting(db, employee, entries_each)
+        employees.append(employee.id)
+    return employees
+
+@pytest.mark.parametrize("route", [call_next_applicant, process_next_in_queue])
+async def test_double_clicks_on_50_desks_claim_one_applicant_each(db, commits, route):
+    employees = await _desks(db, entries_each=2)
+    commits.clear()
+
+    # Каждый сотрудник кликает дважды, все столы одновременно
+    results = await asyncio.gather(*(_click(route, employee_id) for employee_id in employees * 2))
+
+    claimed = [result for result in results if isinstance(result, str)]
+    assert len(claimed) == DESKS
+    assert sorted(result for result in results if not isinstance(result, str)) == [400] * DESKS
+    assert len(set(claimed)) == DESKS
+
+    in_progress = await _claims(db)
+    assert set(in_progress) == set(claimed)
+    assert sorted(in_progress.values()) == sorted(employees)
+    # Один COMMIT на успешный вызов, отказ - только rollback
+    assert commits["commits"] == DESKS
+
+async def test_steal_mode_never_gives_one_applicant_to_two_desks(db, commits, monkeypatch):
+    monkeypatch.setattr(settings, "QUEUE_DISPATCH_MODE", "steal")
+    monkeypatch.setattr(settings, "QUEUE_STEAL_MIN_BACKLOG", 1)
+    busy = await add_employee(db, "Загруженный", desk="0")
+    busy_id = busy.id
+    await add_waiting(db, busy, DESKS * 2)
+    idle = [(await add_employee(db, f"Свободный {i}", desk=str(i + 1))).id for i in range(DESKS)]
+    commits.clear()
+
+    results = await asyncio.gather(*(_click(call_next_applicant, employee_id) for employee_id in idle))
+
+    claimed = [result for result in results if result]
+    assert claimed
+    assert len(set(claimed)) == len(claimed)
+
+    in_progress = await _claims(db)
+    assert set(in_progress) == set(claimed)
+    assert Counter(in_progress.values()).most_common(1)[0][1] == 1
+    assert busy_id not in in_progress.values()
+    assert commits["commits"] == len(claimed)
+
+async def _waiting_with(db, employee, programs, language, count=1):
+    entries = await add_waiting(db, employee, count)
+    for entry in entries:
+        entry.programs = programs
+        entry.form_language = language
+    await db.commit()
+    return [entry.id for entry in entries]
+
+async def test_skills_steal_takes_only_qualified_tickets(db, commits, monkeypatch):
+    monkeypatch.setattr(settings, "QUEUE_DISPATCH_MODE", "steal")
+    monkeypatch.setattr(settings, "QUEUE_STEAL_MIN_BACKLOG", 1)
+    monkeypatch.setattr(settings, "ROUTING_STRATEGY", "skills")
+    busiest = await add_employee(db, "Загруженный", desk="0")
+    await _waiting_with(db, busiest, ["medicine"], "ru", count=3)
+    await _waiting_with(db, busiest, ["it"], "kk")
+    colleague = await add_employee(db, "Коллега", desk="1")
+    qualified = await _waiting_with(db, colleague, ["it", "law"], None)
+    idle = [await add_employee(db, f"Свободный {i}", desk=str(i + 2)) for i in range(2)]
+    for employee in idle:
+        employee.programs, employee.languages = ["it"], ["ru"]
+    await db.commit()
+    idle_ids = [employee.id for employee in idle]
+
+    # У самого загруженного нет заявок, которые сотруднику дала бы маршрутизация
+    assert await _click(call_next_applicant, idle_ids[0]) == qualified[0]
+    assert await _click(call_next_applicant, idle_ids[1]) is None
+
+async def test_steal_ignores_skills_with_least_loaded_routing(db, monkeypatch):
+    monkeypatch.setattr(settings, "QUEUE_DISPATCH_MODE", "steal")
+    monkeypatch.setattr(settings, "QUEUE_STEAL_MIN_BACKLOG", 1)
+    busiest = await add_employee(db, "Загруженный", desk="0")
+    oldest = await _waiting_with(db, busiest, ["medicine"], "kk", count=2)
+    idle = await add_employee(db, "Свободный", desk="1")
+    idle.programs, idle.languages = ["it"], ["ru"]
+    await db.commit()
+
+    assert await _click(call_next_applicant, idle.id) == oldest[0]
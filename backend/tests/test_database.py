@@ -0,0 +1,26 @@
+# tests/test_database.py
+import pytest
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal, async_engine, async_pool_stats, get_async_db, get_pool_status
+
+pytestmark = pytest.mark.anyio
+
+async def test_session_checks_out_connection_lazily(db):
+    before = async_pool_stats.snapshot()["checkouts"]
+
+    # Зависимость роута без запросов к базе (ответ из кэша) соединение не берет
+    dependency = get_async_db()
+    await anext(dependency)
+    assert async_engine.pool.checkedout() == 0
+    await dependency.aclose()
+    assert async_pool_stats.snapshot()["checkouts"] == before
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("SELECT 1"))
+        assert async_engine.pool.checkedout() == 1
+
+    stats = get_pool_status()["async"]
+    assert stats["checkouts"] == before + 1
+    assert stats["checked_out"] == 0
+    assert stats["connects"] >= 1
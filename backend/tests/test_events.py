@@ -0,0 +1,35 @@
+# tests/test_events.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.events import (
+    DISPLAY_TOPIC, QUEUE_TOPIC, broker, employee_topic, publish_queue_event, ticket_topic
+)
+
+pytestmark = pytest.mark.anyio
+
+async def test_ticket_id_only_in_own_topic():
+    entry = SimpleNamespace(
+        id="ticket-1", queue_number=7, status="waiting", assigned_employee_id="emp-1"
+    )
+    public_topics = [DISPLAY_TOPIC, QUEUE_TOPIC, employee_topic("emp-1")]
+    public = broker.subscribe(public_topics)
+    own = broker.subscribe([ticket_topic("ticket-1")])
+    try:
+        publish_queue_event("queue_created", entry)
+        await asyncio.sleep(0)  # Доставка идет через call_soon_threadsafe
+
+        assert public.qsize() == len(public_topics)
+        while not public.empty():
+            event = public.get_nowait()
+            assert "id" not in event
+            assert event["queue_number"] == 7
+
+        event = own.get_nowait()
+        assert event["id"] == "ticket-1"
+        assert event["status"] == "waiting"
+    finally:
+        broker.unsubscribe(public, public_topics)
+        broker.unsubscribe(own, [ticket_topic("ticket-1")])
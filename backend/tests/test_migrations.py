@@ -0,0 +1,44 @@
+# tests/test_migrations.py
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+
+from reset_db import alembic_config
+
+def test_upgrade_adopts_database_created_without_migrations(database):
+    config = alembic_config()
+    # База до миграций: таблицы из create_all, но без alembic_version
+    command.downgrade(config, "base")
+    command.upgrade(config, "0001")
+    with database.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+
+    command.upgrade(config, "head")
+
+    with database.connect() as connection:
+        version = connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    assert version == ScriptDirectory.from_config(config).get_current_head()
+    assert "queue_counters" in inspect(database).get_table_names()
+
+def test_reset_database_restores_archive_triggers(database):
+    from reset_db import reset_database
+
+    # База, пересозданная старым reset_db: таблицы без триггеров и без alembic_version
+    config = alembic_config()
+    command.downgrade(config, "base")
+    command.upgrade(config, "0001")
+    with database.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+        connection.execute(text(
+            "INSERT INTO users (id, email, full_name, hashed_password, role) VALUES ('u1', 'a@b.c', 'A', '-', 'admin')"
+        ))
+
+    reset_database()
+
+    with database.connect() as connection:
+        triggers = set(connection.execute(text(
+            "SELECT tgname FROM pg_trigger WHERE tgrelid = 'queue_entries'::regclass AND NOT tgisinternal"
+        )).scalars())
+        users = connection.execute(text("SELECT count(*) FROM users")).scalar()
+    assert any(name.startswith("queue_entries_archive_sync") for name in triggers)
+    assert users == 0
@@ -0,0 +1,62 @@
+# tests/test_numbering.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.database import AsyncSessionLocal
+from app.models.queue import QueueCounter, QueueEntry, QueueStatus
+from app.services.numbering import COUNTER_ID, issue_ticket_number, local_today
+
+pytestmark = pytest.mark.anyio
+
+async def _submit(status: QueueStatus = QueueStatus.WAITING) -> int:
+    """Выдать номер и создать заявку в отдельной транзакции, как create_queue_entry"""
+    async with AsyncSessionLocal() as session:
+        queue_number, order_key = await issue_ticket_number(session)
+        session.add(QueueEntry(
+            id=str(uuid4()),
+            queue_number=queue_number,
+            order_key=order_key,
+            full_name="Тест",
+            phone="+77000000000",
+            programs=[],
+            status=status,
+        ))
+        await session.commit()
+        return queue_number
+
+async def test_parallel_submissions_get_unique_numbers(db):
+    numbers = await asyncio.gather(*(_submit() for _ in range(200)))
+
+    assert sorted(numbers) == list(range(1, 201))
+    duplicates = (await db.execute(
+        select(QueueEntry.queue_number).group_by(QueueEntry.queue_number)
+        .having(func.count() > 1)
+    )).scalars().all()
+    assert duplicates == []
+
+async def test_new_day_skips_numbers_of_active_entries(db):
+    for _ in range(10):
+        await _submit()
+    # Вчерашние заявки: #5 и #9 еще в очереди, остальные обслужены
+    await db.execute(
+        update(QueueEntry).where(QueueEntry.queue_number.not_in([5, 9]))
+        .values(status=QueueStatus.COMPLETED)
+    )
+    await db.execute(
+        update(QueueCounter).where(QueueCounter.id == COUNTER_ID)
+        .values(number_date=local_today() - timedelta(days=1))
+    )
+    await db.commit()
+
+    numbers = [await _submit() for _ in range(8)]
+
+    assert numbers == [1, 2, 3, 4, 6, 7, 8, 10]
+
+def test_local_today_uses_queue_timezone():
+    # 20:00 UTC - уже следующий день в Казахстане (UTC+5)
+    late_evening_utc = datetime(2026, 10, 17, 20, 0, tzinfo=timezone.utc)
+    assert local_today(late_evening_utc).isoformat() == "2026-10-18"
@@ -0,0 +1,107 @@
+# tests/test_positions.py
+import asyncio
+import random
+
+import pytest
+from sqlalchemy import select
+
+from app.api.routes.admission import call_next_applicant, complete_current_applicant
+from app.api.routes.public import cancel_queue_by_id, move_back_in_queue
+from app.database import AsyncSessionLocal
+from app.models.queue import QueueEntry, QueueStatus
+from app.models.user import EmployeeStatus, User
+from app.services import positions
+from app.services.events import get_state_version
+from app.services.positions import get_people_ahead_batch
+from app.services.versioned_cache import VersionedCache
+from tests.helpers import add_employee, add_waiting, waiting_people_ahead
+
+pytestmark = pytest.mark.anyio
+
+async def _slow_load():
+    """Загрузка снимка, которая заканчивается позже, чем в нее попали данные"""
+    order_keys = await positions.load_waiting_order_keys()
+    await asyncio.sleep(0.005)
+    return order_keys
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    # Большой TTL: свежесть снимка должна держаться только на версии состояния
+    cache = VersionedCache(_slow_load, ttl_seconds=3600)
+    monkeypatch.setattr(positions, "waiting_order_cache", cache)
+    return cache
+
+async def _assert_positions_match(db):
+    expected = await waiting_people_ahead(db)
+    order_keys = dict((await db.execute(
+        select(QueueEntry.id, QueueEntry.order_key).where(QueueEntry.id.in_(list(expected)))
+    )).all())
+    await db.rollback()
+
+    people_ahead = await get_people_ahead_batch(order_keys.values())
+    assert {entry_id: people_ahead[key] for entry_id, key in order_keys.items()} == expected
+
+async def _waiting_ids(db):
+    ids = (await db.execute(
+        select(QueueEntry.id).where(QueueEntry.status == QueueStatus.WAITING).order_by(QueueEntry.id)
+    )).scalars().all()
+    await db.rollback()
+    return ids
+
+async def test_positions_follow_interleaved_transitions(db, snapshot):
+    employees = [await add_employee(db, f"Сотрудник {i}", desk=str(i)) for i in range(2)]
+    for employee in employees:
+        await add_waiting(db, employee, 6)
+    employee_ids = [employee.id for employee in employees]
+
+    rng = random.Random(13)
+    for _ in range(120):
+        employee_id = rng.choice(employee_ids)
+        waiting = await _waiting_ids(db)
+        async with AsyncSessionLocal() as session:
+            employee = await session.get(User, employee_id)
+            action = rng.choice(["create", "call_next", "cancel", "move_back", "move_back"])
+            if action == "create" or not waiting:
+                await add_waiting(session, employee)
+            elif action == "call_next":
+                if employee.status == EmployeeStatus.BUSY.value:
+                    await complete_current_applicant(db=session, current_user=employee)
+                else:
+                    await call_next_applicant(db=session, current_user=employee)
+            elif action == "cancel":
+                await cancel_queue_by_id(rng.choice(waiting), db=session)
+            else:
+                await move_back_in_queue(rng.choice(waiting), db=session)
+
+        await _assert_positions_match(db)
+
+async def test_position_after_move_back_sees_own_bump(db, monkeypatch):
+    employee = await add_employee(db, "Сотрудник")
+    entries = await add_waiting(db, employee, 20)
+    loaded, release = asyncio.Event(), asyncio.Event()
+
+    async def gated_load():
+        order_keys = await positions.load_waiting_order_keys()
+        if not release.is_set():
+            loaded.set()
+            await release.wait()
+        return order_keys
+
+    monkeypatch.setattr(positions, "waiting_order_cache", VersionedCache(gated_load, ttl_seconds=3600))
+
+    # Перезагрузка снимка прочитала очередь до move-back, но сохранит его уже после события
+    reload = asyncio.create_task(get_people_ahead_batch([entries[0].order_key]))
+    await loaded.wait()
+    version = get_state_version()
+
+    async with AsyncSessionLocal() as session:
+        move_back = asyncio.create_task(move_back_in_queue(entries[0].id, db=session))
+        while get_state_version() == version:
+            await asyncio.sleep(0.001)
+        release.set()
+        moved = await move_back
+
+    # Старый снимок не считается свежим: заявка теперь последняя из 20
+    assert (await reload)[entries[0].order_key] == 0
+    assert moved.people_ahead == 19
+    await _assert_positions_match(db)
@@ -0,0 +1,97 @@
+# tests/test_query_plans.py
+#
+# Горячие запросы очереди должны идти по своим индексам (миграции 0003-0009).
+# Запросы повторяют те, что выполняют роуты и сервисы.
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import desc, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.models.archive import ArchivedQueueEntry
+from app.models.queue import QueueEntry, QueueStatus
+
+pytestmark = pytest.mark.anyio
+
+EMPLOYEE_ID = "employee-1"
+
+@pytest.fixture
+async def filled_db(db, database):
+    """Несколько тысяч заявок у двух сотрудников; активных, как в жизни, единицы процентов"""
+    await db.execute(text("""
+        INSERT INTO users (id, email, full_name, hashed_password, role, status)
+        VALUES ('employee-1', 'e1@test.local', 'Сотрудник 1', '-', 'admission', 'available'),
+               ('employee-2', 'e2@test.local', 'Сотрудник 2', '-', 'admission', 'available')
+    """))
+    await db.execute(text("""
+        INSERT INTO queue_entries (id, queue_number, order_key, full_name, phone, programs, status,
+                                   assigned_employee_id, created_at, updated_at)
+        SELECT 'entry-' || n, n, n, 'Абитуриент ' || n, '+7700' || lpad(n::text, 7, '0'), '["it"]'::jsonb,
+               CASE n % 50 WHEN 0 THEN 'WAITING' WHEN 1 THEN 'IN_PROGRESS' ELSE 'COMPLETED' END::queuestatus,
+               'employee-' || (n % 2 + 1), now() - n * interval '1 minute', now() - n * interval '1 minute'
+        FROM generate_series(1, 5000) AS n
+    """))
+    await db.commit()
+    # VACUUM - как у давно работающей таблицы: карта видимости для index-only scan и статистика
+    with database.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE queue_entries, archived_queue_entries"))
+    return db
+
+async def _used_indexes(db, statement) -> set:
+    """Индексы из плана EXPLAIN (FORMAT JSON)"""
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    # На тестовых объемах seq scan бывает дешевле - проверяем, что индекс вообще применим
+    await db.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+    await db.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    found = set()
+
+    def walk(node: dict):
+        if "Index Name" in node:
+            found.add(node["Index Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return found
+
+async def test_call_next_uses_employee_queue_index(filled_db):
+    statement = select(QueueEntry.id).where(
+        QueueEntry.status == QueueStatus.WAITING,
+        QueueEntry.assigned_employee_id == EMPLOYEE_ID
+    ).order_by(QueueEntry.order_key).limit(1).with_for_update(skip_locked=True)
+    assert "ix_queue_entries_employee_status_order" in await _used_indexes(filled_db, statement)
+
+async def test_duplicate_phone_check_uses_partial_index(filled_db):
+    statement = select(QueueEntry).where(
+        QueueEntry.phone == "+77000000050",
+        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.IN_PROGRESS])
+    )
+    assert "ix_queue_entries_phone_active" in await _used_indexes(filled_db, statement)
+
+async def test_position_snapshot_uses_status_order_index(filled_db):
+    statement = select(QueueEntry.order_key).where(
+        QueueEntry.status == QueueStatus.WAITING
+    ).order_by(QueueEntry.order_key)
+    assert "ix_queue_entries_status_order" in await _used_indexes(filled_db, statement)
+
+async def test_queue_check_by_name_uses_search_name_index(filled_db):
+    statement = select(QueueEntry).where(
+        QueueEntry.search_name == "абитуриент 50"
+    ).order_by(desc(QueueEntry.created_at)).limit(1)
+    assert "ix_queue_entries_search_name_created" in await _used_indexes(filled_db, statement)
+
+async def test_archive_lookup_uses_original_id_index(filled_db):
+    statement = select(ArchivedQueueEntry).where(ArchivedQueueEntry.original_id == "entry-50")
+    assert "ix_archived_queue_entries_original_id" in await _used_indexes(filled_db, statement)
+
+async def test_purge_batch_uses_completed_index(filled_db):
+    statement = select(QueueEntry.id).where(
+        QueueEntry.status == QueueStatus.COMPLETED,
+        QueueEntry.updated_at < datetime.utcnow() - timedelta(hours=12)
+    ).order_by(QueueEntry.updated_at.asc()).limit(1000)
+    assert "ix_queue_entries_completed_updated" in await _used_indexes(filled_db, statement)
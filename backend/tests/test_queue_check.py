@@ -0,0 +1,74 @@
+# tests/test_queue_check.py
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import positions, wait_time
+from app.services.versioned_cache import VersionedCache
+from main import app
+from tests.helpers import add_employee, add_waiting
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def client(monkeypatch):
+    # Кэши держат asyncio.Lock - у каждого теста свой цикл событий
+    monkeypatch.setattr(positions, "waiting_order_cache", VersionedCache(positions.load_waiting_order_keys, 3600))
+    monkeypatch.setattr(
+        positions, "employee_order_cache", VersionedCache(positions.load_waiting_order_keys_by_employee, 3600)
+    )
+    monkeypatch.setattr(wait_time, "active_desks_cache", VersionedCache(wait_time.load_active_desks, 3600))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        yield http
+
+async def _entry(db):
+    employee = await add_employee(db, "Сотрудник")
+    entries = await add_waiting(db, employee, 2)
+    entries[-1].notes = "Льгота"
+    await db.commit()
+    return entries[-1]
+
+async def test_check_by_phone_hides_personal_data(db, client):
+    entry = await _entry(db)
+
+    response = await client.get("/api/public/queue/check", params={"phone": "8" + entry.phone[2:]})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "queue_number": entry.queue_number,
+        "status": "waiting",
+        "position": 2,
+        "people_ahead": 1,
+        "estimated_time": response.json()["estimated_time"],
+    }
+
+async def test_check_by_name_and_phone_returns_entry(db, client):
+    entry = await _entry(db)
+
+    response = await client.get(
+        "/api/public/queue/check", params={"full_name": entry.full_name.upper(), "phone": entry.phone}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == entry.id
+    assert body["full_name"] == entry.full_name
+    assert body["notes"] == "Льгота"
+    assert body["position"] == 2
+
+async def test_check_requires_name_or_phone(db, client):
+    assert (await client.get("/api/public/queue/check")).status_code == 400
+    assert (await client.get("/api/public/queue/check", params={"phone": "+77000000000"})).status_code == 404
+
+async def test_checks_above_pool_size_do_not_starve_snapshot_load(db, client):
+    entry = await _entry(db)
+
+    # Больше одновременных проверок, чем соединений в пуле (pool_size + max_overflow)
+    checks = [
+        client.get("/api/public/queue/check", params={"full_name": entry.full_name})
+        for _ in range(60)
+    ]
+    responses = await asyncio.wait_for(asyncio.gather(*checks), timeout=10)
+
+    assert {response.status_code for response in responses} == {200}
@@ -0,0 +1,102 @@
+# tests/test_speechkit.py
+import base64
+import json
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import audio_cache as audio_cache_module
+from app.services import speechkit
+from app.services.audio_cache import AudioCache
+from app.services.http_client import OutboundHTTPClient
+
+pytestmark = pytest.mark.anyio
+
+TTS_URL = "https://tts.test/v1/text:synthesize"
+
+class StubTTS:
+    """Заглушка Google TTS: mp3 - это имя голоса, голоса из failing отвечают ошибкой"""
+
+    def __init__(self):
+        self.voices = []
+        self.failing = set()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        voice = json.loads(request.content)["voice"]["name"]
+        self.voices.append(voice)
+        if voice in self.failing or voice.split("-")[0] in self.failing:
+            return httpx.Response(400, json={"error": "voice unavailable"})
+        return httpx.Response(200, json={"audioContent": base64.b64encode(voice.encode()).decode()})
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def tts(monkeypatch, tmp_path):
+    stub = StubTTS()
+    monkeypatch.setattr(settings, "GOOGLE_TTS_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "GOOGLE_TTS_URL", TTS_URL)
+    monkeypatch.setattr(speechkit, "audio_cache", AudioCache(str(tmp_path), 10))
+    monkeypatch.setattr(speechkit, "_kazakh_voice", None)
+    monkeypatch.setattr(speechkit, "_kazakh_unavailable_until", 0.0)
+    monkeypatch.setattr(speechkit, "_inflight", {})
+    return stub
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(speechkit, "time", clock)
+    monkeypatch.setattr(audio_cache_module, "time", clock)
+    return clock
+
+@pytest.fixture
+async def http(tts):
+    client = OutboundHTTPClient(transport=httpx.MockTransport(tts))
+    yield client
+    await client.close()
+
+async def _announce(http, number: int, language: str) -> dict:
+    return await speechkit.generate_speech(number, "Тест", "3", language, http=http)
+
+async def test_repeated_call_is_cache_hit(tts, http):
+    first = await _announce(http, 5, "ru")
+    second = await _announce(http, 5, "ru")
+
+    assert first["success"] and second["success"]
+    assert second["audio_id"] == first["audio_id"]
+    assert tts.voices == ["ru-RU-Wavenet-C"]
+
+async def test_working_kazakh_voice_is_tried_first(tts, http):
+    tts.failing = {"kk-KZ-Neural2-A", "kk-KZ-Neural2-B"}
+
+    first = await _announce(http, 1, "kk")
+    tts.voices.clear()
+    second = await _announce(http, 2, "kk")
+
+    assert first["language"] == second["language"] == "kk"
+    assert tts.voices == ["kk-KZ-Wavenet-A"]
+
+async def test_russian_fallback_expires_with_kazakh_retry_window(tts, http, clock):
+    tts.failing = {"kk"}
+    fallback = await _announce(http, 7, "kk")
+    assert fallback["language"] == "ru"
+
+    # Пока казахские голоса не пробуем, талон берется из кэша
+    tts.voices.clear()
+    assert (await _announce(http, 7, "kk"))["language"] == "ru"
+    assert tts.voices == []
+
+    # Окно прошло, голоса снова работают - номер объявляется по-казахски
+    tts.failing = set()
+    clock.now += speechkit.KAZAKH_RETRY_SECONDS + 1
+    recovered = await _announce(http, 7, "kk")
+
+    assert recovered["language"] == "kk"
+    assert recovered["audio_id"] == fallback["audio_id"]
+    audio = await speechkit.get_announcement_audio(recovered["audio_id"])
+    assert audio.audio == b"kk-KZ-Neural2-A"
@@ -0,0 +1,148 @@
+# tests/test_wait_time.py
+import random
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.config import settings
+from app.models.archive import ArchivedQueueEntry, ArchiveQueueStatus
+from app.services import positions, wait_time
+from app.services.versioned_cache import VersionedCache
+from app.services.queue import select_employee_automatically
+from app.services.wait_time import WaitTimeEstimator, estimate_wait_minutes, load_completed_services
+from tests.helpers import add_employee, add_waiting
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    # Кэши и прогрев держат asyncio.Lock - у каждого теста свой цикл событий
+    monkeypatch.setattr(positions, "waiting_order_cache", VersionedCache(positions.load_waiting_order_keys, 3600))
+    monkeypatch.setattr(
+        positions, "employee_order_cache", VersionedCache(positions.load_waiting_order_keys_by_employee, 3600)
+    )
+    monkeypatch.setattr(wait_time, "active_desks_cache", VersionedCache(wait_time.load_active_desks, 3600))
+    # Пустой архив: каждый прием считается по константе 5 минут
+    monkeypatch.setattr(wait_time, "estimator", WaitTimeEstimator(alpha=0.3, min_samples=1, default_minutes=5))
+
+async def _two_desks(db):
+    """У первого сотрудника 6 ожидающих, у второго - 2 (выданы после всех заявок первого)"""
+    busy = await add_employee(db, "Загруженный", desk="1")
+    free = await add_employee(db, "Свободный", desk="2")
+    await add_waiting(db, busy, 6)
+    entries = await add_waiting(db, free, 2)
+    return free.id, entries[-1].order_key
+
+async def test_pinned_ticket_waits_for_own_employee_queue(db, fresh_state, monkeypatch):
+    monkeypatch.setattr(settings, "QUEUE_DISPATCH_MODE", "pinned")
+    employee_id, order_key = await _two_desks(db)
+
+    # Впереди по всей очереди 7 человек, но у своего сотрудника - только 1
+    assert await positions.get_people_ahead(order_key) == 7
+    assert await estimate_wait_minutes(order_key, employee_id) == 5
+
+async def test_steal_mode_shares_queue_between_desks(db, fresh_state, monkeypatch):
+    monkeypatch.setattr(settings, "QUEUE_DISPATCH_MODE", "steal")
+    employee_id, order_key = await _two_desks(db)
+
+    # 7 человек впереди на 2 работающих стола по 5 минут
+    assert await estimate_wait_minutes(order_key, employee_id) == 18
+
+async def test_unassigned_ticket_uses_all_desks(db, fresh_state, monkeypatch):
+    monkeypatch.setattr(settings, "QUEUE_DISPATCH_MODE", "pinned")
+    _, order_key = await _two_desks(db)
+
+    assert await estimate_wait_minutes(order_key, None) == 18
+
+async def test_pinned_estimate_uses_employee_rate():
+    estimator = WaitTimeEstimator(alpha=1.0, min_samples=1, default_minutes=5)
+    estimator._warmed = True
+    estimator.observe(60, "fast")
+    estimator.observe(600, "slow")
+
+    assert estimator.estimate_minutes(3, 1, "fast") == 3
+    assert estimator.estimate_minutes(3, 1, "slow") == 30
+    assert estimator.estimate_minutes(0, 1, "slow") == 0
+
+def test_program_stats_take_priority_over_employee_average():
+    estimator = WaitTimeEstimator(alpha=1.0, min_samples=1, default_minutes=5)
+    estimator._warmed = True
+    # Сотрудник быстро принимает IT и долго - медицину
+    estimator.observe(300, "desk", ["it"])
+    estimator.observe(900, "desk", ["medicine"])
+    estimator.observe(600, "other", ["law"])
+    estimator.observe(600, "other", ["economics"])
+
+    assert estimator.service_seconds("desk", ["it"]) == 300
+    assert estimator.service_seconds("desk", ["medicine"]) == 900
+    # Программу сотрудник не вел: ее среднее с поправкой на его скорость (900/600)
+    assert estimator.service_seconds("desk", ["law"]) == 900
+    # Без статистики по программам - среднее сотрудника
+    assert estimator.service_seconds("desk", ["history"]) == 900
+    assert estimator.service_seconds(None, ["law"]) == 600
+
+def test_routing_defaults_to_least_loaded():
+    from app.services.routing import Candidate, route
+
+    assert settings.ROUTING_STRATEGY == "least_loaded"
+    specialist = Candidate("specialist", active=3, programs=["it"], languages=["kk"])
+    generalist = Candidate("generalist", active=1)
+
+    assert route([specialist, generalist], ["it"], "kk", lambda *_: 60) is generalist
+
+# Реплей: 6 сотрудников разной скорости, 3 программы разной сложности (секунды)
+SPEEDS = {f"employee-{i}": speed for i, speed in enumerate([0.7, 0.85, 1.0, 1.1, 1.25, 1.4])}
+PROGRAM_SECONDS = {"it": 240, "law": 420, "medicine": 720}
+
+async def _fill_archive(db, visits: int):
+    rng = random.Random(14)
+    start = datetime(2026, 8, 1, 9, tzinfo=timezone.utc)
+    for i in range(visits):
+        employee_id = rng.choice(list(SPEEDS))
+        program = rng.choice(list(PROGRAM_SECONDS))
+        seconds = int(PROGRAM_SECONDS[program] * SPEEDS[employee_id] * rng.lognormvariate(0, 0.25))
+        completed_at = start + timedelta(minutes=i)
+        db.add(ArchivedQueueEntry(
+            original_id=str(uuid4()), queue_number=i + 1, full_name=f"Абитуриент {i}", phone="+77000000000",
+            programs=[program], status=ArchiveQueueStatus.COMPLETED, assigned_employee_id=employee_id,
+            created_at=completed_at - timedelta(seconds=seconds), completed_at=completed_at,
+            processing_time=seconds,
+        ))
+    await db.commit()
+
+async def test_replay_estimator_beats_constant(db):
+    """Прогноз каждого приема до его учета: ошибка оценщика против 5 минут на человека"""
+    visits = 3000
+    await _fill_archive(db, visits)
+    rows = list(reversed(await load_completed_services(visits)))
+    assert len(rows) == visits
+
+    estimator = WaitTimeEstimator(
+        alpha=settings.WAIT_TIME_EWMA_ALPHA, min_samples=settings.WAIT_TIME_MIN_SAMPLES, default_minutes=5
+    )
+    estimator._warmed = True
+    estimator_error = constant_error = 0.0
+    for row in rows:
+        estimator_error += abs(estimator.service_seconds(row.assigned_employee_id, row.programs) - row.processing_time)
+        constant_error += abs(estimator.default_seconds - row.processing_time)
+        estimator.observe(row.processing_time, row.assigned_employee_id, row.programs)
+
+    # Средняя абсолютная ошибка на прием
+    print(f"MAE: estimator {estimator_error / visits:.0f} s, constant {constant_error / visits:.0f} s")
+    assert estimator_error / visits < 0.5 * constant_error / visits
+
+async def test_failed_warm_up_keeps_default_and_routing(db, monkeypatch):
+    async def archive_down(limit):
+        raise ConnectionError("archive is unavailable")
+
+    cold = WaitTimeEstimator(alpha=0.3, min_samples=1, default_minutes=5)
+    monkeypatch.setattr(wait_time, "load_completed_services", archive_down)
+    monkeypatch.setattr(wait_time, "estimator", cold)
+    employee = await add_employee(db, "Сотрудник")
+
+    await cold.warm_up()
+
+    assert not cold._warmed
+    assert cold.service_seconds(employee.id, ["it"]) == 300
+    assert (await select_employee_automatically(db, ["it"], "ru")).id == employee.id
@@ -122,7 +122,7 @@ export const adminAPI = {
       return [];
     }
   },
-  exportQueueToExcel: () => api.get('/admin/queue/export', { responseType: 'blob' }),
+  exportQueueToExcel: (params) => api.get('/admin/queue/export', { params, responseType: 'blob' }),
   // Новые методы для управления видео
   getVideoSettings: () => api.get('/admin/video-settings'),
   updateVideoSettings: (data) => api.put('/admin/video-settings', data)
@@ -133,6 +133,16 @@ export const publicAPI = {
   getVideoSettings: () => api.get('/public/video-settings')
 };
 
+// URL потока событий очереди (Server-Sent Events)
+export const getQueueEventsUrl = (topics) => {
+  const params = new URLSearchParams();
+  topics.forEach((topic) => params.append('topic', topic));
+  return `${API_URL}/public/events?${params.toString()}`;
+};
+
+// MP3 объявления по audio_id из ответа call-next (браузер кэширует по ETag)
+export const getAnnouncementAudioUrl = (audioId) => `${API_URL}/public/audio/${audioId}`;
+
 
 
 export default api;
\ No newline at end of file
@@ -5,9 +5,12 @@ import { FaSearch, FaFilter, FaSort, FaChevronDown } from 'react-icons/fa';
 import { useTranslation } from 'react-i18next';
 import './AdmissionQueue.css';
 import ProgramTranslator from '../ProgramTranslator/ProgramTranslator';
+import { useAuth } from '../../context/AuthContext';
+import { useQueueEvents } from '../../hooks/useQueueEvents';
 
 const AdmissionQueue = () => {
   const { t, i18n } = useTranslation();
+  const { user: currentUser } = useAuth();
   const [queue, setQueue] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -75,15 +78,14 @@ const AdmissionQueue = () => {
     []
   );
 
-  // 🔄 АВТООБНОВЛЕНИЕ списка заявок каждые 10 секунд
+  // 🔄 АВТООБНОВЛЕНИЕ списка заявок по событиям сервера (или каждые 10 секунд без потока)
+  useQueueEvents([currentUser?.id && `employee:${currentUser.id}`], () => {
+    console.log('🔄 Автообновление списка заявок...');
+    fetchQueue(activeFilter, searchTerm, searchField, sortBy);
+  }, 10000);
+
   useEffect(() => {
     fetchQueue(activeFilter, searchTerm, searchField, sortBy);
-    
-    // Устанавливаем интервал для автообновления каждые 10 секунд
-    const interval = setInterval(() => {
-      console.log('🔄 Автообновление списка заявок...');
-      fetchQueue(activeFilter, searchTerm, searchField, sortBy);
-    }, 10000);
 
     // 📡 СЛУШАЕМ СОБЫТИЯ от других компонентов
     const handleQueueUpdate = () => {
@@ -95,7 +97,6 @@ const AdmissionQueue = () => {
 
     return () => {
       fetchQueue.cancel();
-      clearInterval(interval);
       window.removeEventListener('queueUpdated', handleQueueUpdate);
     };
   }, [activeFilter, searchTerm, searchField, sortBy, fetchQueue]);
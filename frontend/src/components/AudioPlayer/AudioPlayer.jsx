@@ -1,20 +1,19 @@
 import React, { useEffect, useRef } from 'react';
 
-const AudioPlayer = ({ audioBase64, onEnded, autoPlay = true }) => {
+const AudioPlayer = ({ audioUrl, onEnded, autoPlay = true }) => {
   const audioRef = useRef(null);
   const hasPlayedRef = useRef(false);
   const currentAudioId = useRef(null);
 
   useEffect(() => {
-    if (audioBase64 && audioRef.current && !hasPlayedRef.current) {
-      console.log('🎵 AudioPlayer: получен base64 размером', audioBase64.length, 'символов');
+    if (audioUrl && audioRef.current && !hasPlayedRef.current) {
+      console.log('🎵 AudioPlayer: получена ссылка на аудио', audioUrl);
       
       // Создаем уникальный ID для этого аудио
       const audioId = `audio_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
       currentAudioId.current = audioId;
       
-      // Правильное создание data URL из base64
-      const audioUrl = `data:audio/mp3;base64,${audioBase64}`;
+      // Браузер сам скачивает mp3 (с поддержкой Range и кэша)
       audioRef.current.src = audioUrl;
 
       if (autoPlay) {
@@ -63,7 +62,7 @@ const AudioPlayer = ({ audioBase64, onEnded, autoPlay = true }) => {
         }, 100);
       }
     };
-  }, [audioBase64, autoPlay]);
+  }, [audioUrl, autoPlay]);
 
   const handleEnded = () => {
     console.log('🏁 Аудио закончилось, ID:', currentAudioId.current);
@@ -84,7 +83,7 @@ const AudioPlayer = ({ audioBase64, onEnded, autoPlay = true }) => {
     }
   };
 
-  if (!audioBase64) {
+  if (!audioUrl) {
     return null;
   }
 
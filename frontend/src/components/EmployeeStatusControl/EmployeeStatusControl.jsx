@@ -1,11 +1,14 @@
 import React, { useState, useEffect, useRef } from 'react';
-import { admissionAPI } from '../../api';
+import { admissionAPI, getAnnouncementAudioUrl } from '../../api';
 import { useTranslation } from 'react-i18next';
 import AudioPlayer from '../AudioPlayer/AudioPlayer';
+import { useAuth } from '../../context/AuthContext';
+import { useQueueEvents } from '../../hooks/useQueueEvents';
 import './EmployeeStatusControl.css';
 
 const EmployeeStatusControl = () => {
   const { t } = useTranslation();
+  const { user: currentUser } = useAuth();
   const [status, setStatus] = useState(null);
   const [loading, setLoading] = useState(true);
   const [actionLoading, setActionLoading] = useState(false);
@@ -33,12 +36,15 @@ const EmployeeStatusControl = () => {
 
   useEffect(() => {
     fetchEmployeeStatus();
-    
-    // УВЕЛИЧИВАЕМ интервал до 30 секунд чтобы реже обновлялся
-    const interval = setInterval(fetchEmployeeStatus, 30000);
-    return () => clearInterval(interval);
   }, []);
 
+  // Статус меняется по событиям сервера; без потока - опрос раз в 30 секунд
+  useQueueEvents([currentUser?.id && `employee:${currentUser.id}`], (event) => {
+    if (['employee_status', 'connected', 'poll'].includes(event.type)) {
+      fetchEmployeeStatus();
+    }
+  }, 30000);
+
   // Функции для управления статусом
   const handleStartWork = async () => {
     try {
@@ -116,13 +122,15 @@ const EmployeeStatusControl = () => {
         
         // Если есть аудио данные, воспроизводим их
         if (response.data.speech && response.data.speech.success) {
-          console.log('🔊 АУДИО BASE64 найден, размер:', response.data.speech.audio_base64?.length);
+          console.log('🔊 АУДИО найдено:', response.data.speech.audio_id);
           console.log('📝 ТЕКСТ ОБЪЯВЛЕНИЯ:', response.data.speech.text);
           
           // СОЗДАЕМ УНИКАЛЬНЫЙ ID для этого аудио
           audioIdRef.current = Date.now().toString();
+          const audioUrl = getAnnouncementAudioUrl(response.data.speech.audio_id);
           const audioInfo = {
             ...response.data.speech,
+            audioUrl,
             audioId: audioIdRef.current
           };
           
@@ -131,7 +139,7 @@ const EmployeeStatusControl = () => {
           // **НОВОЕ**: Сохраняем аудио данные в localStorage для других страниц
           try {
             localStorage.setItem('currentAnnouncement', JSON.stringify({
-              audioBase64: response.data.speech.audio_base64,
+              audioUrl,
               text: response.data.speech.text,
               language: response.data.speech.language,
               timestamp: Date.now(),
@@ -348,10 +356,10 @@ const EmployeeStatusControl = () => {
       </div>
 
       {/* Аудиоплеер для воспроизведения объявлений - используем audioId как key */}
-      {audioData && audioData.audio_base64 && (
+      {audioData && audioData.audioUrl && (
         <AudioPlayer
           key={audioData.audioId} // Уникальный key предотвращает перезапуск
-          audioBase64={audioData.audio_base64}
+          audioUrl={audioData.audioUrl}
           onEnded={handleAudioEnded}
           autoPlay={true}
         />
@@ -33,18 +33,22 @@ const QueueList = () => {
     }
   }, []);
 
+  // Параметры фильтров для списка и выгрузки
+  const buildFilterParams = () => {
+    const params = {};
+    if (filters.status) params.status = filters.status;
+    if (filters.date) params.date = filters.date;
+    if (filters.employee) params.employee = filters.employee;
+    if (filters.full_name) params.full_name = filters.full_name;  
+    if (filters.program) params.program = filters.program;      
+    return params;
+  };
+
   // Загрузка заявок
   const loadQueue = async () => {
     try {
         setLoading(true);
-        const params = {};
-        if (filters.status) params.status = filters.status;
-        if (filters.date) params.date = filters.date;
-        if (filters.employee) params.employee = filters.employee;
-        if (filters.full_name) params.full_name = filters.full_name;  
-        if (filters.program) params.program = filters.program;      
-        
-        const response = await adminAPI.getAllQueue(params);
+        const response = await adminAPI.getAllQueue(buildFilterParams());
         setQueue(Array.isArray(response) ? response : []);
     } catch (err) {
         setError(err.response?.data?.detail || t('queueList.loadError'));
@@ -68,7 +72,7 @@ const QueueList = () => {
   const handleExportToExcel = async () => {
     try {
       setExportLoading(true);
-      const response = await adminAPI.exportQueueToExcel();
+      const response = await adminAPI.exportQueueToExcel(buildFilterParams());
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement('a');
       link.href = url;
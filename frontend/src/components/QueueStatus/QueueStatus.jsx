@@ -1,7 +1,8 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { queueAPI } from '../../api';
 import { useTranslation } from 'react-i18next';
 import { FaChevronDown } from 'react-icons/fa';
+import { useQueueEvents } from '../../hooks/useQueueEvents';
 import './QueueStatus.css';
 
 const QueueStatus = ({ onStatusChange }) => {
@@ -10,27 +11,27 @@ const QueueStatus = ({ onStatusChange }) => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
-  useEffect(() => {
-    const fetchStatus = async () => {
-      try {
-        setLoading(true);
-        const response = await queueAPI.getStatus();
-        setStatus(response.data);
-        onStatusChange && onStatusChange(true);
-        setError(null);
-      } catch (err) {
-        setError(t('queueStatus.notInQueue'));
-        onStatusChange && onStatusChange(false);
-      } finally {
-        setLoading(false);
-      }
-    };
+  const fetchStatus = useCallback(async () => {
+    try {
+      setLoading(true);
+      const response = await queueAPI.getStatus();
+      setStatus(response.data);
+      onStatusChange && onStatusChange(true);
+      setError(null);
+    } catch (err) {
+      setError(t('queueStatus.notInQueue'));
+      onStatusChange && onStatusChange(false);
+    } finally {
+      setLoading(false);
+    }
+  }, [onStatusChange]);
 
+  useEffect(() => {
     fetchStatus();
+  }, [fetchStatus]);
 
-    const interval = setInterval(fetchStatus, 30000);
-    return () => clearInterval(interval);
-  }, [onStatusChange]);
+  // Позиция меняется при любом изменении очереди; без потока - опрос раз в 30 секунд
+  useQueueEvents(['queue'], fetchStatus, 30000);
 
   const handleCancelQueue = async () => {
     try {
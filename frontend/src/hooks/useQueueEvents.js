@@ -0,0 +1,54 @@
+import { useEffect, useRef } from 'react';
+import { getQueueEventsUrl } from '../api';
+
+// Подписка на события очереди через Server-Sent Events.
+// Пока соединение активно, опрос не нужен; если EventSource недоступен
+// или соединение упало - вызываем onEvent по таймеру (старое поведение).
+export const useQueueEvents = (topics, onEvent, fallbackInterval = 30000) => {
+  const onEventRef = useRef(onEvent);
+  onEventRef.current = onEvent;
+
+  const topicsKey = topics.filter(Boolean).join('|');
+
+  useEffect(() => {
+    if (!topicsKey) return;
+
+    let connected = false;
+    let source = null;
+
+    const interval = setInterval(() => {
+      if (!connected) {
+        onEventRef.current({ type: 'poll' });
+      }
+    }, fallbackInterval);
+
+    if (window.EventSource) {
+      source = new EventSource(getQueueEventsUrl(topicsKey.split('|')));
+
+      source.onopen = () => {
+        // После (пере)подключения перезапрашиваем данные - события могли быть пропущены
+        if (!connected) {
+          connected = true;
+          onEventRef.current({ type: 'connected' });
+        }
+      };
+
+      source.onerror = () => {
+        connected = false;
+      };
+
+      source.onmessage = (message) => {
+        try {
+          onEventRef.current(JSON.parse(message.data));
+        } catch (error) {
+          console.error('❌ Ошибка разбора события очереди:', error);
+        }
+      };
+    }
+
+    return () => {
+      clearInterval(interval);
+      if (source) source.close();
+    };
+  }, [topicsKey, fallbackInterval]);
+};
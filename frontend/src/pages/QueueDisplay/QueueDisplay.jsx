@@ -5,6 +5,7 @@ import { queueAPI, publicAPI } from '../../api';
 import { useTranslation } from 'react-i18next';
 import { getProgramCategoryFromArray, getProgramColors } from '../../utils/programColors';
 import AudioPlayer from '../../components/AudioPlayer/AudioPlayer';
+import { useQueueEvents } from '../../hooks/useQueueEvents';
 import './QueueDisplay.css';
 
 const QueueDisplay = () => {
@@ -194,14 +195,12 @@ const QueueDisplay = () => {
     return () => window.removeEventListener('storage', handleStorageChange);
   }, []);
 
-  // Обновляем данные каждые 5 секунд
+  // Загружаем данные при открытии, дальше обновляемся по событиям сервера
   useEffect(() => {
     fetchQueueData();
     fetchVideoSettings();
 
     const interval = setInterval(() => {
-      fetchQueueData();
-      fetchVideoSettings();
       setCurrentTime(new Date());
       
       // **НОВОЕ**: Периодически проверяем новые объявления
@@ -211,6 +210,19 @@ const QueueDisplay = () => {
     return () => clearInterval(interval);
   }, []);
 
+  // 📡 Server-Sent Events: табло перезапрашивает данные только при изменениях.
+  // Если поток недоступен - опрос каждые 5 секунд, как раньше
+  useQueueEvents(['display'], (event) => {
+    if (event.type === 'video_settings') {
+      fetchVideoSettings();
+      return;
+    }
+    fetchQueueData();
+    if (event.type === 'poll' || event.type === 'connected') {
+      fetchVideoSettings();
+    }
+  }, 5000);
+
   // НОВЫЕ ФУНКЦИИ: Получение цветовых классов на основе программ заявки
   const getCardColorClassByPrograms = (entry) => {
     // Если есть информация о программах в entry
@@ -337,10 +349,10 @@ const QueueDisplay = () => {
       )}
 
       {/* **НОВОЕ**: Аудиоплеер для воспроизведения объявлений на display странице */}
-      {currentAnnouncement && currentAnnouncement.audioBase64 && (
+      {currentAnnouncement && currentAnnouncement.audioUrl && (
         <AudioPlayer
           key={currentAnnouncement.audioId}
-          audioBase64={currentAnnouncement.audioBase64}
+          audioUrl={currentAnnouncement.audioUrl}
           onEnded={handleAnnouncementEnded}
           autoPlay={true}
         />